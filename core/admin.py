@@ -5,6 +5,8 @@
 from django.contrib import admin
 from .models import Nino, ResponsableAutorizado
 from .models import Maestro, Aula, Seccion, HorarioAula, AsignacionAula, PermisoAusencia
+from .models import ResumenAsistenciaSeccion, HistorialAsistenciaMensual
+from .models import NotificacionCorreo, RegistroNotificacion, PreferenciaNotificacion
 
 
 @admin.register(Nino)
@@ -194,7 +196,7 @@ class ResponsableAutorizadoAdmin(admin.ModelAdmin):
 
 @admin.register(Maestro)
 class MaestroAdmin(admin.ModelAdmin):
-        list_display = ['nombre_completo', 'email', 'telefono', 'activo']
+        list_display = ['nombre_completo', 'email', 'telefono', 'usuario', 'activo']
         list_filter = ['activo']
         search_fields = ['nombre_completo', 'email']
 
@@ -333,4 +335,73 @@ class PadreNinoAdmin(admin.ModelAdmin):
     
     def padre_nombre(self, obj):
         return obj.padre.get_full_name() or obj.padre.username
-    padre_nombre.short_description = "Padre/Tutor"
\ No newline at end of file
+    padre_nombre.short_description = "Padre/Tutor"
+
+# ----- RESUMEN DE ASISTENCIA POR SECCIÓN -----
+
+@admin.register(ResumenAsistenciaSeccion)
+class ResumenAsistenciaSeccionAdmin(admin.ModelAdmin):
+    """Resumen diario por sección (solo lectura, se mantiene automáticamente)"""
+
+    list_display = ['fecha', 'seccion', 'presentes', 'ausentes', 'justificados']
+    list_filter = ['seccion__aula', 'seccion', 'fecha']
+    date_hierarchy = 'fecha'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(HistorialAsistenciaMensual)
+class HistorialAsistenciaMensualAdmin(admin.ModelAdmin):
+    """Historial mensual en máscaras de bits (solo lectura, se mantiene automáticamente)"""
+
+    list_display = ['nino', 'anio', 'mes', 'dias_lectivos', 'dias_presente', 'tasa_asistencia']
+    list_filter = ['anio', 'mes']
+    search_fields = ['nino__nombre_completo']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(NotificacionCorreo)
+class NotificacionCorreoAdmin(admin.ModelAdmin):
+    """Bandeja de salida de correos (la envía el worker procesar_notificaciones)"""
+
+    list_display = ['tipo', 'destinatario', 'estado', 'intentos', 'creada_en', 'enviada_en']
+    list_filter = ['estado', 'tipo']
+    search_fields = ['destinatario']
+    readonly_fields = ['tipo', 'destinatario', 'datos', 'intentos', 'error', 'creada_por',
+                       'creada_en', 'reservada_en', 'enviada_en', 'resumen']
+
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(RegistroNotificacion)
+class RegistroNotificacionAdmin(admin.ModelAdmin):
+    """Bitácora de avisos enviados (uno por destinatario, niño, tipo y fecha, o por permiso)"""
+
+    list_display = ['fecha', 'tipo', 'nino', 'permiso', 'destinatario', 'creado_en']
+    list_filter = ['tipo', 'fecha']
+    search_fields = ['destinatario', 'nino__nombre_completo']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(PreferenciaNotificacion)
+class PreferenciaNotificacionAdmin(admin.ModelAdmin):
+    """Inmediata, resumen cada hora o resumen diario por destinatario"""
+
+    list_display = ['destinatario', 'frecuencia', 'actualizada_en']
+    list_filter = ['frecuencia']
+    search_fields = ['destinatario']
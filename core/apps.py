@@ -1,6 +1,20 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
+
+
+def _asegurar_indice_busqueda(using, **kwargs):
+    from django.db import connections
+
+    from .busqueda import crear_indice_busqueda
+
+    crear_indice_busqueda(connections[using])
 
 
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+
+        post_migrate.connect(_asegurar_indice_busqueda, sender=self)
@@ -0,0 +1,284 @@
+from django.db import IntegrityError, connections, router, transaction
+from django.db.models import Count, Exists, OuterRef, Q
+from django.utils import timezone
+
+from .eventos import publicar_asistencias
+from .historial import actualizar_historial_mensual
+from .models import Asistencia, AsignacionAula, ResumenAsistenciaSeccion
+from .permisos import dias_permiso, justificar_con_permisos, motivo_desde_permiso
+
+
+# Máximo de operaciones aceptadas en una sola sincronización (el reporte envía su cola en tramos de este tamaño)
+MAX_CAMBIOS_POR_LOTE = 500
+
+# Campos que se sobrescriben cuando el registro (nino, fecha) ya existe
+CAMPOS_ACTUALIZABLES = ['presente', 'motivo_inasistencia', 'registrado_por', 'marcado_en', 'actualizado_en']
+
+
+def leer_presente(valor, por_defecto=True):
+    """
+    Valor de ``presente`` recibido en JSON: solo se aceptan true y false (sin el
+    campo o con null, ``por_defecto``). Lanza ValueError con cualquier otro valor, porque
+    bool("false") o bool("0") lo marcarían presente.
+    """
+    if valor is None:
+        return por_defecto
+    if not isinstance(valor, bool):
+        raise ValueError('El campo presente debe ser true o false')
+    return valor
+
+
+def guardar_asistencias(asistencias, campos=CAMPOS_ACTUALIZABLES):
+    """
+    Inserta o actualiza en bloque registros de asistencia (upsert por nino y fecha).
+
+    Es la única primitiva de escritura de asistencia: en PostgreSQL y SQLite se
+    traduce en un INSERT ... ON CONFLICT (nino_id, fecha) DO UPDATE, por lo que
+    dos maestros marcando al mismo niño a la vez ya no provocan IntegrityError.
+    Con ``campos`` vacío los registros existentes no se tocan (DO NOTHING).
+    Las inasistencias sin motivo cubiertas por un permiso aprobado se guardan
+    justificadas (el objeto recibido queda con el motivo del permiso).
+    Retorna la misma lista de objetos, con su pk asignada cuando la base de datos
+    lo permite.
+    """
+    if not asistencias:
+        return []
+
+    if 'motivo_inasistencia' in campos:
+        justificar_con_permisos(asistencias)
+
+    nino_ids = {a.nino_id for a in asistencias}
+    fechas = {a.fecha for a in asistencias}
+    with transaction.atomic():
+        _escribir_asistencias(asistencias, campos)
+        actualizar_resumen_secciones(nino_ids, fechas)
+        actualizar_historial_mensual(nino_ids, fechas)
+        if campos:
+            publicar_asistencias(asistencias)
+    return asistencias
+
+
+def _escribir_asistencias(asistencias, campos):
+    if not campos:
+        return Asistencia.objects.bulk_create(asistencias, ignore_conflicts=True)
+
+    connection = connections[router.db_for_write(Asistencia)]
+    if connection.features.supports_update_conflicts_with_target:
+        return Asistencia.objects.bulk_create(
+            asistencias,
+            update_conflicts=True,
+            unique_fields=['nino', 'fecha'],
+            update_fields=campos
+        )
+
+    # Respaldo para motores sin ON CONFLICT: actualizar y, si no existía, insertar
+    for asistencia in asistencias:
+        valores = {
+            campo: Asistencia._meta.get_field(campo).pre_save(asistencia, False)
+            for campo in campos
+        }
+        existente = Asistencia.objects.filter(nino_id=asistencia.nino_id, fecha=asistencia.fecha)
+        with transaction.atomic():
+            if not existente.update(**valores):
+                try:
+                    with transaction.atomic():
+                        asistencia.save(force_insert=True)
+                    continue
+                except IntegrityError:
+                    # Otro proceso insertó el registro entre el UPDATE y el INSERT
+                    existente.update(**valores)
+            asistencia.pk = existente.values_list('pk', flat=True).get()
+    return asistencias
+
+
+def guardar_asistencia(nino, fecha, presente, motivo, usuario):
+    """Registra la asistencia de un niño en una fecha y retorna el registro final"""
+    asistencia = Asistencia(
+        nino=nino,
+        fecha=fecha,
+        presente=presente,
+        motivo_inasistencia=None if presente else (motivo or ''),
+        registrado_por=usuario,
+        marcado_en=timezone.now()
+    )
+    guardar_asistencias([asistencia])
+    return asistencia
+
+
+def crear_asistencias_faltantes(ninos, fecha, usuario=None, tamano_lote=None):
+    """
+    Crea (presente por defecto) el registro de ``fecha`` para cada niño de
+    ``ninos`` que aún no lo tenga y retorna cuántos faltaban.
+
+    Los faltantes se obtienen con un anti-join y se insertan en bloques de
+    ``tamano_lote`` con ON CONFLICT DO NOTHING, así que es idempotente y seguro
+    frente a otro proceso creando los mismos registros.
+    """
+    ya_registrados = Asistencia.objects.filter(nino=OuterRef('pk'), fecha=fecha)
+    faltantes = list(
+        ninos.order_by()
+        .filter(~Exists(ya_registrados))
+        .values_list('id', flat=True)
+    )
+
+    tamano_lote = tamano_lote or len(faltantes) or 1
+    for inicio in range(0, len(faltantes), tamano_lote):
+        guardar_asistencias(
+            [
+                Asistencia(nino_id=nino_id, fecha=fecha, registrado_por=usuario)
+                for nino_id in faltantes[inicio:inicio + tamano_lote]
+            ],
+            campos=[]
+        )
+    return len(faltantes)
+
+
+def materializar_asistencias(ninos, fecha, usuario=None):
+    """
+    Garantiza que cada niño de ``ninos`` tenga su registro de asistencia para
+    ``fecha`` y retorna un diccionario {nino_id: Asistencia}.
+
+    Usa un número fijo de consultas sin importar cuántos niños haya:
+    - Un anti-join para encontrar los niños sin registro en la fecha
+      (vacío si el comando sembrar_asistencia ya corrió)
+    - Un único INSERT en bloque (ignorando conflictos si otro usuario
+      creó el registro al mismo tiempo)
+    - Una consulta para cargar las asistencias del día
+    """
+    crear_asistencias_faltantes(ninos, fecha, usuario)
+
+    asistencias = Asistencia.objects.filter(
+        nino__in=ninos.order_by().values('id'),
+        fecha=fecha
+    )
+    return {asistencia.nino_id: asistencia for asistencia in asistencias}
+
+
+def reconciliar_permiso(permiso, usuario):
+    """
+    Registra como inasistencia justificada cada día de clase (según el horario
+    de la sección del niño) de un permiso aprobado, en un solo upsert, y
+    retorna cuántos días se escribieron.
+
+    Se respetan las asistencias que un maestro ya marcó como presente y las
+    inasistencias que ya tienen su propio motivo; los registros sembrados por
+    defecto (sin marca del maestro) sí se reemplazan. Los permisos parciales
+    (con horario) no generan registros: el niño asiste parte del día.
+    """
+    if permiso.estado != 'aprobado' or permiso.es_ausencia_parcial():
+        return 0
+
+    dias = list(dias_permiso(permiso))
+    respetadas = set(
+        Asistencia.objects.filter(nino_id=permiso.nino_id, fecha__in=dias).filter(
+            Q(presente=True, marcado_en__isnull=False)
+            | (Q(presente=False) & ~Q(motivo_inasistencia='') & Q(motivo_inasistencia__isnull=False))
+        ).values_list('fecha', flat=True)
+    )
+
+    ahora = timezone.now()
+    motivo = motivo_desde_permiso(permiso)
+    asistencias = guardar_asistencias([
+        Asistencia(
+            nino_id=permiso.nino_id,
+            fecha=dia,
+            presente=False,
+            motivo_inasistencia=motivo,
+            registrado_por=usuario,
+            marcado_en=ahora
+        )
+        for dia in dias if dia not in respetadas
+    ])
+    return len(asistencias)
+
+
+def _conteos_por_seccion(asistencias):
+    """Agrupa asistencias por (sección, fecha) con los totales del resumen"""
+    ausente = Q(presente=False)
+    justificado = ausente & Q(motivo_inasistencia__isnull=False) & ~Q(motivo_inasistencia='')
+    return (
+        asistencias
+        .filter(nino__asignacion_aula__isnull=False)
+        .order_by()
+        .values('nino__asignacion_aula__seccion_id', 'fecha')
+        .annotate(
+            presentes=Count('id', filter=Q(presente=True)),
+            ausentes=Count('id', filter=ausente),
+            justificados=Count('id', filter=justificado),
+        )
+    )
+
+
+def _resumenes_desde_conteos(conteos):
+    return [
+        ResumenAsistenciaSeccion(
+            seccion_id=fila['nino__asignacion_aula__seccion_id'],
+            fecha=fila['fecha'],
+            presentes=fila['presentes'],
+            ausentes=fila['ausentes'],
+            justificados=fila['justificados'],
+        )
+        for fila in conteos
+    ]
+
+
+def actualizar_resumen_secciones(nino_ids, fechas):
+    """
+    Recalcula solo los resúmenes (sección, fecha) afectados por cambios de
+    asistencia de ``nino_ids`` en ``fechas``; el costo depende del tamaño de las
+    secciones tocadas, no del historial completo.
+
+    Antes de contar se crean (en cero) los resúmenes que falten y se bloquean
+    con SELECT ... FOR UPDATE, en orden: dos maestros guardando en la misma
+    sección se serializan y el segundo cuenta ya confirmadas las asistencias
+    del primero (en READ COMMITTED cada consulta ve lo confirmado hasta ese
+    momento), en lugar de pisar su resumen con un conteo parcial.
+    """
+    secciones = set(
+        AsignacionAula.objects.filter(nino_id__in=nino_ids).values_list('seccion_id', flat=True)
+    )
+    if not secciones or not fechas:
+        return
+
+    with transaction.atomic():
+        ResumenAsistenciaSeccion.objects.bulk_create(
+            [ResumenAsistenciaSeccion(seccion_id=seccion_id, fecha=fecha) for seccion_id in secciones for fecha in fechas],
+            ignore_conflicts=True
+        )
+        bloqueados = list(
+            ResumenAsistenciaSeccion.objects.select_for_update()
+            .filter(seccion_id__in=secciones, fecha__in=fechas)
+            .order_by('seccion_id', 'fecha')
+        )
+
+        conteos = {
+            (r.seccion_id, r.fecha): r
+            for r in _resumenes_desde_conteos(_conteos_por_seccion(
+                Asistencia.objects.filter(nino__asignacion_aula__seccion_id__in=secciones, fecha__in=fechas)
+            ))
+        }
+
+        # Combinaciones sin registros (p. ej. tras borrar asistencias) no llevan resumen
+        obsoletos, vigentes = [], []
+        for resumen in bloqueados:
+            conteo = conteos.get((resumen.seccion_id, resumen.fecha))
+            if conteo is None:
+                obsoletos.append(resumen.pk)
+                continue
+            resumen.presentes = conteo.presentes
+            resumen.ausentes = conteo.ausentes
+            resumen.justificados = conteo.justificados
+            vigentes.append(resumen)
+        if obsoletos:
+            ResumenAsistenciaSeccion.objects.filter(pk__in=obsoletos).delete()
+        if vigentes:
+            ResumenAsistenciaSeccion.objects.bulk_update(vigentes, ['presentes', 'ausentes', 'justificados'])
+
+
+def reconstruir_resumen_secciones(tamano_lote=1000):
+    """Borra y recalcula todos los resúmenes por sección; retorna cuántos se crearon"""
+    with transaction.atomic():
+        ResumenAsistenciaSeccion.objects.all().delete()
+        resumenes = _resumenes_desde_conteos(_conteos_por_seccion(Asistencia.objects.all()))
+        ResumenAsistenciaSeccion.objects.bulk_create(resumenes, batch_size=tamano_lote)
+    return len(resumenes)
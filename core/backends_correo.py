@@ -0,0 +1,220 @@
+"""
+Backends de envío de correo.
+
+El backend activo se elige con ``settings.CORREO_BACKEND``. Todos exponen
+``enviar(correo)`` y retornan True si el proveedor aceptó el mensaje, False
+si lo rechazó de forma definitiva, o lanzan ``ErrorTransitorio`` cuando
+conviene reintentar más tarde (429, 5xx, timeouts, circuito abierto). El
+correo es un diccionario con las claves de ``SendSmtpEmail`` de Brevo
+(``sender``, ``to``, ``subject``, ``html_content`` y opcionalmente
+``message_versions``), así que los backends de prueba ven exactamente lo que
+se enviaría.
+
+El SDK de Brevo (cientos de módulos generados) y urllib3 se importan en el
+primer envío, no al cargar este módulo: las vistas y los comandos que solo
+encolan correos no pagan ese costo al arrancar (ver ``medir_arranque``).
+"""
+import logging
+import os
+import threading
+import time
+from functools import lru_cache
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from .metricas import BREVO_RESPUESTAS, BREVO_SEGUNDOS
+
+logger = logging.getLogger(__name__)
+
+# Clientes de Brevo del proceso, uno por (API key, host). Cada cliente mantiene
+# su propio pool de conexiones keep-alive (urllib3), así que los correos
+# siguientes reutilizan la conexión TLS en lugar de negociar una nueva.
+_clientes_brevo = {}
+_lock_clientes = threading.Lock()
+
+
+def _reiniciar_clientes_brevo():
+    """Tras un fork (workers de gunicorn) el hijo no debe compartir sockets con el padre"""
+    global _lock_clientes
+    _lock_clientes = threading.Lock()
+    _clientes_brevo.clear()
+
+
+os.register_at_fork(after_in_child=_reiniciar_clientes_brevo)
+
+
+def obtener_api_brevo(api_key, host=None):
+    """
+    Retorna el ``TransactionalEmailsApi`` compartido del proceso para
+    ``api_key`` y ``host`` (se crea la primera vez). Es seguro entre hilos.
+    """
+    clave = (api_key, host)
+    api_instance = _clientes_brevo.get(clave)
+    if api_instance is None:
+        from sib_api_v3_sdk import ApiClient, Configuration, TransactionalEmailsApi
+
+        with _lock_clientes:
+            api_instance = _clientes_brevo.get(clave)
+            if api_instance is None:
+                configuration = Configuration()
+                configuration.api_key['api-key'] = api_key
+                configuration.connection_pool_maxsize = settings.BREVO_POOL_MAXSIZE
+                if host:
+                    configuration.host = host
+                api_instance = TransactionalEmailsApi(ApiClient(configuration))
+                # Sin reintentos internos de urllib3: cada llamada respeta su
+                # presupuesto de tiempo y los reintentos los decide el worker
+                api_instance.api_client.rest_client.pool_manager.connection_pool_kw['retries'] = False
+                _clientes_brevo[clave] = api_instance
+    return api_instance
+
+
+class ErrorTransitorio(Exception):
+    """Falla temporal del proveedor; ``reintentar_en`` son los segundos sugeridos (Retry-After)"""
+
+    def __init__(self, mensaje, reintentar_en=None):
+        super().__init__(mensaje)
+        self.reintentar_en = reintentar_en
+
+
+class CircuitoAbierto(ErrorTransitorio):
+    """El circuito está abierto: se rechaza sin llamar al proveedor"""
+
+
+class Circuito:
+    """
+    Interruptor de circuito. Tras ``max_fallos`` fallas transitorias seguidas
+    se abre y rechaza de inmediato durante ``espera`` segundos; luego pasa a
+    semiabierto y deja pasar una única llamada de prueba: si funciona se
+    cierra, si falla se vuelve a abrir.
+    """
+
+    def __init__(self, max_fallos, espera):
+        self.max_fallos = max_fallos
+        self.espera = espera
+        self.estado = 'cerrado'
+        self._fallos = 0
+        self._abierto_hasta = 0
+        self._prueba_en_curso = False
+        self._lock = threading.Lock()
+
+    def antes_de_llamar(self):
+        with self._lock:
+            if self.estado == 'abierto':
+                restante = self._abierto_hasta - time.monotonic()
+                if restante > 0:
+                    raise CircuitoAbierto('Circuito de Brevo abierto', restante)
+                self.estado = 'semiabierto'
+            if self.estado == 'semiabierto':
+                if self._prueba_en_curso:
+                    raise CircuitoAbierto('Circuito de Brevo semiabierto: prueba en curso', self.espera)
+                self._prueba_en_curso = True
+
+    def registrar_exito(self):
+        with self._lock:
+            self.estado = 'cerrado'
+            self._fallos = 0
+            self._prueba_en_curso = False
+
+    def registrar_fallo(self):
+        with self._lock:
+            self._fallos += 1
+            self._prueba_en_curso = False
+            if self.estado == 'semiabierto' or self._fallos >= self.max_fallos:
+                self.estado = 'abierto'
+                self._abierto_hasta = time.monotonic() + self.espera
+
+
+def _segundos_retry_after(headers):
+    try:
+        return float(headers.get('Retry-After'))
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+class BackendBrevo:
+    """
+    Envía por la API transaccional de Brevo (producción), con presupuesto de
+    tiempo por llamada (BREVO_TIMEOUT_*) y un circuito por proceso.
+    """
+
+    def __init__(self):
+        self.circuito = Circuito(settings.BREVO_CIRCUITO_FALLOS, settings.BREVO_CIRCUITO_ESPERA)
+
+    def obtener_api(self):
+        api_key = os.getenv("BREVO_API_KEY")
+        if not api_key:
+            return None
+        return obtener_api_brevo(api_key, settings.BREVO_API_URL or None)
+
+    def enviar(self, correo):
+        api_instance = self.obtener_api()
+        if not api_instance:
+            logger.error("BREVO_API_KEY no configurada")
+            return False
+        import urllib3
+        from sib_api_v3_sdk import SendSmtpEmail
+        from sib_api_v3_sdk.rest import ApiException
+
+        try:
+            self.circuito.antes_de_llamar()
+        except CircuitoAbierto:
+            BREVO_RESPUESTAS.incrementar(codigo='circuito_abierto')
+            raise
+        try:
+            with BREVO_SEGUNDOS.medir():
+                api_instance.send_transac_email(
+                    SendSmtpEmail(**correo),
+                    _request_timeout=(settings.BREVO_TIMEOUT_CONEXION, settings.BREVO_TIMEOUT_LECTURA)
+                )
+        except ApiException as e:
+            BREVO_RESPUESTAS.incrementar(codigo=e.status)
+            if not e.status or e.status == 429 or e.status >= 500:
+                self.circuito.registrar_fallo()
+                raise ErrorTransitorio(f"Brevo respondió {e.status}", _segundos_retry_after(e.headers))
+            # Brevo está disponible pero rechazó el mensaje: reintentar no sirve
+            self.circuito.registrar_exito()
+            logger.error(f"❌ Error Brevo API: {e.status} - {e.body}")
+            return False
+        except urllib3.exceptions.HTTPError as e:
+            # Timeout, conexión rechazada, respuesta cortada...
+            BREVO_RESPUESTAS.incrementar(codigo=e.__class__.__name__)
+            self.circuito.registrar_fallo()
+            raise ErrorTransitorio(f"Brevo no responde: {e.__class__.__name__}") from e
+        BREVO_RESPUESTAS.incrementar(codigo=201)
+        self.circuito.registrar_exito()
+        return True
+
+
+class BackendBrevoLocal(BackendBrevo):
+    """
+    Mismo cliente que producción pero contra el servidor falso de Brevo
+    (``manage.py servidor_brevo_falso``) en ``settings.BREVO_FALSO_URL``;
+    no necesita API key ni red.
+    """
+
+    def obtener_api(self):
+        return obtener_api_brevo('local', settings.BREVO_FALSO_URL)
+
+
+class BackendMemoria:
+    """Guarda los correos en memoria en lugar de enviarlos (pruebas y benchmarks)"""
+
+    def __init__(self):
+        self.enviados = []
+        self._lock = threading.Lock()
+
+    def enviar(self, correo):
+        with self._lock:
+            self.enviados.append(correo)
+        return True
+
+    def limpiar(self):
+        with self._lock:
+            self.enviados.clear()
+
+
+@lru_cache(maxsize=None)
+def obtener_backend_correo():
+    return import_string(settings.CORREO_BACKEND)()
@@ -0,0 +1,100 @@
+"""
+Servidor HTTP local que imita el endpoint transaccional de Brevo
+(POST /v3/smtp/email) para pruebas de carga sin red ni API key.
+
+Responde como Brevo (201 con messageId o messageIds) después de una latencia
+configurable y falla con la proporción de errores indicada (alternando 500 y
+429 con Retry-After), de modo que los flujos con muchas notificaciones se puedan medir de
+forma realista con ``BackendBrevoLocal``.
+"""
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _ManejadorBrevo(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Encabezados y cuerpo en un solo write (sin esperas por Nagle/ACK retrasado)
+    wbufsize = -1
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        largo = int(self.headers.get('Content-Length') or 0)
+        cuerpo = self.rfile.read(largo)
+        servidor = self.server
+
+        if servidor.latencia:
+            time.sleep(servidor.latencia)
+
+        if self.path.rstrip('/') != '/v3/smtp/email':
+            return self._responder(404, {'code': 'not_found', 'message': 'Endpoint desconocido'})
+        if not self.headers.get('api-key'):
+            return self._responder(401, {'code': 'unauthorized', 'message': 'Key not found'})
+        try:
+            correo = json.loads(cuerpo)
+        except ValueError:
+            return self._responder(400, {'code': 'bad_request', 'message': 'JSON inválido'})
+
+        if servidor.rng.random() < servidor.tasa_errores:
+            servidor.contar('errores')
+            if servidor.rng.random() < 0.5:
+                return self._responder(
+                    429, {'code': 'too_many_requests', 'message': 'Rate limit'}, {'Retry-After': '1'}
+                )
+            return self._responder(500, {'code': 'internal_error', 'message': 'Error simulado'})
+
+        versiones = correo.get('messageVersions')
+        servidor.contar('solicitudes')
+        servidor.contar('correos', len(versiones) if versiones else 1)
+        if versiones:
+            return self._responder(201, {'messageIds': [f'<{uuid.uuid4()}@falso>' for _ in versiones]})
+        return self._responder(201, {'messageId': f'<{uuid.uuid4()}@falso>'})
+
+    def _responder(self, estado, datos, encabezados=None):
+        cuerpo = json.dumps(datos).encode()
+        self.send_response(estado)
+        for nombre, valor in (encabezados or {}).items():
+            self.send_header(nombre, valor)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(cuerpo)))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def log_message(self, *args):
+        pass
+
+
+class ServidorBrevoFalso(ThreadingHTTPServer):
+    """
+    ``latencia_ms`` se agrega a cada respuesta y ``tasa_errores`` (0 a 1) es la
+    proporción de solicitudes que fallan. ``estadisticas`` lleva la cuenta de
+    solicitudes aceptadas, correos (versiones) y errores simulados.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, host='127.0.0.1', puerto=8025, latencia_ms=0, tasa_errores=0.0, semilla=None):
+        super().__init__((host, puerto), _ManejadorBrevo)
+        self.latencia = latencia_ms / 1000
+        self.tasa_errores = tasa_errores
+        self.rng = random.Random(semilla)
+        self.estadisticas = {'solicitudes': 0, 'correos': 0, 'errores': 0}
+        self._lock = threading.Lock()
+
+    @property
+    def url(self):
+        host, puerto = self.server_address[:2]
+        return f'http://{host}:{puerto}/v3'
+
+    def contar(self, clave, cantidad=1):
+        with self._lock:
+            self.estadisticas[clave] += cantidad
+
+    def iniciar_en_hilo(self):
+        """Atiende en un hilo de fondo (para usarlo dentro de un benchmark)"""
+        hilo = threading.Thread(target=self.serve_forever, daemon=True)
+        hilo.start()
+        return hilo
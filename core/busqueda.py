@@ -0,0 +1,144 @@
+"""
+Búsqueda de niños por nombre, sin distinguir mayúsculas ni acentos.
+
+``Nino.nombre_busqueda`` guarda el nombre normalizado (minúsculas, sin
+acentos ni espacios repetidos) y cada motor lo indexa por trigramas:
+
+- PostgreSQL: índice GIN ``gin_trgm_ops`` (extensión pg_trgm) sobre la
+  columna; ``LIKE '%...%'`` usa el índice y los resultados se ordenan por
+  ``word_similarity``.
+- SQLite: tabla virtual FTS5 ``core_nino_fts`` con tokenizador ``trigram``,
+  sincronizada con ``core_nino`` por triggers y unida con el modelo no
+  administrado ``NinoBusqueda``; se ordena por ``rank`` (bm25).
+
+Los trigramas necesitan al menos 3 caracteres: las palabras más cortas del
+término se filtran con un ``LIKE`` sobre la columna normalizada.
+"""
+import unicodedata
+
+from django.db import connection
+from django.db.models import F, FloatField, Lookup, Value
+
+LARGO_MINIMO_TRIGRAMA = 3
+
+TABLA_FTS = 'core_nino_fts'
+
+SQL_FTS_SQLITE = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {TABLA_FTS} USING fts5(
+        nombre_busqueda, content='core_nino', content_rowid='id', tokenize='trigram'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS core_nino_fts_ai AFTER INSERT ON core_nino BEGIN
+        INSERT INTO {TABLA_FTS}(rowid, nombre_busqueda) VALUES (new.id, new.nombre_busqueda);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS core_nino_fts_ad AFTER DELETE ON core_nino BEGIN
+        INSERT INTO {TABLA_FTS}({TABLA_FTS}, rowid, nombre_busqueda) VALUES ('delete', old.id, old.nombre_busqueda);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS core_nino_fts_au AFTER UPDATE OF nombre_busqueda ON core_nino BEGIN
+        INSERT INTO {TABLA_FTS}({TABLA_FTS}, rowid, nombre_busqueda) VALUES ('delete', old.id, old.nombre_busqueda);
+        INSERT INTO {TABLA_FTS}(rowid, nombre_busqueda) VALUES (new.id, new.nombre_busqueda);
+    END""",
+]
+
+SQL_TRIGRAMA_POSTGRES = [
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    'CREATE INDEX IF NOT EXISTS nino_busqueda_trgm_idx ON core_nino USING gin (nombre_busqueda gin_trgm_ops)',
+]
+
+
+def normalizar(texto):
+    """'  José  PÉREZ ' -> 'jose perez' (sin acentos, minúsculas, espacios simples)"""
+    descompuesto = unicodedata.normalize('NFKD', texto or '')
+    sin_acentos = ''.join(c for c in descompuesto if not unicodedata.combining(c))
+    return ' '.join(sin_acentos.lower().split())
+
+
+def crear_indice_busqueda(conexion):
+    """
+    Crea el índice de búsqueda del motor de ``conexion`` si no existe. En SQLite
+    también reconstruye la tabla FTS cuando faltaban los triggers: las
+    migraciones que alteran ``core_nino`` recrean la tabla y los pierden, por
+    eso se llama también en cada ``post_migrate``. No hace nada si la base está
+    migrada a una versión sin ``nombre_busqueda``.
+    """
+    with conexion.cursor() as cursor:
+        if 'core_nino' not in conexion.introspection.table_names(cursor):
+            return
+        columnas = [c.name for c in conexion.introspection.get_table_description(cursor, 'core_nino')]
+    if 'nombre_busqueda' not in columnas:
+        return
+    if conexion.vendor == 'postgresql':
+        with conexion.cursor() as cursor:
+            for sql in SQL_TRIGRAMA_POSTGRES:
+                cursor.execute(sql)
+    elif conexion.vendor == 'sqlite':
+        with conexion.cursor() as cursor:
+            cursor.execute("SELECT count(*) FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'core_nino_fts_%'")
+            if cursor.fetchone()[0] == 3:
+                return
+            for sql in SQL_FTS_SQLITE:
+                cursor.execute(sql)
+            cursor.execute(f"INSERT INTO {TABLA_FTS}({TABLA_FTS}) VALUES ('rebuild')")
+
+
+def eliminar_indice_busqueda(conexion):
+    if conexion.vendor == 'postgresql':
+        with conexion.cursor() as cursor:
+            cursor.execute('DROP INDEX IF EXISTS nino_busqueda_trgm_idx')
+    elif conexion.vendor == 'sqlite':
+        with conexion.cursor() as cursor:
+            for sufijo in ('ai', 'ad', 'au'):
+                cursor.execute(f'DROP TRIGGER IF EXISTS core_nino_fts_{sufijo}')
+            cursor.execute(f'DROP TABLE IF EXISTS {TABLA_FTS}')
+
+
+class CoincidenciaFts(Lookup):
+    """
+    ``nombre_busqueda__fts=consulta``: MATCH de FTS5 sobre la columna de la
+    tabla virtual (registrado solo en NinoBusqueda.nombre_busqueda)
+    """
+
+    lookup_name = 'fts'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'{lhs} MATCH {rhs}', [*lhs_params, *rhs_params]
+
+
+def _frase_fts(palabra):
+    return '"' + palabra.replace('"', '""') + '"'
+
+
+def buscar_ninos(ninos, termino):
+    """
+    Filtra el queryset ``ninos`` por ``termino`` (cada palabra debe aparecer en
+    el nombre, en cualquier orden) y lo ordena del más al menos parecido; cada
+    niño trae la anotación ``relevancia``.
+    """
+    termino = normalizar(termino)
+    palabras = termino.split()
+    if not palabras:
+        return ninos.none()
+    largas = [p for p in palabras if len(p) >= LARGO_MINIMO_TRIGRAMA]
+    cortas = [p for p in palabras if len(p) < LARGO_MINIMO_TRIGRAMA]
+
+    for palabra in cortas:
+        ninos = ninos.filter(nombre_busqueda__contains=palabra)
+
+    if connection.vendor == 'postgresql':
+        from django.contrib.postgres.search import TrigramWordSimilarity
+
+        for palabra in largas:
+            ninos = ninos.filter(nombre_busqueda__contains=palabra)
+        relevancia = TrigramWordSimilarity(termino, 'nombre_busqueda')
+    elif connection.vendor == 'sqlite' and largas:
+        # Una sola pasada por FTS5: unir la tabla virtual (NinoBusqueda) en
+        # lugar de una subconsulta por fila
+        ninos = ninos.filter(busqueda_fts__nombre_busqueda__fts=' AND '.join(_frase_fts(p) for p in largas))
+        relevancia = -F('busqueda_fts__rank')
+    else:
+        for palabra in largas:
+            ninos = ninos.filter(nombre_busqueda__contains=palabra)
+        relevancia = Value(0.0, output_field=FloatField())
+
+    return ninos.annotate(relevancia=relevancia).order_by(F('relevancia').desc(), 'nombre_completo', 'pk')
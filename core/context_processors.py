@@ -0,0 +1,15 @@
+from .utils import obtener_rol, roles_de
+
+
+def roles(request):
+    """Rol del usuario para las plantillas (sin consultas: usa lo resuelto por RolesMiddleware)"""
+    user = getattr(request, 'user', None)
+    if user is None:
+        return {}
+    roles_usuario = roles_de(user)
+    return {
+        'rol': obtener_rol(user),
+        'es_admin': 'admin' in roles_usuario,
+        'es_maestro': 'maestro' in roles_usuario,
+        'es_padre': 'padre' in roles_usuario,
+    }
@@ -1,163 +1,181 @@
 # core/email.py
-import os
 import logging
-from sib_api_v3_sdk import ApiClient, Configuration, SendSmtpEmail, TransactionalEmailsApi
-from sib_api_v3_sdk.rest import ApiException  # ← Importa ApiException
+from functools import lru_cache, wraps
+from django.template import Context
+from django.template.loader import get_template
+from django.utils.safestring import mark_safe
+from .backends_correo import ErrorTransitorio, obtener_backend_correo
+from .metricas import ENVIO_SEGUNDOS, ENVIOS
 
 logger = logging.getLogger(__name__)
 
+REMITENTE = {"email": "ra16004@ues.edu.sv", "name": "Guardería Infantil"}
+
+# Marcador que Brevo reemplaza por el nombre de cada destinatario en los envíos por lote
+PARAMETRO_NOMBRE_NINO = mark_safe("{{ params.nombre_nino }}")
+
+
+@lru_cache(maxsize=None)
+def _plantilla(nombre):
+    """Plantilla compilada de templates/emails/ (se compila una vez por proceso)"""
+    return get_template(f"emails/{nombre}.html").template
+
+
+def renderizar_correo(nombre, contexto):
+    """Cuerpo HTML de un correo a partir de su plantilla"""
+    return renderizar_correos(nombre, [contexto])[0]
+
+
+def renderizar_correos(nombre, contextos):
+    """
+    Cuerpos HTML personalizados de muchos correos en una sola pasada: la
+    plantilla compilada y el contexto base se reutilizan para todos.
+    """
+    plantilla = _plantilla(nombre)
+    contexto = Context()
+    cuerpos = []
+    for datos in contextos:
+        with contexto.push(datos):
+            cuerpos.append(plantilla.render(contexto))
+    return cuerpos
+
+
+def enviar_correo(correo):
+    """
+    Entrega el correo al backend configurado en settings.CORREO_BACKEND.
+    Las fallas transitorias (ErrorTransitorio) se propagan para que el worker reintente.
+    """
+    return obtener_backend_correo().enviar(correo)
+
+
+def medir_envio(funcion):
+    """Registra la duración y el resultado de cada llamada en core.metricas"""
+    @wraps(funcion)
+    def envoltura(*args, **kwargs):
+        resultado = 'error'
+        try:
+            with ENVIO_SEGUNDOS.medir(funcion=funcion.__name__):
+                exito = funcion(*args, **kwargs)
+            resultado = 'enviado' if exito else 'rechazado'
+            return exito
+        except ErrorTransitorio:
+            resultado = 'transitorio'
+            raise
+        finally:
+            ENVIOS.incrementar(funcion=funcion.__name__, resultado=resultado)
+    return envoltura
+
+
+@medir_envio
 def enviar_notificacion_inasistencia(email_destino, nombre_nino):
-    api_key = os.getenv("BREVO_API_KEY")
-    print(f"🔑 BREVO_API_KEY cargada: {'Sí' if api_key else 'No'}")
-    if not api_key:
-        print("❌ ERROR: BREVO_API_KEY no configurada")
-        return False
-
-    from sib_api_v3_sdk.rest import ApiException  # ← Importa ApiException
-
-    configuration = Configuration()
-    configuration.api_key['api-key'] = api_key
-    api_instance = TransactionalEmailsApi(ApiClient(configuration))
-    send_smtp_email = SendSmtpEmail(
+    correo = dict(
         to=[{"email": email_destino}],
-        sender={"email": "ra16004@ues.edu.sv", "name": "Guardería Infantil"},
+        sender=REMITENTE,
         subject=f"Inasistencia no justificada de: {nombre_nino}",
-        html_content=f"""
-        <h3>Guardería Infantil</h3>
-        <p>Estimado(a) responsable,</p>
-        <p>Se ha registrado la <strong>inasistencia</strong> de <strong>{nombre_nino}</strong> hoy, 
-        <strong>sin justificación</strong>.</p>
-        <p>Por favor, comuníquese con nosotros si esto fue un error.</p>
-        <hr>
-        <small>Este es un mensaje automático.</small>
-        """
+        html_content=renderizar_correo('inasistencia', {'nombre_nino': nombre_nino})
+    )
+    exito = enviar_correo(correo)
+    if exito:
+        logger.info(f"✅ Aviso de inasistencia enviado a {email_destino}")
+    return exito
+
+
+# Máximo de versiones de mensaje (destinatarios personalizados) por llamada a Brevo
+MAX_VERSIONES_POR_ENVIO = 1000
+
+
+@medir_envio
+def enviar_notificaciones_inasistencia(destinos):
+    """
+    Envía el aviso de inasistencia a varios responsables en UNA llamada a la
+    API usando las versiones de mensaje de Brevo. ``destinos`` es una lista de
+    (email_destino, nombre_nino) de hasta MAX_VERSIONES_POR_ENVIO elementos.
+    """
+    if len(destinos) > MAX_VERSIONES_POR_ENVIO:
+        raise ValueError(f"Máximo {MAX_VERSIONES_POR_ENVIO} destinatarios por envío")
+
+    # Un solo cuerpo para todo el lote: Brevo reemplaza {{ params.nombre_nino }} en cada versión
+    correo = dict(
+        sender=REMITENTE,
+        subject="Inasistencia no justificada",
+        html_content=renderizar_correo('inasistencia', {'nombre_nino': PARAMETRO_NOMBRE_NINO}),
+        message_versions=[
+            {
+                "to": [{"email": email_destino}],
+                "params": {"nombre_nino": nombre_nino},
+                "subject": f"Inasistencia no justificada de: {nombre_nino}",
+            }
+            for email_destino, nombre_nino in destinos
+        ]
     )
-    try:
-        response = api_instance.send_transac_email(send_smtp_email)
-        print("✅ Correo enviado exitosamente. Response:", response)
-        return True
-    except ApiException as e:
-        print("❌ ApiException de Brevo:")
-        print("   Código:", e.status)
-        print("   Cuerpo:", e.body)
-        return False
-    except Exception as e:
-        print("❌ Error inesperado:", str(e))
-        return False
+
+    exito = enviar_correo(correo)
+    if exito:
+        logger.info(f"✅ {len(destinos)} avisos de inasistencia enviados en un solo envío")
+    return exito
 
 
 # ---- PBI 05: FUNCIONES DE EMAIL PARA PERMISOS DE AUSENCIA ----
 
+@medir_envio
 def enviar_confirmacion_solicitud_permiso(email_destino, nombre_nino, fecha_inicio, tipo_permiso):
     """Envía confirmación al responsable cuando solicita un permiso de ausencia"""
-    api_key = os.getenv("BREVO_API_KEY")
-    
-    if not api_key:
-        logger.error("BREVO_API_KEY no configurada")
-        return False
-    
-    configuration = Configuration()
-    configuration.api_key['api-key'] = api_key
-    api_instance = TransactionalEmailsApi(ApiClient(configuration))
-    
-    send_smtp_email = SendSmtpEmail(
+    correo = dict(
         to=[{"email": email_destino}],
-        sender={"email": "ra16004@ues.edu.sv", "name": "Guardería Infantil"},
+        sender=REMITENTE,
         subject=f"Solicitud de Permiso Recibida - {nombre_nino}",
-        html_content=f"""
-        <div style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto;">
-            <h2 style="color: #0d6efd;">Guardería Infantil</h2>
-            <h3>Solicitud de Permiso Recibida</h3>
-            
-            <p>Estimado(a) responsable,</p>
-            
-            <p>Hemos recibido su solicitud de permiso de ausencia para:</p>
-            
-            <div style="background-color: #f8f9fa; padding: 15px; border-radius: 5px; margin: 20px 0;">
-                <p style="margin: 5px 0;"><strong>Niño/a:</strong> {nombre_nino}</p>
-                <p style="margin: 5px 0;"><strong>Tipo:</strong> {tipo_permiso}</p>
-                <p style="margin: 5px 0;"><strong>Fecha:</strong> {fecha_inicio}</p>
-            </div>
-            
-            <p>Su solicitud está siendo revisada por nuestro personal. Recibirá una notificación cuando sea procesada.</p>
-            
-            <hr style="margin: 20px 0;">
-            <small style="color: #6c757d;">Este es un mensaje automático. Por favor no responda a este correo.</small>
-        </div>
-        """
+        html_content=renderizar_correo('solicitud_permiso', {
+            'nombre_nino': nombre_nino,
+            'fecha_inicio': fecha_inicio,
+            'tipo_permiso': tipo_permiso,
+        })
     )
     
-    try:
-        response = api_instance.send_transac_email(send_smtp_email)
+    exito = enviar_correo(correo)
+    if exito:
         logger.info(f"✅ Confirmación enviada a {email_destino}")
-        return True
-    except ApiException as e:
-        logger.error(f"❌ Error Brevo API: {e.status} - {e.body}")
-        return False
-    except Exception as e:
-        logger.error(f"❌ Error inesperado: {str(e)}")
-        return False
+    return exito
 
 
+@medir_envio
 def enviar_notificacion_permiso_aprobado(email_maestro, nombre_nino, fecha_inicio, fecha_fin, tipo_permiso, motivo, horario=None):
     """Envía notificación al maestro cuando se aprueba un permiso de ausencia"""
-    api_key = os.getenv("BREVO_API_KEY")
-    
-    if not api_key:
-        logger.error("BREVO_API_KEY no configurada")
-        return False
-    
-    configuration = Configuration()
-    configuration.api_key['api-key'] = api_key
-    api_instance = TransactionalEmailsApi(ApiClient(configuration))
-    
     # Formatear período de ausencia
     if fecha_fin and fecha_fin != fecha_inicio:
         periodo = f"{fecha_inicio} al {fecha_fin}"
     else:
         periodo = fecha_inicio
     
-    # Formatear horario si existe
-    horario_html = ""
-    if horario:
-        horario_html = f"<p style='margin: 5px 0;'><strong>Horario:</strong> {horario}</p>"
-    
-    send_smtp_email = SendSmtpEmail(
+    correo = dict(
         to=[{"email": email_maestro}],
-        sender={"email": "ra16004@ues.edu.sv", "name": "Guardería Infantil"},
+        sender=REMITENTE,
         subject=f"Permiso de Ausencia Aprobado - {nombre_nino}",
-        html_content=f"""
-        <div style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto;">
-            <h2 style="color: #198754;">Guardería Infantil</h2>
-            <h3>Permiso de Ausencia Aprobado</h3>
-            
-            <p>Estimado(a) maestro(a),</p>
-            
-            <p>Se ha aprobado el siguiente permiso de ausencia:</p>
-            
-            <div style="background-color: #d1e7dd; padding: 15px; border-left: 4px solid #198754; border-radius: 5px; margin: 20px 0;">
-                <p style="margin: 5px 0;"><strong>Niño/a:</strong> {nombre_nino}</p>
-                <p style="margin: 5px 0;"><strong>Tipo de Permiso:</strong> {tipo_permiso}</p>
-                <p style="margin: 5px 0;"><strong>Período:</strong> {periodo}</p>
-                {horario_html}
-                <p style="margin: 5px 0;"><strong>Motivo:</strong> {motivo}</p>
-            </div>
-            
-            <p>Por favor, tome nota de esta ausencia autorizada para su registro de asistencia.</p>
-            
-            <hr style="margin: 20px 0;">
-            <small style="color: #6c757d;">Este es un mensaje automático. Por favor no responda a este correo.</small>
-        </div>
-        """
+        html_content=renderizar_correo('permiso_aprobado', {
+            'nombre_nino': nombre_nino,
+            'tipo_permiso': tipo_permiso,
+            'periodo': periodo,
+            'horario': horario,
+            'motivo': motivo,
+        })
     )
     
-    try:
-        response = api_instance.send_transac_email(send_smtp_email)
+    exito = enviar_correo(correo)
+    if exito:
         logger.info(f"✅ Notificación de aprobación enviada a {email_maestro}")
-        return True
-    except ApiException as e:
-        logger.error(f"❌ Error Brevo API: {e.status} - {e.body}")
-        return False
-    except Exception as e:
-        logger.error(f"❌ Error inesperado: {str(e)}")
-        return False
\ No newline at end of file
+    return exito
+
+
+@medir_envio
+def enviar_resumen_notificaciones(email_destino, frecuencia, eventos):
+    """Envía en un solo correo los avisos acumulados de un destinatario que prefiere resúmenes"""
+    correo = dict(
+        to=[{"email": email_destino}],
+        sender=REMITENTE,
+        subject=f"Resumen {'diario' if frecuencia == 'diaria' else 'de la última hora'}: {len(eventos)} avisos",
+        html_content=renderizar_correo('resumen', {'frecuencia': frecuencia, 'eventos': eventos})
+    )
+
+    exito = enviar_correo(correo)
+    if exito:
+        logger.info(f"✅ Resumen de {len(eventos)} avisos enviado a {email_destino}")
+    return exito
@@ -0,0 +1,89 @@
+"""
+Publicación/suscripción de eventos de asistencia para el tablero en vivo.
+
+El backend se elige con ``settings.EVENTOS_BACKEND``. Cualquier clase con
+``publicar(canal, mensaje)`` (llamable desde código síncrono) y
+``suscribir(canal)`` (context manager asíncrono que entrega un objeto con
+``await get()`` para recibir el siguiente mensaje) sirve; ``BackendMemoria``
+reparte dentro del mismo proceso y reemplaza a un broker externo cuando hay
+un solo worker.
+"""
+import asyncio
+import logging
+import threading
+from contextlib import asynccontextmanager
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+CANAL_ASISTENCIA = 'asistencia'
+
+
+class BackendMemoria:
+    """Pub/sub en memoria: una cola asyncio por conexión suscrita"""
+
+    def __init__(self, max_pendientes=100):
+        self.max_pendientes = max_pendientes
+        self._suscriptores = {}
+        self._lock = threading.Lock()
+
+    def publicar(self, canal, mensaje):
+        with self._lock:
+            suscriptores = list(self._suscriptores.get(canal, ()))
+        for loop, cola in suscriptores:
+            try:
+                loop.call_soon_threadsafe(self._entregar, cola, mensaje)
+            except RuntimeError:
+                # El loop del suscriptor ya se cerró
+                pass
+
+    @staticmethod
+    def _entregar(cola, mensaje):
+        try:
+            cola.put_nowait(mensaje)
+        except asyncio.QueueFull:
+            logger.warning("Suscriptor lento: se descarta un evento de asistencia")
+
+    def total_suscriptores(self, canal):
+        with self._lock:
+            return len(self._suscriptores.get(canal, ()))
+
+    @asynccontextmanager
+    async def suscribir(self, canal):
+        entrada = (asyncio.get_running_loop(), asyncio.Queue(self.max_pendientes))
+        with self._lock:
+            self._suscriptores.setdefault(canal, set()).add(entrada)
+        try:
+            yield entrada[1]
+        finally:
+            with self._lock:
+                self._suscriptores.get(canal, set()).discard(entrada)
+
+
+@lru_cache(maxsize=None)
+def obtener_backend():
+    return import_string(settings.EVENTOS_BACKEND)()
+
+
+def publicar_asistencias(asistencias):
+    """Publica los cambios de asistencia cuando la transacción se confirma"""
+    mensajes = [
+        [a.nino_id, a.fecha.isoformat(), a.presente, a.motivo_inasistencia or '']
+        for a in asistencias
+    ]
+    if not mensajes:
+        return
+
+    def enviar():
+        try:
+            backend = obtener_backend()
+            for mensaje in mensajes:
+                backend.publicar(CANAL_ASISTENCIA, mensaje)
+        except Exception:
+            logger.exception("No se pudieron publicar los eventos de asistencia")
+
+    transaction.on_commit(enviar)
@@ -0,0 +1,187 @@
+from django.db import connections, router, transaction
+
+from .models import Asistencia, HistorialAsistenciaMensual
+
+
+def bit_dia(fecha):
+    """Bit que representa el día de ``fecha`` dentro de la máscara de su mes"""
+    return 1 << (fecha.day - 1)
+
+
+def _aplicar_registro(historial, fecha, presente, motivo):
+    bit = bit_dia(fecha)
+    historial.registrados |= bit
+    if presente:
+        historial.presentes |= bit
+    else:
+        historial.presentes &= ~bit
+    if not presente and motivo:
+        historial.justificados |= bit
+    else:
+        historial.justificados &= ~bit
+
+
+def _quitar_registro(historial, fecha):
+    mascara = ~bit_dia(fecha)
+    historial.registrados &= mascara
+    historial.presentes &= mascara
+    historial.justificados &= mascara
+
+
+def _guardar_historiales(historiales):
+    connection = connections[router.db_for_write(HistorialAsistenciaMensual)]
+    if connection.features.supports_update_conflicts_with_target:
+        HistorialAsistenciaMensual.objects.bulk_create(
+            historiales,
+            update_conflicts=True,
+            unique_fields=['nino', 'anio', 'mes'],
+            update_fields=['registrados', 'presentes', 'justificados']
+        )
+        return
+    for historial in historiales:
+        HistorialAsistenciaMensual.objects.update_or_create(
+            nino_id=historial.nino_id,
+            anio=historial.anio,
+            mes=historial.mes,
+            defaults={
+                'registrados': historial.registrados,
+                'presentes': historial.presentes,
+                'justificados': historial.justificados,
+            }
+        )
+
+
+def actualizar_historial_mensual(nino_ids, fechas):
+    """
+    Aplica sobre las máscaras mensuales el estado actual de las asistencias
+    (nino, fecha) indicadas. Solo lee los registros tocados, no el mes completo.
+    """
+    if not nino_ids or not fechas:
+        return
+
+    registros = {
+        (nino_id, fecha): (presente, motivo)
+        for nino_id, fecha, presente, motivo in Asistencia.objects.filter(
+            nino_id__in=nino_ids, fecha__in=fechas
+        ).values_list('nino_id', 'fecha', 'presente', 'motivo_inasistencia')
+    }
+    meses = {(fecha.year, fecha.month) for fecha in fechas}
+
+    with transaction.atomic():
+        existentes = {
+            (h.nino_id, h.anio, h.mes): h
+            for h in HistorialAsistenciaMensual.objects.select_for_update().filter(
+                nino_id__in=nino_ids,
+                anio__in={anio for anio, _ in meses},
+                mes__in={mes for _, mes in meses}
+            )
+        }
+
+        modificados = {}
+        for nino_id in nino_ids:
+            for fecha in fechas:
+                clave = (nino_id, fecha.year, fecha.month)
+                historial = existentes.get(clave)
+                registro = registros.get((nino_id, fecha))
+                if registro is None and historial is None:
+                    continue
+                if historial is None:
+                    historial = HistorialAsistenciaMensual(
+                        nino_id=nino_id, anio=fecha.year, mes=fecha.month
+                    )
+                    existentes[clave] = historial
+                if registro is None:
+                    _quitar_registro(historial, fecha)
+                else:
+                    _aplicar_registro(historial, fecha, *registro)
+                modificados[clave] = historial
+
+        _guardar_historiales(list(modificados.values()))
+
+
+def reconstruir_historial_mensual(tamano_lote=1000):
+    """Borra y recalcula todas las máscaras mensuales; retorna cuántas se crearon"""
+    historiales = {}
+    asistencias = Asistencia.objects.order_by().values_list(
+        'nino_id', 'fecha', 'presente', 'motivo_inasistencia'
+    )
+    for nino_id, fecha, presente, motivo in asistencias.iterator(chunk_size=5000):
+        clave = (nino_id, fecha.year, fecha.month)
+        historial = historiales.get(clave)
+        if historial is None:
+            historial = historiales[clave] = HistorialAsistenciaMensual(
+                nino_id=nino_id, anio=fecha.year, mes=fecha.month
+            )
+        _aplicar_registro(historial, fecha, presente, motivo)
+
+    with transaction.atomic():
+        HistorialAsistenciaMensual.objects.all().delete()
+        HistorialAsistenciaMensual.objects.bulk_create(historiales.values(), batch_size=tamano_lote)
+    return len(historiales)
+
+
+def _racha_mas_larga(bits):
+    """Cantidad máxima de unos consecutivos en un entero"""
+    racha = 0
+    while bits:
+        bits &= bits >> 1
+        racha += 1
+    return racha
+
+
+def _compactar(mascara, registrados):
+    """Deja solo los bits de días lectivos, uno tras otro (sin huecos de fines de semana)"""
+    compacta = 0
+    posicion = 0
+    while registrados:
+        bit = registrados & -registrados
+        if mascara & bit:
+            compacta |= 1 << posicion
+        posicion += 1
+        registrados ^= bit
+    return compacta, posicion
+
+
+def resumen_periodo(historiales):
+    """
+    Combina varios meses (en cualquier orden) en un resumen del período:
+    días lectivos, presentes, ausencias justificadas/injustificadas, tasa y
+    la racha más larga de asistencia contando solo días lectivos.
+    """
+    historiales = sorted(historiales, key=lambda h: (h.anio, h.mes))
+    lectivos = presentes = justificados = 0
+    secuencia = 0
+    largo = 0
+    for historial in historiales:
+        lectivos += historial.dias_lectivos()
+        presentes += historial.dias_presente()
+        justificados += (historial.justificados & historial.registrados).bit_count()
+        compacta, dias = _compactar(historial.presentes, historial.registrados)
+        secuencia |= compacta << largo
+        largo += dias
+
+    return {
+        'dias_lectivos': lectivos,
+        'dias_presente': presentes,
+        'ausencias_justificadas': justificados,
+        'ausencias_injustificadas': lectivos - presentes - justificados,
+        'tasa_asistencia': round(presentes * 100 / lectivos, 1) if lectivos else None,
+        'racha_mas_larga': _racha_mas_larga(secuencia),
+    }
+
+
+def historial_anual(nino, anio):
+    """Resumen de asistencia de un niño en un año (una sola consulta)"""
+    return resumen_periodo(nino.historial_mensual.filter(anio=anio))
+
+
+def resumenes_anuales(anio, nino_ids=None):
+    """Resumen anual de varios niños a la vez: {nino_id: resumen}"""
+    historiales = HistorialAsistenciaMensual.objects.filter(anio=anio)
+    if nino_ids is not None:
+        historiales = historiales.filter(nino_id__in=nino_ids)
+
+    por_nino = {}
+    for historial in historiales:
+        por_nino.setdefault(historial.nino_id, []).append(historial)
+    return {nino_id: resumen_periodo(meses) for nino_id, meses in por_nino.items()}
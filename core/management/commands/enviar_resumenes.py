@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from core.notificaciones import armar_resumenes
+
+
+class Command(BaseCommand):
+    help = (
+        'Arma un correo de resumen por destinatario con los avisos diferidos de quienes '
+        'prefieren resúmenes (PreferenciaNotificacion). Programar con cron: --frecuencia '
+        'horaria cada hora y --frecuencia diaria una vez al día; el worker procesar_notificaciones '
+        'los envía.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--frecuencia',
+            choices=['horaria', 'diaria'],
+            required=True,
+            help='Ventana de resumen a cerrar'
+        )
+
+    def handle(self, *args, **options):
+        resumenes = armar_resumenes(options['frecuencia'])
+        eventos = sum(len(r.datos['eventos']) for r in resumenes)
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ {len(resumenes)} resúmenes ({options["frecuencia"]}) encolados con {eventos} avisos'
+        ))
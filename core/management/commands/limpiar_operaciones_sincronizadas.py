@@ -0,0 +1,22 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.sincronizacion import limpiar_operaciones
+
+
+class Command(BaseCommand):
+    help = 'Borra las claves de idempotencia de sincronización más antiguas que el TTL configurado'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dias',
+            type=int,
+            default=settings.SINCRONIZACION_TTL_DIAS,
+            help=f'Antigüedad máxima en días (por defecto SINCRONIZACION_TTL_DIAS={settings.SINCRONIZACION_TTL_DIAS})'
+        )
+
+    def handle(self, *args, **options):
+        borradas = limpiar_operaciones(options['dias'])
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ {borradas} operaciones sincronizadas con más de {options["dias"]} días eliminadas'
+        ))
@@ -0,0 +1,90 @@
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Módulos pesados que solo deben cargarse en el primer envío de correo
+# (core.backends_correo los importa de forma diferida)
+MODULOS_DIFERIDOS = ['sib_api_v3_sdk', 'urllib3']
+
+
+def medir_importaciones():
+    """
+    Ejecuta ``python -X importtime manage.py check`` y retorna
+    {modulo: microsegundos acumulados} y el total de los módulos de primer nivel.
+    """
+    proceso = subprocess.run(
+        [sys.executable, '-X', 'importtime', str(settings.BASE_DIR / 'manage.py'), 'check'],
+        capture_output=True,
+        text=True,
+        env=os.environ.copy()
+    )
+    if proceso.returncode != 0:
+        raise CommandError(f'manage.py check falló:\n{proceso.stderr[-2000:]}')
+
+    modulos, total = {}, 0
+    for linea in proceso.stderr.splitlines():
+        if not linea.startswith('import time:'):
+            continue
+        partes = linea[len('import time:'):].split('|')
+        if len(partes) != 3 or not partes[0].strip().isdigit():
+            continue  # encabezado
+        acumulado, nombre = int(partes[1]), partes[2]
+        modulos[nombre.strip()] = acumulado
+        # Sumar solo los de primer nivel (sin sangría) para no contar dos veces
+        if not nombre[1:].startswith(' '):
+            total += acumulado
+    return modulos, total
+
+
+class Command(BaseCommand):
+    help = (
+        'Mide el tiempo de importación al arrancar (python -X importtime manage.py check) y falla '
+        'si supera ARRANQUE_MAX_IMPORT_MS o si se cargan al inicio módulos que deben ser diferidos '
+        '(SDK de Brevo). Se ejecuta en build.sh para detectar regresiones del arranque en frío.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--max-ms',
+            type=float,
+            default=settings.ARRANQUE_MAX_IMPORT_MS,
+            help=f'Tiempo máximo de importación en ms (por defecto ARRANQUE_MAX_IMPORT_MS={settings.ARRANQUE_MAX_IMPORT_MS})'
+        )
+        parser.add_argument(
+            '--repeticiones',
+            type=int,
+            default=3,
+            help='Mediciones a realizar; se toma la menor para descartar ruido (por defecto 3)'
+        )
+        parser.add_argument(
+            '--top',
+            type=int,
+            default=10,
+            help='Cantidad de módulos más lentos a mostrar (por defecto 10)'
+        )
+
+    def handle(self, *args, **options):
+        if options['repeticiones'] < 1:
+            raise CommandError('--repeticiones debe ser mayor que 0')
+
+        mediciones = [medir_importaciones() for _ in range(options['repeticiones'])]
+        modulos, total = min(mediciones, key=lambda medicion: medicion[1])
+        total_ms = total / 1000
+
+        self.stdout.write(f'Importación al arrancar: {total_ms:.0f} ms (límite {options["max_ms"]:.0f} ms)')
+        for nombre, acumulado in sorted(modulos.items(), key=lambda item: -item[1])[:options['top']]:
+            self.stdout.write(f'  {acumulado / 1000:8.1f} ms  {nombre}')
+
+        errores = []
+        cargados = [m for m in MODULOS_DIFERIDOS if m in modulos]
+        if cargados:
+            errores.append(f'se importan al arrancar: {", ".join(cargados)} (deben cargarse en el primer envío)')
+        if total_ms > options['max_ms']:
+            errores.append(f'la importación tarda {total_ms:.0f} ms, más que el límite de {options["max_ms"]:.0f} ms')
+        if errores:
+            raise CommandError('Regresión en el arranque: ' + '; '.join(errores))
+
+        self.stdout.write(self.style.SUCCESS('✓ Tiempo de arranque dentro del límite'))
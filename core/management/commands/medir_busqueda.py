@@ -0,0 +1,114 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_databases, teardown_databases
+
+from core.busqueda import buscar_ninos, normalizar
+from core.models import Nino
+
+NOMBRES = [
+    'José', 'María', 'Ángel', 'Sofía', 'Andrés', 'Lucía', 'Nicolás', 'Valentina', 'Martín', 'Camila',
+    'Sebastián', 'Isabel', 'Tomás', 'Inés', 'Matías', 'Renata', 'Joaquín', 'Paula', 'Raúl', 'Begoña',
+]
+APELLIDOS = [
+    'Pérez', 'González', 'Muñoz', 'Rodríguez', 'Hernández', 'Quiñones', 'Peña', 'Ortúzar', 'López',
+    'Martínez', 'Sánchez', 'Gómez', 'Díaz', 'Fernández', 'Ramírez', 'Núñez', 'Ibáñez', 'Vásquez',
+    'Castaño', 'Jiménez',
+]
+
+TERMINOS = ['Jose', 'quinones', 'Gonzalez Munoz', 'ortuzar 99', 'Peña']
+
+
+def nombre_sembrado(indice, azar):
+    return f'{azar.choice(NOMBRES)} {azar.choice(APELLIDOS)} {azar.choice(APELLIDOS)} {indice}'
+
+
+class Command(BaseCommand):
+    help = (
+        'Siembra N niños con nombres acentuados en una base de datos temporal (como la de las '
+        'pruebas, nunca en la configurada) y compara la búsqueda anterior '
+        '(nombre_completo__icontains) con buscar_ninos (nombre normalizado por trigramas).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--ninos',
+            type=int,
+            default=10000,
+            help='Niños a sembrar (por defecto 10000; el commit original midió 10000 y 100000)'
+        )
+        parser.add_argument(
+            '--repeticiones',
+            type=int,
+            default=20,
+            help='Veces que se ejecuta cada consulta (por defecto 20)'
+        )
+        parser.add_argument(
+            '--termino',
+            action='append',
+            help='Término a buscar (se puede repetir; por defecto los del benchmark original)'
+        )
+        parser.add_argument('--semilla', type=int, default=25, help='Semilla de los nombres (por defecto 25)')
+
+    def handle(self, *args, **options):
+        if options['ninos'] < 0 or options['repeticiones'] < 1:
+            raise CommandError('--ninos no puede ser negativo y --repeticiones debe ser mayor que 0')
+
+        # Base temporal creada y migrada como en una corrida de pruebas; se destruye al terminar
+        configuracion = setup_databases(verbosity=0, interactive=False, aliases={'default'}, serialized_aliases=set())
+        try:
+            inicio = time.perf_counter()
+            self._sembrar(options['ninos'], random.Random(options['semilla']))
+            self.stdout.write(
+                f'{options["ninos"]} niños sembrados en {time.perf_counter() - inicio:.1f} s '
+                f'(base temporal {connection.settings_dict["NAME"]}, motor {connection.vendor})'
+            )
+            self._medir(options['termino'] or TERMINOS, options['repeticiones'])
+        finally:
+            teardown_databases(configuracion, verbosity=0)
+        self.stdout.write(self.style.SUCCESS('✓ Medición terminada'))
+
+    def _sembrar(self, cantidad, azar):
+        lote = []
+        for indice in range(cantidad):
+            nombre = nombre_sembrado(indice, azar)
+            # bulk_create no llama a save(): nombre_busqueda se calcula aquí
+            lote.append(Nino(
+                nombre_completo=nombre,
+                nombre_busqueda=normalizar(nombre),
+                edad=azar.randint(1, 6),
+                nombre_responsable='Responsable',
+                telefono_responsable='70000000',
+                parentesco='Madre',
+            ))
+            if len(lote) == 2000:
+                Nino.objects.bulk_create(lote)
+                lote = []
+        Nino.objects.bulk_create(lote)
+
+    def _tiempo_ms(self, consulta, repeticiones):
+        tiempos = []
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            filas = list(consulta())
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+        return statistics.mean(tiempos), len(filas)
+
+    def _medir(self, terminos, repeticiones):
+        # Mismo queryset y tope que lista_ninos (50 resultados + 1 para saber si hay más)
+        ninos = Nino.objects.filter(activo=True)
+        self.stdout.write(f'Media de {repeticiones} ejecuciones, primeras 51 filas:')
+        for termino in terminos:
+            antes, filas_antes = self._tiempo_ms(
+                lambda: ninos.filter(nombre_completo__icontains=termino).order_by('-fecha_registro')[:51],
+                repeticiones
+            )
+            despues, filas_despues = self._tiempo_ms(lambda: buscar_ninos(ninos, termino)[:51], repeticiones)
+            coincidencias = buscar_ninos(ninos, termino).count()
+            self.stdout.write(
+                f'  {termino!r:18} antes {antes:7.1f} ms ({filas_antes} filas)   '
+                f'después {despues:7.1f} ms ({filas_despues} filas de {coincidencias})'
+            )
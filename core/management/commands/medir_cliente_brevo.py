@@ -0,0 +1,112 @@
+import ssl
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.backends_correo import obtener_api_brevo
+from core.brevo_falso import ServidorBrevoFalso
+
+API_KEY = 'medicion'
+
+
+class _ServidorContado(ServidorBrevoFalso):
+    """Brevo falso que además cuenta las conexiones TCP aceptadas"""
+
+    conexiones = 0
+
+    def process_request(self, request, client_address):
+        with self._lock:
+            self.conexiones += 1
+        super().process_request(request, client_address)
+
+
+def _correo(indice):
+    return dict(
+        to=[{'email': f'responsable{indice}@example.com'}],
+        sender={'email': 'guarderia@example.com', 'name': 'Guardería Infantil'},
+        subject='Medición de cliente',
+        html_content='<p>Medición</p>'
+    )
+
+
+def _cliente_nuevo(url, verificar_ssl):
+    """Como antes de reutilizar el cliente: Configuration, ApiClient y pool nuevos por correo"""
+    from sib_api_v3_sdk import ApiClient, Configuration, TransactionalEmailsApi
+
+    configuration = Configuration()
+    configuration.api_key['api-key'] = API_KEY
+    configuration.host = url
+    configuration.verify_ssl = verificar_ssl
+    return TransactionalEmailsApi(ApiClient(configuration))
+
+
+class Command(BaseCommand):
+    help = (
+        'Compara, contra el servidor Brevo falso, crear un cliente de Brevo por correo con el cliente '
+        'compartido del proceso (obtener_api_brevo, conexiones keep-alive). Con --certificado y '
+        '--clave el servidor falso usa HTTPS, para incluir el costo del handshake TLS.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--envios', type=int, default=200, help='Correos por variante (por defecto 200)')
+        parser.add_argument(
+            '--latencia-ms',
+            type=float,
+            default=0,
+            help='Latencia del servidor falso por respuesta (por defecto 0)'
+        )
+        parser.add_argument('--certificado', help='Certificado PEM para servir HTTPS')
+        parser.add_argument('--clave', help='Clave privada PEM del certificado')
+
+    def handle(self, *args, **options):
+        if options['envios'] < 1:
+            raise CommandError('--envios debe ser mayor que 0')
+        if bool(options['certificado']) != bool(options['clave']):
+            raise CommandError('--certificado y --clave van juntos')
+        from sib_api_v3_sdk import SendSmtpEmail
+
+        servidor = _ServidorContado('127.0.0.1', 0, options['latencia_ms'])
+        url = servidor.url
+        tls = bool(options['certificado'])
+        if tls:
+            contexto = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+            contexto.load_cert_chain(options['certificado'], options['clave'])
+            servidor.socket = contexto.wrap_socket(servidor.socket, server_side=True)
+            url = url.replace('http://', 'https://')
+        servidor.iniciar_en_hilo()
+
+        compartido = obtener_api_brevo(API_KEY, url)
+        if tls:
+            import urllib3
+
+            # Certificado local autofirmado: sin verificación (aún no se abrió ninguna conexión)
+            compartido.api_client.rest_client.pool_manager.connection_pool_kw['cert_reqs'] = ssl.CERT_NONE
+            urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+        variantes = [
+            ('cliente por correo', lambda: _cliente_nuevo(url, not tls)),
+            ('cliente compartido', lambda: compartido),
+        ]
+        self.stdout.write(
+            f'{options["envios"]} correos por variante contra {url} '
+            f'(latencia {options["latencia_ms"]:g} ms)'
+        )
+        try:
+            for nombre, obtener in variantes:
+                conexiones_antes = servidor.conexiones
+                tiempos = []
+                for indice in range(options['envios']):
+                    inicio = time.perf_counter()
+                    obtener().send_transac_email(SendSmtpEmail(**_correo(indice)))
+                    tiempos.append((time.perf_counter() - inicio) * 1000)
+                total = sum(tiempos)
+                self.stdout.write(
+                    f'  {nombre:20} {total / len(tiempos):6.2f} ms/correo '
+                    f'(p50 {statistics.median(tiempos):.2f} ms, máx {max(tiempos):.2f} ms), '
+                    f'{servidor.conexiones - conexiones_antes} conexiones TCP'
+                )
+        finally:
+            servidor.shutdown()
+            servidor.server_close()
+        self.stdout.write(self.style.SUCCESS('✓ Medición terminada'))
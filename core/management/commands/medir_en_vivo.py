@@ -0,0 +1,190 @@
+import asyncio
+import statistics
+import time
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY, get_user_model
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+
+from core.eventos import CANAL_ASISTENCIA, obtener_backend
+
+
+def memoria_residente_kb():
+    """Memoria residente (VmRSS) del proceso en KB; None fuera de Linux"""
+    try:
+        with open('/proc/self/status') as status:
+            for linea in status:
+                if linea.startswith('VmRSS:'):
+                    return int(linea.split()[1])
+    except OSError:
+        return None
+
+
+class ConexionEnVivo:
+    """Una conexión SSE inactiva contra la aplicación ASGI, sin red de por medio"""
+
+    def __init__(self, aplicacion, scope):
+        self.aplicacion = aplicacion
+        self.scope = scope
+        self.entrada = asyncio.Queue()
+        self.abierta = asyncio.Event()
+        self.estado = None
+        self.recibido_en = None
+        self.tarea = None
+
+    async def _recibir(self):
+        return await self.entrada.get()
+
+    async def _enviar(self, mensaje):
+        if mensaje['type'] == 'http.response.start':
+            self.estado = mensaje['status']
+            if self.estado != 200:
+                self.abierta.set()
+        elif mensaje['type'] == 'http.response.body':
+            cuerpo = mensaje.get('body', b'')
+            if cuerpo.startswith(b'retry:'):
+                self.abierta.set()
+            elif cuerpo.startswith(b'data:') and self.recibido_en is None:
+                self.recibido_en = time.perf_counter()
+
+    def abrir(self):
+        self.entrada.put_nowait({'type': 'http.request', 'body': b'', 'more_body': False})
+        self.tarea = asyncio.create_task(self.aplicacion(self.scope, self._recibir, self._enviar))
+
+    def cerrar(self):
+        self.entrada.put_nowait({'type': 'http.disconnect'})
+
+
+def _percentil(valores, p):
+    valores = sorted(valores)
+    return valores[min(len(valores) - 1, int(len(valores) * p / 100))]
+
+
+class Command(BaseCommand):
+    help = (
+        'Prueba de carga del tablero en vivo: abre N conexiones SSE inactivas contra la aplicación '
+        'ASGI (en el mismo proceso, sin servidor) y mide la memoria por conexión y la latencia de '
+        'entrega de un evento de asistencia a todas ellas.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--conexiones',
+            type=int,
+            default=500,
+            help='Conexiones SSE a abrir (por defecto 500)'
+        )
+        parser.add_argument(
+            '--eventos',
+            type=int,
+            default=5,
+            help='Eventos a publicar para medir la latencia de entrega (por defecto 5)'
+        )
+        parser.add_argument(
+            '--usuario',
+            help='Usuario administrador con el que se conectan (por defecto el primer superusuario)'
+        )
+
+    def _sesion(self, usuario):
+        sesion = SessionStore()
+        sesion[SESSION_KEY] = str(usuario.pk)
+        sesion[BACKEND_SESSION_KEY] = 'django.contrib.auth.backends.ModelBackend'
+        sesion[HASH_SESSION_KEY] = usuario.get_session_auth_hash()
+        sesion.create()
+        return sesion
+
+    def handle(self, *args, **options):
+        if options['conexiones'] < 1 or options['eventos'] < 1:
+            raise CommandError('--conexiones y --eventos deben ser mayores que 0')
+
+        User = get_user_model()
+        if options['usuario']:
+            usuario = User.objects.filter(username=options['usuario']).first()
+        else:
+            usuario = User.objects.filter(is_superuser=True).order_by('pk').first()
+        if usuario is None or not (usuario.is_staff or usuario.is_superuser):
+            raise CommandError('Se necesita un usuario administrador (--usuario o un superusuario)')
+
+        sesion = self._sesion(usuario)
+        try:
+            asyncio.run(self._medir(sesion.session_key, options['conexiones'], options['eventos']))
+        finally:
+            sesion.delete()
+
+    async def _medir(self, clave_sesion, total, eventos):
+        aplicacion = get_asgi_application()
+        ruta = reverse('asistencia_en_vivo')
+        host = next((h for h in settings.ALLOWED_HOSTS if h != '*' and not h.startswith('.')), 'localhost')
+        scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': 'GET',
+            'scheme': 'http',
+            'path': ruta,
+            'raw_path': ruta.encode(),
+            'query_string': b'',
+            'root_path': '',
+            'headers': [
+                (b'host', host.encode()),
+                (b'accept', b'text/event-stream'),
+                (b'cookie', f'{settings.SESSION_COOKIE_NAME}={clave_sesion}'.encode()),
+            ],
+            'client': ('127.0.0.1', 0),
+            'server': (host, 80),
+        }
+
+        # Una conexión previa carga middleware, URLs y vistas: no cuenta como costo por conexión
+        calentamiento = ConexionEnVivo(aplicacion, scope)
+        calentamiento.abrir()
+        await calentamiento.abierta.wait()
+        calentamiento.cerrar()
+        await calentamiento.tarea
+
+        memoria_inicial = memoria_residente_kb()
+        inicio = time.perf_counter()
+        conexiones = [ConexionEnVivo(aplicacion, scope) for _ in range(total)]
+        for conexion in conexiones:
+            conexion.abrir()
+        await asyncio.gather(*(conexion.abierta.wait() for conexion in conexiones))
+        apertura = time.perf_counter() - inicio
+        rechazadas = [c for c in conexiones if c.estado != 200]
+        if rechazadas:
+            raise CommandError(f'{len(rechazadas)} conexiones rechazadas (estado {rechazadas[0].estado})')
+        memoria_abiertas = memoria_residente_kb()
+
+        self.stdout.write(f'{total} conexiones abiertas en {apertura * 1000:.0f} ms')
+        if memoria_inicial is not None:
+            por_conexion = (memoria_abiertas - memoria_inicial) / total
+            self.stdout.write(
+                f'Memoria residente: {memoria_inicial / 1024:.1f} MB -> {memoria_abiertas / 1024:.1f} MB '
+                f'({por_conexion:.1f} KB por conexión)'
+            )
+
+        backend = obtener_backend()
+        latencias = []
+        for _ in range(eventos):
+            for conexion in conexiones:
+                conexion.recibido_en = None
+            publicado_en = time.perf_counter()
+            backend.publicar(CANAL_ASISTENCIA, [0, '2000-01-01', True, ''])
+            while any(c.recibido_en is None for c in conexiones):
+                if time.perf_counter() - publicado_en > 10:
+                    raise CommandError('Un evento no llegó a todas las conexiones en 10 s')
+                await asyncio.sleep(0.001)
+            latencias.extend((c.recibido_en - publicado_en) * 1000 for c in conexiones)
+            await asyncio.sleep(0.05)
+
+        self.stdout.write(
+            f'Latencia de entrega ({eventos} eventos x {total} conexiones): '
+            f'p50 {statistics.median(latencias):.1f} ms, p95 {_percentil(latencias, 95):.1f} ms, '
+            f'máx {max(latencias):.1f} ms'
+        )
+
+        for conexion in conexiones:
+            conexion.cerrar()
+        await asyncio.wait([c.tarea for c in conexiones], timeout=10)
+        self.stdout.write(self.style.SUCCESS('✓ Conexiones cerradas'))
@@ -0,0 +1,80 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.template.loader import render_to_string
+
+from core.email import renderizar_correo, renderizar_correos
+
+
+def _contextos(plantilla, cantidad):
+    """Datos como los que encola core.notificaciones, con un niño distinto por correo"""
+    if plantilla == 'inasistencia':
+        return [{'nombre_nino': f'Niño Número {i}'} for i in range(cantidad)]
+    if plantilla == 'solicitud_permiso':
+        return [
+            {'nombre_nino': f'Niño Número {i}', 'fecha_inicio': '03/11/2026', 'tipo_permiso': 'Médico'}
+            for i in range(cantidad)
+        ]
+    return [
+        {
+            'nombre_nino': f'Niño Número {i}',
+            'periodo': '03/11/2026 al 05/11/2026',
+            'tipo_permiso': 'Médico',
+            'motivo': 'Control pediátrico',
+            'horario': '08:00 - 10:00' if i % 2 else None,
+        }
+        for i in range(cantidad)
+    ]
+
+
+PLANTILLAS = ['inasistencia', 'solicitud_permiso', 'permiso_aprobado']
+
+
+class Command(BaseCommand):
+    help = (
+        'Mide el render de los cuerpos de correo de notificación: render_to_string por correo, '
+        'renderizar_correo (plantilla compilada en caché) y renderizar_correos (una pasada para '
+        'todo el lote).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--cantidad',
+            type=int,
+            default=10000,
+            help='Correos a renderizar por plantilla y variante (por defecto 10000)'
+        )
+        parser.add_argument(
+            '--plantilla',
+            choices=PLANTILLAS,
+            action='append',
+            help='Plantilla a medir (se puede repetir; por defecto todas)'
+        )
+
+    def handle(self, *args, **options):
+        if options['cantidad'] < 1:
+            raise CommandError('--cantidad debe ser mayor que 0')
+        cantidad = options['cantidad']
+
+        for plantilla in options['plantilla'] or PLANTILLAS:
+            contextos = _contextos(plantilla, cantidad)
+            # Primera compilación fuera de la medición
+            renderizar_correo(plantilla, contextos[0])
+            variantes = [
+                ('render_to_string', lambda: [
+                    render_to_string(f'emails/{plantilla}.html', contexto) for contexto in contextos
+                ]),
+                ('renderizar_correo', lambda: [renderizar_correo(plantilla, contexto) for contexto in contextos]),
+                ('renderizar_correos', lambda: renderizar_correos(plantilla, contextos)),
+            ]
+            self.stdout.write(f'{plantilla} ({cantidad} correos):')
+            for nombre, renderizar in variantes:
+                inicio = time.perf_counter()
+                cuerpos = renderizar()
+                segundos = time.perf_counter() - inicio
+                if len(cuerpos) != cantidad or contextos[-1]['nombre_nino'] not in cuerpos[-1]:
+                    raise CommandError(f'{nombre} no produjo los cuerpos esperados')
+                self.stdout.write(
+                    f'  {nombre:20} {segundos * 1000:8.0f} ms  ({segundos / cantidad * 1e6:5.1f} µs/correo)'
+                )
+        self.stdout.write(self.style.SUCCESS('✓ Medición terminada'))
@@ -0,0 +1,55 @@
+from datetime import date
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from core.notificaciones import notificar_inasistencias, procesar_notificaciones
+
+
+class Command(BaseCommand):
+    help = (
+        'Barrido de inasistencias injustificadas del día que aún no se notificaron: '
+        'encola un aviso por niño (una sola vez) para que el worker los envíe agrupados '
+        'en pocas llamadas a Brevo.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--fecha',
+            help='Fecha a revisar en formato AAAA-MM-DD (por defecto, hoy)'
+        )
+        parser.add_argument(
+            '--enviar',
+            action='store_true',
+            help='Enviar en este mismo proceso lo que quede en la bandeja (sin esperar al worker)'
+        )
+
+    def handle(self, *args, **options):
+        if options['fecha']:
+            try:
+                fecha = date.fromisoformat(options['fecha'])
+            except ValueError:
+                raise CommandError('La fecha debe tener el formato AAAA-MM-DD')
+        else:
+            fecha = timezone.now().date()
+
+        encoladas = notificar_inasistencias(fecha)
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ {len(encoladas)} avisos de inasistencia del {fecha.strftime("%d/%m/%Y")} encolados'
+        ))
+
+        if options['enviar']:
+            totales = {'enviadas': 0, 'reintentos': 0, 'fallidas': 0, 'limitadas': 0}
+            while True:
+                lote = procesar_notificaciones(
+                    settings.NOTIFICACIONES_TAMANO_LOTE, settings.NOTIFICACIONES_CONCURRENCIA
+                )
+                for clave, valor in lote.items():
+                    totales[clave] += valor
+                if sum(lote.values()) < settings.NOTIFICACIONES_TAMANO_LOTE or lote['reintentos'] or lote['limitadas']:
+                    break
+            self.stdout.write(
+                f'{totales["enviadas"]} enviadas, {totales["reintentos"]} para reintentar, '
+                f'{totales["fallidas"]} fallidas, {totales["limitadas"]} postergadas por cupo'
+            )
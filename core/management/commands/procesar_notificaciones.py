@@ -0,0 +1,70 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from core.metricas import iniciar_servidor_metricas
+from core.notificaciones import procesar_notificaciones
+
+
+class Command(BaseCommand):
+    help = (
+        'Worker de la bandeja de salida: envía por Brevo los correos pendientes en lotes. '
+        'Se ejecuta como proceso aparte de gunicorn; con --una-vez procesa un solo lote.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tamano-lote',
+            type=int,
+            default=settings.NOTIFICACIONES_TAMANO_LOTE,
+            help=f'Notificaciones reservadas por lote (por defecto {settings.NOTIFICACIONES_TAMANO_LOTE})'
+        )
+        parser.add_argument(
+            '--concurrencia',
+            type=int,
+            default=settings.NOTIFICACIONES_CONCURRENCIA,
+            help=f'Envíos simultáneos a Brevo (por defecto {settings.NOTIFICACIONES_CONCURRENCIA})'
+        )
+        parser.add_argument(
+            '--intervalo',
+            type=float,
+            default=2.0,
+            help='Segundos de espera cuando la bandeja está vacía (por defecto 2)'
+        )
+        parser.add_argument(
+            '--puerto-metricas',
+            type=int,
+            help='Exponer las métricas de envío del worker (formato Prometheus) en este puerto'
+        )
+        parser.add_argument(
+            '--una-vez',
+            action='store_true',
+            help='Procesar un solo lote y terminar'
+        )
+
+    def handle(self, *args, **options):
+        if options['tamano_lote'] < 1 or options['concurrencia'] < 1:
+            raise CommandError('--tamano-lote y --concurrencia deben ser mayores que 0')
+
+        if options['puerto_metricas']:
+            iniciar_servidor_metricas(options['puerto_metricas'])
+            self.stdout.write(f'Métricas en http://0.0.0.0:{options["puerto_metricas"]}/metrics')
+
+        try:
+            while True:
+                close_old_connections()
+                totales = procesar_notificaciones(options['tamano_lote'], options['concurrencia'])
+                if any(totales.values()):
+                    self.stdout.write(
+                        f'{totales["enviadas"]} enviadas, {totales["reintentos"]} para reintentar, '
+                        f'{totales["fallidas"]} fallidas, {totales["limitadas"]} postergadas por cupo'
+                    )
+                if options['una_vez']:
+                    break
+                if totales['enviadas'] + totales['reintentos'] + totales['fallidas'] < options['tamano_lote']:
+                    time.sleep(options['intervalo'])
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(self.style.SUCCESS('✓ Worker de notificaciones detenido'))
@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.asistencia import reconstruir_resumen_secciones
+from core.historial import reconstruir_historial_mensual
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye desde cero el resumen diario por sección y el historial mensual de asistencia'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tamano-lote',
+            type=int,
+            default=1000,
+            help='Cantidad de filas por INSERT (por defecto 1000)'
+        )
+
+    def handle(self, *args, **options):
+        inicio = time.monotonic()
+        total = reconstruir_resumen_secciones(tamano_lote=options['tamano_lote'])
+        duracion = time.monotonic() - inicio
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ {total} resúmenes de asistencia por sección reconstruidos en {duracion:.2f}s'
+        ))
+
+        inicio = time.monotonic()
+        total = reconstruir_historial_mensual(tamano_lote=options['tamano_lote'])
+        duracion = time.monotonic() - inicio
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ {total} historiales mensuales de asistencia reconstruidos en {duracion:.2f}s'
+        ))
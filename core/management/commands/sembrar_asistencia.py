@@ -0,0 +1,52 @@
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from core.asistencia import crear_asistencias_faltantes
+from core.models import Nino
+
+
+class Command(BaseCommand):
+    help = (
+        'Crea al inicio del día los registros de asistencia (presente por defecto) '
+        'de todos los niños activos con aula asignada. Pensado para ejecutarse con cron; '
+        'es idempotente.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--fecha',
+            help='Fecha a sembrar en formato AAAA-MM-DD (por defecto, hoy)'
+        )
+        parser.add_argument(
+            '--tamano-lote',
+            type=int,
+            default=500,
+            help='Cantidad de registros por INSERT (por defecto 500)'
+        )
+
+    def handle(self, *args, **options):
+        if options['fecha']:
+            try:
+                fecha = date.fromisoformat(options['fecha'])
+            except ValueError:
+                raise CommandError('La fecha debe tener el formato AAAA-MM-DD')
+        else:
+            fecha = timezone.now().date()
+
+        if options['tamano_lote'] < 1:
+            raise CommandError('--tamano-lote debe ser mayor que 0')
+
+        ninos = Nino.objects.filter(activo=True, asignacion_aula__isnull=False)
+
+        inicio = time.monotonic()
+        total_ninos = ninos.count()
+        creados = crear_asistencias_faltantes(ninos, fecha, tamano_lote=options['tamano_lote'])
+        duracion = time.monotonic() - inicio
+
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Asistencia del {fecha.strftime("%d/%m/%Y")}: {creados} registros creados, '
+            f'{total_ninos - creados} ya existían ({total_ninos} niños asignados) en {duracion:.2f}s'
+        ))
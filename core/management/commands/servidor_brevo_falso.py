@@ -0,0 +1,55 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.brevo_falso import ServidorBrevoFalso
+
+
+class Command(BaseCommand):
+    help = (
+        'Levanta un servidor local que imita el endpoint transaccional de Brevo. '
+        'Usar con CORREO_BACKEND=core.backends_correo.BackendBrevoLocal para pruebas de carga sin red.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1', help='Interfaz de escucha (por defecto 127.0.0.1)')
+        parser.add_argument('--puerto', type=int, default=8025, help='Puerto (por defecto 8025)')
+        parser.add_argument(
+            '--latencia-ms',
+            type=float,
+            default=0,
+            help='Milisegundos de espera antes de cada respuesta (por defecto 0)'
+        )
+        parser.add_argument(
+            '--tasa-errores',
+            type=float,
+            default=0.0,
+            help='Proporción de solicitudes que fallan con 500/429, entre 0 y 1 (por defecto 0)'
+        )
+        parser.add_argument('--semilla', type=int, help='Semilla aleatoria para repetir la misma secuencia de errores')
+
+    def handle(self, *args, **options):
+        if not 0 <= options['tasa_errores'] <= 1:
+            raise CommandError('--tasa-errores debe estar entre 0 y 1')
+        if options['latencia_ms'] < 0:
+            raise CommandError('--latencia-ms no puede ser negativa')
+
+        servidor = ServidorBrevoFalso(
+            options['host'],
+            options['puerto'],
+            options['latencia_ms'],
+            options['tasa_errores'],
+            options['semilla']
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Brevo falso escuchando en {servidor.url} '
+            f'(latencia {options["latencia_ms"]:g} ms, errores {options["tasa_errores"]:.0%})'
+        ))
+        try:
+            servidor.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            servidor.server_close()
+            e = servidor.estadisticas
+            self.stdout.write(
+                f'{e["solicitudes"]} solicitudes, {e["correos"]} correos, {e["errores"]} errores simulados'
+            )
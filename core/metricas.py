@@ -0,0 +1,208 @@
+"""
+Métricas en memoria del proceso, expuestas en formato de texto de Prometheus.
+
+Cada proceso (worker de gunicorn, worker de notificaciones) lleva sus propios
+contadores e histogramas; ``exponer()`` los serializa para el endpoint
+``/metricas/`` o para el servidor de métricas del worker
+(``procesar_notificaciones --puerto-metricas``). Los indicadores calculados
+(p. ej. la profundidad de la bandeja de salida) se leen en cada consulta.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+TIPO_CONTENIDO = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Límites de las cubetas de latencia, en segundos (los de Prometheus por defecto)
+CUBETAS_SEGUNDOS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+_registro = []
+_lock_registro = threading.Lock()
+
+
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _formatear_etiquetas(nombres, valores, extra=()):
+    pares = list(zip(nombres, valores)) + list(extra)
+    if not pares:
+        return ''
+    return '{' + ','.join(f'{nombre}="{_escapar(valor)}"' for nombre, valor in pares) + '}'
+
+
+def _formatear_numero(valor):
+    if valor == float('inf'):
+        return '+Inf'
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+
+class _Metrica:
+    tipo = None
+
+    def __init__(self, nombre, ayuda, etiquetas=()):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = tuple(etiquetas)
+        self._valores = {}
+        self._lock = threading.Lock()
+        with _lock_registro:
+            _registro.append(self)
+
+    def _clave(self, etiquetas):
+        if set(etiquetas) != set(self.etiquetas):
+            raise ValueError(f'{self.nombre} espera las etiquetas {self.etiquetas}')
+        return tuple(str(etiquetas[nombre]) for nombre in self.etiquetas)
+
+    def encabezado(self):
+        return [f'# HELP {self.nombre} {self.ayuda}', f'# TYPE {self.nombre} {self.tipo}']
+
+    def limpiar(self):
+        with self._lock:
+            self._valores.clear()
+
+
+class Contador(_Metrica):
+    """Valor que solo aumenta (envíos, errores...)"""
+
+    tipo = 'counter'
+
+    def incrementar(self, cantidad=1, **etiquetas):
+        clave = self._clave(etiquetas)
+        with self._lock:
+            self._valores[clave] = self._valores.get(clave, 0) + cantidad
+
+    def valor(self, **etiquetas):
+        return self._valores.get(self._clave(etiquetas), 0)
+
+    def lineas(self):
+        with self._lock:
+            valores = sorted(self._valores.items())
+        return [
+            f'{self.nombre}{_formatear_etiquetas(self.etiquetas, clave)} {_formatear_numero(valor)}'
+            for clave, valor in valores
+        ]
+
+
+class Histograma(_Metrica):
+    """Distribución de valores (latencias) en cubetas acumuladas"""
+
+    tipo = 'histogram'
+
+    def __init__(self, nombre, ayuda, etiquetas=(), cubetas=CUBETAS_SEGUNDOS):
+        super().__init__(nombre, ayuda, etiquetas)
+        self.cubetas = tuple(sorted(cubetas))
+
+    def observar(self, valor, **etiquetas):
+        clave = self._clave(etiquetas)
+        indice = bisect_left(self.cubetas, valor)
+        with self._lock:
+            conteos, suma = self._valores.get(clave, ([0] * (len(self.cubetas) + 1), 0))
+            conteos[indice] += 1
+            self._valores[clave] = (conteos, suma + valor)
+
+    @contextmanager
+    def medir(self, **etiquetas):
+        """Observa los segundos que tarda el bloque ``with``"""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observar(time.perf_counter() - inicio, **etiquetas)
+
+    def lineas(self):
+        with self._lock:
+            valores = sorted((clave, (list(conteos), suma)) for clave, (conteos, suma) in self._valores.items())
+        lineas = []
+        for clave, (conteos, suma) in valores:
+            acumulado = 0
+            for limite, conteo in zip(self.cubetas + (float('inf'),), conteos):
+                acumulado += conteo
+                etiquetas = _formatear_etiquetas(self.etiquetas, clave, [('le', _formatear_numero(limite))])
+                lineas.append(f'{self.nombre}_bucket{etiquetas} {acumulado}')
+            etiquetas = _formatear_etiquetas(self.etiquetas, clave)
+            lineas.append(f'{self.nombre}_sum{etiquetas} {_formatear_numero(suma)}')
+            lineas.append(f'{self.nombre}_count{etiquetas} {acumulado}')
+        return lineas
+
+
+class Indicador(_Metrica):
+    """
+    Valor instantáneo calculado al exponer: ``funcion`` retorna
+    {(valores de etiquetas...): valor}.
+    """
+
+    tipo = 'gauge'
+
+    def __init__(self, nombre, ayuda, etiquetas=(), funcion=None):
+        super().__init__(nombre, ayuda, etiquetas)
+        self.funcion = funcion
+
+    def lineas(self):
+        valores = sorted(self.funcion().items())
+        return [
+            f'{self.nombre}{_formatear_etiquetas(self.etiquetas, clave)} {_formatear_numero(valor)}'
+            for clave, valor in valores
+        ]
+
+
+def exponer():
+    """Todas las métricas registradas en formato de texto de Prometheus"""
+    with _lock_registro:
+        metricas = list(_registro)
+    lineas = []
+    for metrica in metricas:
+        lineas.extend(metrica.encabezado())
+        lineas.extend(metrica.lineas())
+    return '\n'.join(lineas) + '\n'
+
+
+class _ManejadorMetricas(BaseHTTPRequestHandler):
+    def do_GET(self):
+        cuerpo = exponer().encode()
+        self.send_response(200)
+        self.send_header('Content-Type', TIPO_CONTENIDO)
+        self.send_header('Content-Length', str(len(cuerpo)))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def log_message(self, *args):
+        pass
+
+
+def iniciar_servidor_metricas(puerto, host='0.0.0.0'):
+    """Sirve ``exponer()`` por HTTP en un hilo de fondo (para procesos sin Django HTTP)"""
+    servidor = ThreadingHTTPServer((host, puerto), _ManejadorMetricas)
+    servidor.daemon_threads = True
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor
+
+
+# Métricas de envío de correo
+
+ENVIO_SEGUNDOS = Histograma(
+    'correo_envio_segundos',
+    'Duración de cada función de envío de core.email (incluye render y llamada al backend).',
+    ['funcion']
+)
+ENVIOS = Contador(
+    'correo_envios_total',
+    'Envíos por función de core.email y resultado (enviado, rechazado, transitorio, error).',
+    ['funcion', 'resultado']
+)
+BREVO_SEGUNDOS = Histograma(
+    'brevo_llamada_segundos',
+    'Duración de cada llamada HTTP a la API transaccional de Brevo.',
+)
+BREVO_RESPUESTAS = Contador(
+    'brevo_respuestas_total',
+    'Respuestas de Brevo por código HTTP (o tipo de error de red / circuito_abierto).',
+    ['codigo']
+)
+NOTIFICACIONES_PROCESADAS = Contador(
+    'notificaciones_procesadas_total',
+    'Notificaciones de la bandeja de salida procesadas por el worker, por resultado.',
+    ['resultado']
+)
@@ -0,0 +1,17 @@
+from .utils import roles_de
+
+
+class RolesMiddleware:
+    """
+    Resuelve una vez por request los roles del usuario autenticado y los deja
+    en ``request.roles``; es_admin/es_maestro/es_padre y el context processor
+    ``core.context_processors.roles`` leen ese resultado sin volver a consultar.
+    Va después de AuthenticationMiddleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.roles = roles_de(request.user)
+        return self.get_response(request)
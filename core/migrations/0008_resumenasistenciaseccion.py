@@ -0,0 +1,31 @@
+# Generated by Django 5.2.7 on 2026-10-17 22:26
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_padrenino'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumenAsistenciaSeccion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField(verbose_name='Fecha')),
+                ('presentes', models.PositiveIntegerField(default=0, verbose_name='Presentes')),
+                ('ausentes', models.PositiveIntegerField(default=0, verbose_name='Ausentes')),
+                ('justificados', models.PositiveIntegerField(default=0, verbose_name='Ausencias justificadas')),
+                ('seccion', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resumenes_asistencia', to='core.seccion', verbose_name='Sección')),
+            ],
+            options={
+                'verbose_name': 'Resumen de Asistencia por Sección',
+                'verbose_name_plural': 'Resúmenes de Asistencia por Sección',
+                'ordering': ['-fecha', 'seccion'],
+                'unique_together': {('seccion', 'fecha')},
+            },
+        ),
+    ]
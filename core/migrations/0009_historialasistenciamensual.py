@@ -0,0 +1,33 @@
+# Generated by Django 5.2.7 on 2026-10-17 22:27
+
+import django.core.validators
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_resumenasistenciaseccion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HistorialAsistenciaMensual',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('anio', models.PositiveSmallIntegerField(verbose_name='Año')),
+                ('mes', models.PositiveSmallIntegerField(validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(12)], verbose_name='Mes')),
+                ('registrados', models.PositiveIntegerField(default=0, verbose_name='Días registrados')),
+                ('presentes', models.PositiveIntegerField(default=0, verbose_name='Días presentes')),
+                ('justificados', models.PositiveIntegerField(default=0, verbose_name='Ausencias justificadas')),
+                ('nino', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='historial_mensual', to='core.nino', verbose_name='Niño')),
+            ],
+            options={
+                'verbose_name': 'Historial Mensual de Asistencia',
+                'verbose_name_plural': 'Historiales Mensuales de Asistencia',
+                'ordering': ['nino', '-anio', '-mes'],
+                'unique_together': {('nino', 'anio', 'mes')},
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.7 on 2026-10-17 22:27
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_historialasistenciamensual'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='maestro',
+            name='usuario',
+            field=models.OneToOneField(blank=True, help_text='Cuenta con la que el maestro inicia sesión', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='perfil_maestro', to=settings.AUTH_USER_MODEL, verbose_name='Usuario del sistema'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.7 on 2026-10-17 22:29
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_maestro_usuario'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='asistencia',
+            name='actualizado_en',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='Última actualización'),
+        ),
+        migrations.AddField(
+            model_name='asistencia',
+            name='marcado_en',
+            field=models.DateTimeField(blank=True, help_text='Momento en que el maestro marcó la asistencia (reloj del cliente si fue sin conexión)', null=True, verbose_name='Marcado en'),
+        ),
+        migrations.CreateModel(
+            name='OperacionSincronizada',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('clave', models.CharField(max_length=64, unique=True, verbose_name='Clave de idempotencia')),
+                ('procesada_en', models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='Procesada en')),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='operaciones_sincronizadas', to=settings.AUTH_USER_MODEL, verbose_name='Usuario')),
+            ],
+            options={
+                'verbose_name': 'Operación Sincronizada',
+                'verbose_name_plural': 'Operaciones Sincronizadas',
+            },
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-17 22:34
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_sincronizacion_asistencia'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='permisoausencia',
+            index=models.Index(condition=models.Q(('estado', 'aprobado')), fields=['nino', 'fecha_inicio', 'fecha_fin'], name='permiso_aprobado_rango_idx'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.7 on 2026-10-17 22:36
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_permiso_aprobado_rango_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificacionCorreo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('inasistencia', 'Inasistencia no justificada'), ('solicitud_permiso', 'Solicitud de permiso recibida'), ('permiso_aprobado', 'Permiso aprobado')], max_length=30, verbose_name='Tipo')),
+                ('destinatario', models.EmailField(max_length=254, verbose_name='Destinatario')),
+                ('datos', models.JSONField(blank=True, default=dict, verbose_name='Datos del mensaje')),
+                ('estado', models.CharField(choices=[('pendiente', 'Pendiente'), ('enviando', 'Enviando'), ('enviada', 'Enviada'), ('fallida', 'Fallida')], default='pendiente', max_length=20, verbose_name='Estado')),
+                ('intentos', models.PositiveSmallIntegerField(default=0, verbose_name='Intentos')),
+                ('error', models.TextField(blank=True, verbose_name='Último error')),
+                ('creada_en', models.DateTimeField(auto_now_add=True, verbose_name='Creada en')),
+                ('reservada_en', models.DateTimeField(blank=True, null=True, verbose_name='Reservada por el worker en')),
+                ('enviada_en', models.DateTimeField(blank=True, null=True, verbose_name='Enviada en')),
+                ('creada_por', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='notificaciones_creadas', to=settings.AUTH_USER_MODEL, verbose_name='Creada por')),
+            ],
+            options={
+                'verbose_name': 'Notificación por Correo',
+                'verbose_name_plural': 'Notificaciones por Correo',
+                'ordering': ['-creada_en'],
+                'indexes': [models.Index(fields=['estado', 'creada_en'], name='notificacion_estado_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.7 on 2026-10-17 22:39
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_notificacioncorreo'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='asistencia',
+            name='notificado_en',
+            field=models.DateTimeField(blank=True, help_text='Momento en que se encoló el aviso de inasistencia al responsable (uno por día)', null=True, verbose_name='Notificado en'),
+        ),
+        migrations.AddIndex(
+            model_name='asistencia',
+            index=models.Index(condition=models.Q(('notificado_en__isnull', True), ('presente', False)), fields=['fecha'], name='asistencia_sin_aviso_idx'),
+        ),
+    ]
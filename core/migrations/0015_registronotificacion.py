@@ -0,0 +1,36 @@
+# Generated by Django 5.2.7 on 2026-10-17 22:42
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_asistencia_notificado_en'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notificacioncorreo',
+            name='programada_para',
+            field=models.DateTimeField(blank=True, help_text='No se envía antes de este momento (límite de envíos por destinatario)', null=True, verbose_name='Programada para'),
+        ),
+        migrations.CreateModel(
+            name='RegistroNotificacion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('destinatario', models.EmailField(max_length=254, verbose_name='Destinatario')),
+                ('tipo', models.CharField(choices=[('inasistencia', 'Inasistencia no justificada'), ('solicitud_permiso', 'Solicitud de permiso recibida'), ('permiso_aprobado', 'Permiso aprobado')], max_length=30, verbose_name='Tipo')),
+                ('fecha', models.DateField(verbose_name='Fecha')),
+                ('creado_en', models.DateTimeField(auto_now_add=True, verbose_name='Creado en')),
+                ('nino', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='registros_notificacion', to='core.nino', verbose_name='Niño')),
+                ('notificacion', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='registros', to='core.notificacioncorreo', verbose_name='Notificación')),
+            ],
+            options={
+                'verbose_name': 'Registro de Notificación',
+                'verbose_name_plural': 'Registros de Notificación',
+                'constraints': [models.UniqueConstraint(fields=('destinatario', 'nino', 'tipo', 'fecha'), name='registro_notificacion_unico')],
+            },
+        ),
+    ]
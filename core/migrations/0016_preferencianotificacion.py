@@ -0,0 +1,48 @@
+# Generated by Django 5.2.7 on 2026-10-17 22:48
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_registronotificacion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PreferenciaNotificacion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('destinatario', models.EmailField(max_length=254, unique=True, verbose_name='Destinatario')),
+                ('frecuencia', models.CharField(choices=[('inmediata', 'Inmediata'), ('horaria', 'Resumen cada hora'), ('diaria', 'Resumen diario')], default='inmediata', max_length=10, verbose_name='Frecuencia')),
+                ('actualizada_en', models.DateTimeField(auto_now=True, verbose_name='Actualizada en')),
+            ],
+            options={
+                'verbose_name': 'Preferencia de Notificación',
+                'verbose_name_plural': 'Preferencias de Notificación',
+                'ordering': ['destinatario'],
+            },
+        ),
+        migrations.AddField(
+            model_name='notificacioncorreo',
+            name='resumen',
+            field=models.ForeignKey(blank=True, help_text='Correo de resumen en el que se envió esta notificación', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='incluidas', to='core.notificacioncorreo', verbose_name='Resumen'),
+        ),
+        migrations.AlterField(
+            model_name='notificacioncorreo',
+            name='estado',
+            field=models.CharField(choices=[('pendiente', 'Pendiente'), ('diferida', 'Esperando resumen'), ('resumida', 'Incluida en resumen'), ('enviando', 'Enviando'), ('enviada', 'Enviada'), ('fallida', 'Fallida')], default='pendiente', max_length=20, verbose_name='Estado'),
+        ),
+        migrations.AlterField(
+            model_name='notificacioncorreo',
+            name='tipo',
+            field=models.CharField(choices=[('inasistencia', 'Inasistencia no justificada'), ('solicitud_permiso', 'Solicitud de permiso recibida'), ('permiso_aprobado', 'Permiso aprobado'), ('resumen', 'Resumen de notificaciones')], max_length=30, verbose_name='Tipo'),
+        ),
+        migrations.AlterField(
+            model_name='registronotificacion',
+            name='tipo',
+            field=models.CharField(choices=[('inasistencia', 'Inasistencia no justificada'), ('solicitud_permiso', 'Solicitud de permiso recibida'), ('permiso_aprobado', 'Permiso aprobado'), ('resumen', 'Resumen de notificaciones')], max_length=30, verbose_name='Tipo'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.7 on 2026-10-17 22:54
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_preferencianotificacion'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='nino',
+            index=models.Index(condition=models.Q(('activo', True)), fields=['-fecha_registro', '-id'], name='nino_activo_registro_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='permisoausencia',
+            index=models.Index(fields=['estado', '-fecha_solicitud', '-id'], name='permiso_estado_solicitud_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='permisoausencia',
+            index=models.Index(fields=['-fecha_solicitud', '-id'], name='permiso_solicitud_idx'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.7 on 2026-10-17 22:57
+
+from django.db import migrations, models
+
+from core.busqueda import crear_indice_busqueda, eliminar_indice_busqueda, normalizar
+
+
+def calcular_nombre_busqueda(apps, schema_editor):
+    Nino = apps.get_model('core', 'Nino')
+    ninos = list(Nino.objects.only('nombre_completo'))
+    for nino in ninos:
+        nino.nombre_busqueda = normalizar(nino.nombre_completo)
+    Nino.objects.bulk_update(ninos, ['nombre_busqueda'], batch_size=1000)
+
+
+def crear_indice(apps, schema_editor):
+    crear_indice_busqueda(schema_editor.connection)
+
+
+def eliminar_indice(apps, schema_editor):
+    eliminar_indice_busqueda(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_indices_paginacion_cursor'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='nino',
+            name='nombre_busqueda',
+            field=models.CharField(default='', editable=False, max_length=200, verbose_name='Nombre para Búsqueda'),
+        ),
+        migrations.RunPython(calcular_nombre_busqueda, migrations.RunPython.noop),
+        # Trigramas en PostgreSQL, FTS5 en SQLite (ver core.busqueda)
+        migrations.RunPython(crear_indice, eliminar_indice),
+    ]
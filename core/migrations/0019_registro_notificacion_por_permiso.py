@@ -0,0 +1,31 @@
+# Generated by Django 5.2.7 on 2026-10-17 23:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0018_busqueda_nombre_nino'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='registronotificacion',
+            name='registro_notificacion_unico',
+        ),
+        migrations.AddField(
+            model_name='registronotificacion',
+            name='permiso',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='registros_notificacion', to='core.permisoausencia', verbose_name='Permiso'),
+        ),
+        migrations.AddConstraint(
+            model_name='registronotificacion',
+            constraint=models.UniqueConstraint(condition=models.Q(('permiso__isnull', True)), fields=('destinatario', 'nino', 'tipo', 'fecha'), name='registro_notificacion_unico'),
+        ),
+        migrations.AddConstraint(
+            model_name='registronotificacion',
+            constraint=models.UniqueConstraint(condition=models.Q(('permiso__isnull', False)), fields=('destinatario', 'tipo', 'permiso'), name='registro_notificacion_permiso_unico'),
+        ),
+    ]
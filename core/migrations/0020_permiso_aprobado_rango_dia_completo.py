@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-17 23:30
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0019_registro_notificacion_por_permiso'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='permisoausencia',
+            name='permiso_aprobado_rango_idx',
+        ),
+        migrations.AddIndex(
+            model_name='permisoausencia',
+            index=models.Index(condition=models.Q(('estado', 'aprobado'), ('hora_inicio__isnull', True)), fields=['nino', 'fecha_inicio', 'fecha_fin'], name='permiso_aprobado_rango_idx'),
+        ),
+    ]
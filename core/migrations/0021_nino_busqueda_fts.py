@@ -0,0 +1,26 @@
+# Generated by Django 5.2.7 on 2026-10-17 23:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0020_permiso_aprobado_rango_dia_completo'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NinoBusqueda',
+            fields=[
+                ('nino', models.OneToOneField(db_column='rowid', db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='busqueda_fts', serialize=False, to='core.nino')),
+                ('nombre_busqueda', models.TextField()),
+                ('rank', models.FloatField()),
+            ],
+            options={
+                'db_table': 'core_nino_fts',
+                'managed': False,
+            },
+        ),
+    ]
@@ -2,6 +2,7 @@ from django.db import models
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.contrib.auth.models import User
 from django.utils import timezone
+from .busqueda import CoincidenciaFts, normalizar
 
 
 class Nino(models.Model):
@@ -14,6 +15,14 @@ class Nino(models.Model):
         help_text="Nombre completo del niño/a"
     )
     
+    # Nombre normalizado para la búsqueda (ver core.busqueda); se calcula en save()
+    nombre_busqueda = models.CharField(
+        max_length=200,
+        editable=False,
+        default='',
+        verbose_name="Nombre para Búsqueda"
+    )
+    
     edad = models.IntegerField(
         validators=[MinValueValidator(0), MaxValueValidator(12)],
         verbose_name="Edad",
@@ -160,10 +169,25 @@ class Nino(models.Model):
         verbose_name = "Niño"
         verbose_name_plural = "Niños"
         ordering = ['nombre_completo']
+        indexes = [
+            # Listado de niños paginado por cursor (fecha_registro, id), más recientes primero
+            models.Index(
+                fields=['-fecha_registro', '-id'],
+                condition=models.Q(activo=True),
+                name='nino_activo_registro_idx'
+            ),
+        ]
         
     def __str__(self):
         return f"{self.nombre_completo} ({self.edad} años)"
     
+    def save(self, *args, **kwargs):
+        self.nombre_busqueda = normalizar(self.nombre_completo)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'nombre_completo' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'nombre_busqueda'}
+        super().save(*args, **kwargs)
+    
     def tiene_alergias(self):
         """Verifica si el niño tiene alergias registradas"""
         return bool(self.alergias and self.alergias.strip())
@@ -177,6 +201,32 @@ class Nino(models.Model):
         return bool(self.enfermedades and self.enfermedades.strip())
     
 
+class NinoBusqueda(models.Model):
+    """
+    Fila de la tabla virtual FTS5 ``core_nino_fts`` (solo SQLite). La crean y
+    mantienen core.busqueda y sus triggers, no las migraciones; existe para que
+    buscar_ninos la una a ``core_nino`` con el ORM y ordene por ``rank``.
+    """
+    nino = models.OneToOneField(
+        Nino,
+        primary_key=True,
+        db_column='rowid',
+        db_constraint=False,
+        on_delete=models.DO_NOTHING,
+        related_name='busqueda_fts'
+    )
+    nombre_busqueda = models.TextField()
+    # Columna oculta de FTS5: bm25 de la fila en una consulta con MATCH (más negativo = más parecido)
+    rank = models.FloatField()
+
+    class Meta:
+        managed = False
+        db_table = 'core_nino_fts'
+
+
+NinoBusqueda._meta.get_field('nombre_busqueda').register_lookup(CoincidenciaFts)
+
+
 # Modelo para los responsables
 
 class ResponsableAutorizado(models.Model):
@@ -360,6 +410,15 @@ class Maestro(models.Model):
     telefono = models.CharField(max_length=20, verbose_name="Teléfono")
     email = models.EmailField(verbose_name="Email")
     activo = models.BooleanField(default=True, verbose_name="Activo")
+    usuario = models.OneToOneField(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='perfil_maestro',
+        verbose_name="Usuario del sistema",
+        help_text="Cuenta con la que el maestro inicia sesión"
+    )
 
     class Meta:
         verbose_name = "Maestro"
@@ -453,10 +512,35 @@ class Asistencia(models.Model):
         verbose_name="Registrado por"
     )
     fecha_registro = models.DateTimeField(auto_now_add=True)
+    actualizado_en = models.DateTimeField(
+        auto_now=True,
+        db_index=True,
+        verbose_name="Última actualización"
+    )
+    marcado_en = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Marcado en",
+        help_text="Momento en que el maestro marcó la asistencia (reloj del cliente si fue sin conexión)"
+    )
+    notificado_en = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Notificado en",
+        help_text="Momento en que se encoló el aviso de inasistencia al responsable (uno por día)"
+    )
 
     class Meta:
         unique_together = ('nino', 'fecha')
         ordering = ['-fecha']
+        indexes = [
+            # Barrido de inasistencias pendientes de aviso (core.notificaciones)
+            models.Index(
+                fields=['fecha'],
+                condition=models.Q(presente=False, notificado_en__isnull=True),
+                name='asistencia_sin_aviso_idx'
+            ),
+        ]
 
     def __str__(self):
         estado = "Presente" if self.presente else "Ausente"
@@ -593,6 +677,18 @@ class PermisoAusencia(models.Model):
         verbose_name = "Permiso de Ausencia"
         verbose_name_plural = "Permisos de Ausencia"
         ordering = ['-fecha_solicitud']
+        indexes = [
+            # Búsqueda por niño y rango de fechas de los permisos vigentes de día
+            # completo (core.permisos); los parciales no justifican el día
+            models.Index(
+                fields=['nino', 'fecha_inicio', 'fecha_fin'],
+                condition=models.Q(estado='aprobado', hora_inicio__isnull=True),
+                name='permiso_aprobado_rango_idx'
+            ),
+            # Listado de permisos paginado por cursor (fecha_solicitud, id), con y sin filtro de estado
+            models.Index(fields=['estado', '-fecha_solicitud', '-id'], name='permiso_estado_solicitud_idx'),
+            models.Index(fields=['-fecha_solicitud', '-id'], name='permiso_solicitud_idx'),
+        ]
     
     def __str__(self):
         return f"Permiso {self.get_tipo_display()} - {self.nino.nombre_completo} ({self.get_estado_display()})"
@@ -642,4 +738,269 @@ class PadreNino(models.Model):
         unique_together = ('padre', 'nino')
     
     def __str__(self):
-        return f"{self.padre.get_full_name() or self.padre.username} -> {self.nino.nombre_completo}"
\ No newline at end of file
+        return f"{self.padre.get_full_name() or self.padre.username} -> {self.nino.nombre_completo}"
+
+class ResumenAsistenciaSeccion(models.Model):
+    """Totales diarios de asistencia por sección (se mantiene al registrar asistencia)"""
+    seccion = models.ForeignKey(
+        Seccion,
+        on_delete=models.CASCADE,
+        related_name='resumenes_asistencia',
+        verbose_name="Sección"
+    )
+    fecha = models.DateField(verbose_name="Fecha")
+    presentes = models.PositiveIntegerField(default=0, verbose_name="Presentes")
+    ausentes = models.PositiveIntegerField(default=0, verbose_name="Ausentes")
+    justificados = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Ausencias justificadas"
+    )
+
+    class Meta:
+        verbose_name = "Resumen de Asistencia por Sección"
+        verbose_name_plural = "Resúmenes de Asistencia por Sección"
+        unique_together = ('seccion', 'fecha')
+        ordering = ['-fecha', 'seccion']
+
+    def __str__(self):
+        return f"{self.seccion} - {self.fecha} ({self.presentes} presentes, {self.ausentes} ausentes)"
+
+    def total(self):
+        return self.presentes + self.ausentes
+
+
+class HistorialAsistenciaMensual(models.Model):
+    """
+    Asistencia de un niño en un mes, compactada en máscaras de bits.
+    El bit (dia - 1) de cada máscara corresponde al día del mes:
+    - registrados: hubo registro de asistencia (día lectivo)
+    - presentes: el niño asistió
+    - justificados: faltó con motivo
+    """
+    nino = models.ForeignKey(
+        Nino,
+        on_delete=models.CASCADE,
+        related_name='historial_mensual',
+        verbose_name="Niño"
+    )
+    anio = models.PositiveSmallIntegerField(verbose_name="Año")
+    mes = models.PositiveSmallIntegerField(
+        validators=[MinValueValidator(1), MaxValueValidator(12)],
+        verbose_name="Mes"
+    )
+    registrados = models.PositiveIntegerField(default=0, verbose_name="Días registrados")
+    presentes = models.PositiveIntegerField(default=0, verbose_name="Días presentes")
+    justificados = models.PositiveIntegerField(default=0, verbose_name="Ausencias justificadas")
+
+    class Meta:
+        verbose_name = "Historial Mensual de Asistencia"
+        verbose_name_plural = "Historiales Mensuales de Asistencia"
+        unique_together = ('nino', 'anio', 'mes')
+        ordering = ['nino', '-anio', '-mes']
+
+    def __str__(self):
+        return f"{self.nino.nombre_completo} - {self.mes:02d}/{self.anio}"
+
+    def dias_lectivos(self):
+        return self.registrados.bit_count()
+
+    def dias_presente(self):
+        return (self.presentes & self.registrados).bit_count()
+
+    def ausencias_injustificadas(self):
+        return (self.registrados & ~self.presentes & ~self.justificados).bit_count()
+
+    def tasa_asistencia(self):
+        """Porcentaje de días lectivos en que el niño asistió (None si no hay registros)"""
+        lectivos = self.dias_lectivos()
+        if not lectivos:
+            return None
+        return round(self.dias_presente() * 100 / lectivos, 1)
+
+    def calendario(self):
+        """Lista de (día, estado) con estado 'presente', 'justificado', 'ausente' o None"""
+        from calendar import monthrange
+        dias = []
+        for dia in range(1, monthrange(self.anio, self.mes)[1] + 1):
+            bit = 1 << (dia - 1)
+            if not self.registrados & bit:
+                estado = None
+            elif self.presentes & bit:
+                estado = 'presente'
+            elif self.justificados & bit:
+                estado = 'justificado'
+            else:
+                estado = 'ausente'
+            dias.append((dia, estado))
+        return dias
+
+
+class OperacionSincronizada(models.Model):
+    """Claves de idempotencia de operaciones de asistencia ya aplicadas (sincronización sin conexión)"""
+    clave = models.CharField(max_length=64, unique=True, verbose_name="Clave de idempotencia")
+    usuario = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='operaciones_sincronizadas',
+        verbose_name="Usuario"
+    )
+    procesada_en = models.DateTimeField(auto_now_add=True, db_index=True, verbose_name="Procesada en")
+
+    class Meta:
+        verbose_name = "Operación Sincronizada"
+        verbose_name_plural = "Operaciones Sincronizadas"
+
+    def __str__(self):
+        return f"{self.clave} ({self.usuario})"
+
+
+class NotificacionCorreo(models.Model):
+    """
+    Bandeja de salida de correos: se escribe en la misma transacción que el
+    cambio que la origina y la envía el worker ``procesar_notificaciones``.
+    """
+
+    TIPOS = [
+        ('inasistencia', 'Inasistencia no justificada'),
+        ('solicitud_permiso', 'Solicitud de permiso recibida'),
+        ('permiso_aprobado', 'Permiso aprobado'),
+        ('resumen', 'Resumen de notificaciones'),
+    ]
+
+    ESTADOS = [
+        ('pendiente', 'Pendiente'),
+        ('diferida', 'Esperando resumen'),
+        ('resumida', 'Incluida en resumen'),
+        ('enviando', 'Enviando'),
+        ('enviada', 'Enviada'),
+        ('fallida', 'Fallida'),
+    ]
+
+    tipo = models.CharField(max_length=30, choices=TIPOS, verbose_name="Tipo")
+    destinatario = models.EmailField(verbose_name="Destinatario")
+    datos = models.JSONField(default=dict, blank=True, verbose_name="Datos del mensaje")
+    estado = models.CharField(max_length=20, choices=ESTADOS, default='pendiente', verbose_name="Estado")
+    intentos = models.PositiveSmallIntegerField(default=0, verbose_name="Intentos")
+    error = models.TextField(blank=True, verbose_name="Último error")
+    creada_por = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='notificaciones_creadas',
+        verbose_name="Creada por"
+    )
+    creada_en = models.DateTimeField(auto_now_add=True, verbose_name="Creada en")
+    reservada_en = models.DateTimeField(null=True, blank=True, verbose_name="Reservada por el worker en")
+    programada_para = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Programada para",
+        help_text="No se envía antes de este momento (límite de envíos por destinatario)"
+    )
+    enviada_en = models.DateTimeField(null=True, blank=True, verbose_name="Enviada en")
+    resumen = models.ForeignKey(
+        'self',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='incluidas',
+        verbose_name="Resumen",
+        help_text="Correo de resumen en el que se envió esta notificación"
+    )
+
+    class Meta:
+        verbose_name = "Notificación por Correo"
+        verbose_name_plural = "Notificaciones por Correo"
+        ordering = ['-creada_en']
+        indexes = [
+            models.Index(fields=['estado', 'creada_en'], name='notificacion_estado_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_tipo_display()} a {self.destinatario} ({self.get_estado_display()})"
+
+
+class RegistroNotificacion(models.Model):
+    """
+    Bitácora de avisos: a lo sumo uno por (destinatario, niño, tipo, fecha), o
+    uno por (destinatario, tipo, permiso) en los avisos de un permiso (dos
+    permisos con la misma fecha de inicio son avisos distintos). Los índices
+    únicos permiten descartar duplicados antes de encolar el correo.
+    """
+    destinatario = models.EmailField(verbose_name="Destinatario")
+    nino = models.ForeignKey(
+        Nino,
+        on_delete=models.CASCADE,
+        related_name='registros_notificacion',
+        verbose_name="Niño"
+    )
+    tipo = models.CharField(max_length=30, choices=NotificacionCorreo.TIPOS, verbose_name="Tipo")
+    fecha = models.DateField(verbose_name="Fecha")
+    permiso = models.ForeignKey(
+        PermisoAusencia,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='registros_notificacion',
+        verbose_name="Permiso"
+    )
+    notificacion = models.ForeignKey(
+        NotificacionCorreo,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='registros',
+        verbose_name="Notificación"
+    )
+    creado_en = models.DateTimeField(auto_now_add=True, verbose_name="Creado en")
+
+    class Meta:
+        verbose_name = "Registro de Notificación"
+        verbose_name_plural = "Registros de Notificación"
+        constraints = [
+            models.UniqueConstraint(
+                fields=['destinatario', 'nino', 'tipo', 'fecha'],
+                condition=models.Q(permiso__isnull=True),
+                name='registro_notificacion_unico'
+            ),
+            models.UniqueConstraint(
+                fields=['destinatario', 'tipo', 'permiso'],
+                condition=models.Q(permiso__isnull=False),
+                name='registro_notificacion_permiso_unico'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.get_tipo_display()} - {self.nino_id} - {self.fecha} ({self.destinatario})"
+
+
+class PreferenciaNotificacion(models.Model):
+    """
+    Cómo quiere recibir sus avisos un destinatario. Sin registro, los correos
+    se envían de inmediato; con resumen, se acumulan y ``enviar_resumenes``
+    manda un solo correo por destinatario y ventana.
+    """
+
+    FRECUENCIAS = [
+        ('inmediata', 'Inmediata'),
+        ('horaria', 'Resumen cada hora'),
+        ('diaria', 'Resumen diario'),
+    ]
+
+    destinatario = models.EmailField(unique=True, verbose_name="Destinatario")
+    frecuencia = models.CharField(
+        max_length=10,
+        choices=FRECUENCIAS,
+        default='inmediata',
+        verbose_name="Frecuencia"
+    )
+    actualizada_en = models.DateTimeField(auto_now=True, verbose_name="Actualizada en")
+
+    class Meta:
+        verbose_name = "Preferencia de Notificación"
+        verbose_name_plural = "Preferencias de Notificación"
+        ordering = ['destinatario']
+
+    def __str__(self):
+        return f"{self.destinatario}: {self.get_frecuencia_display()}"
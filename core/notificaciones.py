@@ -0,0 +1,443 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Min, Q
+from django.utils import timezone
+
+from . import email
+from .backends_correo import CircuitoAbierto, ErrorTransitorio
+from .metricas import Indicador, NOTIFICACIONES_PROCESADAS
+from .models import Asistencia, NotificacionCorreo, PreferenciaNotificacion, RegistroNotificacion
+
+
+# Intentos de envío antes de dar una notificación por fallida
+MAX_INTENTOS = 5
+
+# Espera entre reintentos ante fallas transitorias (429, 5xx, timeouts):
+# exponencial desde la base, con tope y jitter para no reintentar todos a la vez
+REINTENTO_BASE_SEGUNDOS = 30
+REINTENTO_MAX_SEGUNDOS = 3600
+
+# Una notificación 'enviando' más antigua que esto quedó abandonada (worker caído)
+RESERVA_VENCE_MINUTOS = 10
+
+# Función de core.email que envía cada tipo; recibe el destinatario y los datos guardados.
+# Las inasistencias se envían agrupadas con enviar_notificaciones_inasistencia.
+ENVIOS = {
+    'inasistencia': 'enviar_notificacion_inasistencia',
+    'solicitud_permiso': 'enviar_confirmacion_solicitud_permiso',
+    'permiso_aprobado': 'enviar_notificacion_permiso_aprobado',
+    'resumen': 'enviar_resumen_notificaciones',
+}
+
+
+class LimitadorPorDestinatario:
+    """
+    Cubeta de tokens por destinatario: hasta ``capacidad`` correos seguidos y
+    luego ``por_hora`` correos por hora. Vive en la memoria del worker.
+    """
+
+    def __init__(self, capacidad, por_hora):
+        self.capacidad = capacidad
+        self.recarga = por_hora / 3600
+        self._cubetas = {}
+        self._lock = threading.Lock()
+
+    def tomar(self, destinatario, ahora=None):
+        """Consume un token; retorna 0 si se puede enviar o los segundos hasta el próximo token"""
+        ahora = time.monotonic() if ahora is None else ahora
+        with self._lock:
+            tokens, ultimo = self._cubetas.get(destinatario, (self.capacidad, ahora))
+            tokens = min(self.capacidad, tokens + (ahora - ultimo) * self.recarga)
+            if tokens >= 1:
+                self._cubetas[destinatario] = (tokens - 1, ahora)
+                return 0
+            self._cubetas[destinatario] = (tokens, ahora)
+            return (1 - tokens) / self.recarga if self.recarga else float('inf')
+
+
+_limitador = None
+
+
+def obtener_limitador():
+    global _limitador
+    if _limitador is None:
+        _limitador = LimitadorPorDestinatario(
+            settings.NOTIFICACIONES_CUPO_DESTINATARIO,
+            settings.NOTIFICACIONES_RECARGA_POR_HORA
+        )
+    return _limitador
+
+
+def _profundidad_bandeja():
+    filas = (
+        NotificacionCorreo.objects
+        .filter(estado__in=['pendiente', 'enviando', 'fallida'])
+        .values('estado')
+        .annotate(total=Count('id'))
+    )
+    profundidad = {('pendiente',): 0, ('enviando',): 0, ('fallida',): 0}
+    profundidad.update({(fila['estado'],): fila['total'] for fila in filas})
+    return profundidad
+
+
+def _antiguedad_pendientes():
+    mas_antigua = NotificacionCorreo.objects.filter(estado='pendiente').aggregate(Min('creada_en'))['creada_en__min']
+    return {(): (timezone.now() - mas_antigua).total_seconds() if mas_antigua else 0}
+
+
+# Se calculan en cada consulta al endpoint de métricas (la bandeja es compartida por todos los procesos)
+Indicador(
+    'notificaciones_bandeja',
+    'Notificaciones en la bandeja de salida por estado.',
+    ['estado'],
+    _profundidad_bandeja
+)
+Indicador(
+    'notificaciones_pendiente_antiguedad_segundos',
+    'Antigüedad de la notificación pendiente más vieja.',
+    funcion=_antiguedad_pendientes
+)
+
+
+def destinatarios_con_resumen(destinatarios):
+    """De ``destinatarios``, los que prefieren recibir sus avisos en un resumen"""
+    return set(
+        PreferenciaNotificacion.objects
+        .filter(destinatario__in=set(destinatarios))
+        .exclude(frecuencia='inmediata')
+        .values_list('destinatario', flat=True)
+    )
+
+
+def _estado_inicial(destinatario, con_resumen):
+    return 'diferida' if destinatario in con_resumen else 'pendiente'
+
+
+def encolar_notificacion(tipo, destinatario, usuario=None, nino=None, fecha=None, permiso=None, **datos):
+    """
+    Agrega un correo a la bandeja de salida. Llamarla dentro de la misma
+    transacción que el cambio que lo origina: si el cambio se revierte, el
+    correo tampoco se envía.
+
+    Con ``nino`` y ``fecha`` el aviso se anota en la bitácora y, si ya había
+    uno igual (destinatario, niño, tipo, fecha), no se encola y retorna None.
+    Los avisos de un permiso pasan ``permiso`` y se deduplican por permiso.
+    Si el destinatario prefiere resúmenes queda 'diferida' hasta ``armar_resumenes``.
+    """
+    estado = _estado_inicial(destinatario, destinatarios_con_resumen([destinatario]))
+    try:
+        with transaction.atomic():
+            notificacion = NotificacionCorreo.objects.create(
+                tipo=tipo,
+                destinatario=destinatario,
+                datos=datos,
+                estado=estado,
+                creada_por=usuario
+            )
+            if nino is not None:
+                RegistroNotificacion.objects.create(
+                    destinatario=destinatario,
+                    nino=nino,
+                    tipo=tipo,
+                    fecha=fecha,
+                    permiso=permiso,
+                    notificacion=notificacion
+                )
+    except IntegrityError:
+        # Duplicado: se descarta antes de llegar a Brevo
+        return None
+    return notificacion
+
+
+def notificar_inasistencias(fecha, nino_ids=None, usuario=None):
+    """
+    Encola el aviso de cada inasistencia injustificada de ``fecha`` que aún no
+    fue notificada (de los niños indicados, o de todos) y retorna
+    {nino_id: NotificacionCorreo}.
+
+    La marca ``notificado_en`` se reclama con SELECT ... FOR UPDATE SKIP LOCKED
+    en la misma transacción que el encolado, así cada inasistencia genera un
+    único aviso aunque dos peticiones o el barrido la procesen a la vez.
+    """
+    pendientes = (
+        Asistencia.objects
+        .filter(fecha=fecha, presente=False, notificado_en__isnull=True)
+        .filter(Q(motivo_inasistencia__isnull=True) | Q(motivo_inasistencia=''))
+        .filter(nino__email_responsable__isnull=False)
+        .exclude(nino__email_responsable='')
+    )
+    if nino_ids is not None:
+        pendientes = pendientes.filter(nino_id__in=nino_ids)
+
+    with transaction.atomic():
+        reclamadas = list(
+            pendientes.select_related('nino').select_for_update(skip_locked=True, of=('self',))
+        )
+        if not reclamadas:
+            return {}
+        Asistencia.objects.filter(pk__in=[a.pk for a in reclamadas]).update(notificado_en=timezone.now())
+
+        # Descartar lo que ya figura en la bitácora (p. ej. un aviso manual)
+        avisados = set(
+            RegistroNotificacion.objects.filter(
+                tipo='inasistencia', fecha=fecha, permiso__isnull=True,
+                nino_id__in=[a.nino_id for a in reclamadas]
+            ).values_list('nino_id', 'destinatario')
+        )
+        reclamadas = [a for a in reclamadas if (a.nino_id, a.nino.email_responsable) not in avisados]
+        con_resumen = destinatarios_con_resumen(a.nino.email_responsable for a in reclamadas)
+
+        notificaciones = NotificacionCorreo.objects.bulk_create([
+            NotificacionCorreo(
+                tipo='inasistencia',
+                destinatario=asistencia.nino.email_responsable,
+                datos={'nombre_nino': asistencia.nino.nombre_completo},
+                estado=_estado_inicial(asistencia.nino.email_responsable, con_resumen),
+                creada_por=usuario
+            )
+            for asistencia in reclamadas
+        ])
+        RegistroNotificacion.objects.bulk_create([
+            RegistroNotificacion(
+                destinatario=notificacion.destinatario,
+                nino_id=asistencia.nino_id,
+                tipo='inasistencia',
+                fecha=fecha,
+                notificacion=notificacion
+            )
+            for asistencia, notificacion in zip(reclamadas, notificaciones)
+        ], ignore_conflicts=True)
+    return {a.nino_id: n for a, n in zip(reclamadas, notificaciones)}
+
+
+def armar_resumenes(frecuencia, usuario=None):
+    """
+    Junta las notificaciones diferidas de los destinatarios con ``frecuencia``
+    ('horaria' o 'diaria') en un correo de resumen por destinatario, que queda
+    pendiente para el worker, y retorna los resúmenes creados.
+
+    La pasada horaria también libera lo diferido de quienes volvieron a
+    preferir avisos inmediatos, para que nada quede retenido.
+    """
+    filtro = Q(destinatario__in=PreferenciaNotificacion.objects.filter(frecuencia=frecuencia).values('destinatario'))
+    if frecuencia == 'horaria':
+        filtro |= ~Q(destinatario__in=(
+            PreferenciaNotificacion.objects.exclude(frecuencia='inmediata').values('destinatario')
+        ))
+
+    with transaction.atomic():
+        diferidas = list(
+            NotificacionCorreo.objects.select_for_update(skip_locked=True)
+            .filter(filtro, estado='diferida')
+            .order_by('destinatario', 'creada_en')
+        )
+        if not diferidas:
+            return []
+
+        por_destinatario = {}
+        for notificacion in diferidas:
+            por_destinatario.setdefault(notificacion.destinatario, []).append(notificacion)
+
+        resumenes = NotificacionCorreo.objects.bulk_create([
+            NotificacionCorreo(
+                tipo='resumen',
+                destinatario=destinatario,
+                datos={
+                    'frecuencia': frecuencia,
+                    'eventos': [
+                        {
+                            'tipo': n.tipo,
+                            'fecha': timezone.localtime(n.creada_en).strftime('%d/%m/%Y %H:%M'),
+                            **n.datos
+                        }
+                        for n in notificaciones
+                    ],
+                },
+                creada_por=usuario
+            )
+            for destinatario, notificaciones in por_destinatario.items()
+        ])
+        for resumen, notificaciones in zip(resumenes, por_destinatario.values()):
+            for notificacion in notificaciones:
+                notificacion.estado = 'resumida'
+                notificacion.resumen = resumen
+        NotificacionCorreo.objects.bulk_update(diferidas, ['estado', 'resumen'])
+    return resumenes
+
+
+def estado_notificacion(notificacion):
+    """Campos que las vistas devuelven para que el cliente consulte el envío"""
+    if notificacion is None:
+        return {'notificacion_id': None, 'notificacion_estado': None}
+    return {'notificacion_id': notificacion.pk, 'notificacion_estado': notificacion.estado}
+
+
+def reservar_notificaciones(tamano_lote):
+    """
+    Marca como 'enviando' hasta ``tamano_lote`` notificaciones pendientes (o
+    abandonadas por un worker caído) y las retorna. Con SKIP LOCKED varios
+    workers pueden drenar la bandeja a la vez sin tomar las mismas filas.
+    """
+    ahora = timezone.now()
+    vencida = ahora - timedelta(minutes=RESERVA_VENCE_MINUTOS)
+    with transaction.atomic():
+        NotificacionCorreo.objects.filter(
+            estado='enviando', reservada_en__lt=vencida, intentos__gte=MAX_INTENTOS
+        ).update(estado='fallida', error='Envío abandonado por el worker')
+
+        ids = list(
+            NotificacionCorreo.objects.select_for_update(skip_locked=True)
+            .filter(Q(estado='pendiente') | Q(estado='enviando', reservada_en__lt=vencida))
+            .filter(Q(programada_para__isnull=True) | Q(programada_para__lte=ahora))
+            .order_by('creada_en')
+            .values_list('id', flat=True)[:tamano_lote]
+        )
+        NotificacionCorreo.objects.filter(pk__in=ids).update(
+            estado='enviando', reservada_en=ahora, intentos=F('intentos') + 1
+        )
+    return list(NotificacionCorreo.objects.filter(pk__in=ids).order_by('creada_en'))
+
+
+def espera_reintento(intentos, sugerida=None):
+    """
+    Segundos hasta el próximo intento tras ``intentos`` fallidos: 30 s, 60 s,
+    120 s... hasta REINTENTO_MAX_SEGUNDOS, entre la mitad y el total del valor
+    (jitter). Nunca antes de lo que pidió Brevo con Retry-After (``sugerida``).
+    """
+    tope = min(REINTENTO_MAX_SEGUNDOS, REINTENTO_BASE_SEGUNDOS * 2 ** (intentos - 1))
+    espera = random.uniform(tope / 2, tope)
+    return max(espera, sugerida or 0)
+
+
+def _agrupar(lote):
+    """
+    Los avisos de inasistencia viajan juntos en un envío por cada
+    MAX_VERSIONES_POR_ENVIO (versiones de mensaje); el resto, uno por llamada.
+    """
+    inasistencias = [n for n in lote if n.tipo == 'inasistencia']
+    grupos = [
+        inasistencias[inicio:inicio + email.MAX_VERSIONES_POR_ENVIO]
+        for inicio in range(0, len(inasistencias), email.MAX_VERSIONES_POR_ENVIO)
+    ]
+    grupos.extend([n] for n in lote if n.tipo != 'inasistencia')
+    return grupos
+
+
+def _enviar(grupo):
+    """
+    Llama a Brevo; se ejecuta en los hilos del worker, sin tocar la base de
+    datos. Retorna (error, falla_transitoria): error vacío si se envió y la
+    excepción transitoria si conviene reintentar (None si el rechazo es definitivo).
+    """
+    try:
+        if grupo[0].tipo == 'inasistencia':
+            enviado = email.enviar_notificaciones_inasistencia(
+                [(n.destinatario, n.datos['nombre_nino']) for n in grupo]
+            )
+        else:
+            notificacion = grupo[0]
+            enviar = getattr(email, ENVIOS[notificacion.tipo])
+            enviado = enviar(notificacion.destinatario, **notificacion.datos)
+        return ('', None) if enviado else ('Brevo no aceptó el envío', None)
+    except ErrorTransitorio as e:
+        return str(e), e
+    except Exception as e:
+        # Error inesperado: se reintenta con la misma espera, hasta MAX_INTENTOS
+        error = str(e) or e.__class__.__name__
+        return error, ErrorTransitorio(error)
+
+
+def procesar_notificaciones(tamano_lote=50, concurrencia=4):
+    """
+    Envía un lote de la bandeja de salida con ``concurrencia`` llamadas a
+    Brevo en paralelo (los avisos de inasistencia se agrupan) y retorna los
+    totales {'enviadas', 'reintentos', 'fallidas', 'limitadas'}.
+
+    Los destinatarios que agotaron su cupo (cubeta de tokens) se reprograman
+    para cuando tengan un token disponible, sin llamar a Brevo ni gastar un intento.
+    Las fallas transitorias se reprograman con espera exponencial; con el
+    circuito abierto se posponen hasta que se pueda probar de nuevo, también
+    sin gastar el intento. Un rechazo definitivo (4xx) falla de inmediato.
+    """
+    totales = _procesar_lote(tamano_lote, concurrencia)
+    for resultado, cantidad in totales.items():
+        if cantidad:
+            NOTIFICACIONES_PROCESADAS.incrementar(cantidad, resultado=resultado)
+    return totales
+
+
+def _procesar_lote(tamano_lote, concurrencia):
+    lote = reservar_notificaciones(tamano_lote)
+    totales = {'enviadas': 0, 'reintentos': 0, 'fallidas': 0, 'limitadas': 0}
+    if not lote:
+        return totales
+
+    limitador = obtener_limitador()
+    permitidas, limitadas = [], []
+    for notificacion in lote:
+        espera = limitador.tomar(notificacion.destinatario)
+        if espera:
+            notificacion.estado = 'pendiente'
+            notificacion.intentos -= 1
+            notificacion.programada_para = timezone.now() + timedelta(seconds=min(espera, 86400))
+            limitadas.append(notificacion)
+        else:
+            permitidas.append(notificacion)
+    if limitadas:
+        NotificacionCorreo.objects.bulk_update(limitadas, ['estado', 'intentos', 'programada_para'])
+        totales['limitadas'] = len(limitadas)
+    lote = permitidas
+    if not lote:
+        return totales
+
+    grupos = _agrupar(lote)
+    with ThreadPoolExecutor(max_workers=concurrencia) as executor:
+        resultados = list(executor.map(_enviar, grupos))
+
+    ahora = timezone.now()
+    for grupo, (error, transitoria) in zip(grupos, resultados):
+        for notificacion in grupo:
+            notificacion.error = error
+            if not error:
+                notificacion.estado = 'enviada'
+                notificacion.enviada_en = ahora
+                totales['enviadas'] += 1
+            elif isinstance(transitoria, CircuitoAbierto):
+                notificacion.estado = 'pendiente'
+                notificacion.intentos -= 1
+                notificacion.programada_para = ahora + timedelta(seconds=transitoria.reintentar_en)
+                totales['reintentos'] += 1
+            elif transitoria and notificacion.intentos < MAX_INTENTOS:
+                notificacion.estado = 'pendiente'
+                notificacion.programada_para = ahora + timedelta(
+                    seconds=espera_reintento(notificacion.intentos, transitoria.reintentar_en)
+                )
+                totales['reintentos'] += 1
+            else:
+                notificacion.estado = 'fallida'
+                totales['fallidas'] += 1
+
+    NotificacionCorreo.objects.bulk_update(
+        lote, ['estado', 'error', 'enviada_en', 'intentos', 'programada_para']
+    )
+
+    # Lo incluido en un resumen termina junto con él
+    for estado in ('enviada', 'fallida'):
+        resumenes = [n for n in lote if n.tipo == 'resumen' and n.estado == estado]
+        if resumenes:
+            NotificacionCorreo.objects.filter(resumen__in=resumenes).update(
+                estado=estado, enviada_en=ahora if estado == 'enviada' else None
+            )
+
+    # Un aviso que no se pudo entregar deja de contar como enviado (se puede reenviar)
+    fallidas = [n for n in lote if n.estado == 'fallida']
+    RegistroNotificacion.objects.filter(
+        Q(notificacion__in=fallidas) | Q(notificacion__resumen__in=fallidas)
+    ).delete()
+    return totales
@@ -0,0 +1,127 @@
+"""
+Paginación por cursor (keyset) para listados largos.
+
+En lugar de OFFSET, cada página se pide a partir de la clave del último (o
+primer) registro de la anterior, ordenando por (campo, id) descendente; con el
+índice compuesto correspondiente la página N cuesta lo mismo que la primera y
+no hace falta el COUNT(*) de ``Paginator``. Los cursores que viajan en la URL
+son opacos (base64 de 'sentido|valor|id').
+"""
+import base64
+import json
+from datetime import datetime
+
+from django.db import connection
+from django.db.models import Q
+
+
+class CursorInvalido(ValueError):
+    pass
+
+
+def codificar_cursor(sentido, valor, pk):
+    crudo = f"{sentido}|{valor.isoformat()}|{pk}"
+    return base64.urlsafe_b64encode(crudo.encode()).decode().rstrip('=')
+
+
+def decodificar_cursor(cursor):
+    """Convierte el cursor de la URL en (sentido, valor, id); sentido es 'sig' o 'ant'"""
+    try:
+        crudo = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        sentido, valor, pk = crudo.split('|')
+        if sentido not in ('sig', 'ant'):
+            raise ValueError(sentido)
+        return sentido, datetime.fromisoformat(valor), int(pk)
+    except (TypeError, ValueError, UnicodeDecodeError):
+        raise CursorInvalido('Cursor inválido')
+
+
+def contar_aproximado(queryset):
+    """
+    Cantidad estimada de filas: en PostgreSQL la del planificador (EXPLAIN, sin
+    recorrer la tabla); en otros motores un COUNT normal.
+    """
+    if connection.vendor != 'postgresql':
+        return queryset.count()
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class PaginaCursor:
+    """Página de resultados con los cursores para moverse a la anterior y a la siguiente"""
+
+    def __init__(self, object_list, cursor_anterior=None, cursor_siguiente=None, total_aproximado=None):
+        self.object_list = object_list
+        self.cursor_anterior = cursor_anterior
+        self.cursor_siguiente = cursor_siguiente
+        self.total_aproximado = total_aproximado
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_previous(self):
+        return self.cursor_anterior is not None
+
+    def has_next(self):
+        return self.cursor_siguiente is not None
+
+    def has_other_pages(self):
+        return self.has_previous() or self.has_next()
+
+
+class PaginadorCursor:
+    """
+    Pagina ``queryset`` de ``por_pagina`` en ``por_pagina`` registros, del más
+    reciente al más antiguo según (``campo``, id). Con ``contar=True`` cada
+    página trae además ``total_aproximado``.
+    """
+
+    def __init__(self, queryset, campo, por_pagina, contar=False):
+        self.queryset = queryset
+        self.campo = campo
+        self.por_pagina = por_pagina
+        self.contar = contar
+
+    def _clave(self, objeto):
+        return getattr(objeto, self.campo), objeto.pk
+
+    def get_page(self, cursor=None):
+        """Página indicada por ``cursor``; la primera si no hay cursor o es inválido"""
+        try:
+            sentido, valor, pk = decodificar_cursor(cursor) if cursor else ('sig', None, None)
+        except CursorInvalido:
+            sentido, valor, pk = 'sig', None, None
+
+        if sentido == 'sig':
+            filas = self.queryset.order_by(f'-{self.campo}', '-pk')
+            if valor is not None:
+                filas = filas.filter(Q(**{f'{self.campo}__lt': valor}) | Q(**{self.campo: valor, 'pk__lt': pk}))
+        else:
+            filas = self.queryset.order_by(self.campo, 'pk').filter(
+                Q(**{f'{self.campo}__gt': valor}) | Q(**{self.campo: valor, 'pk__gt': pk})
+            )
+        filas = list(filas[:self.por_pagina + 1])
+        hay_mas = len(filas) > self.por_pagina
+        filas = filas[:self.por_pagina]
+
+        if sentido == 'sig':
+            hay_anterior, hay_siguiente = valor is not None, hay_mas
+        else:
+            filas.reverse()
+            hay_anterior, hay_siguiente = hay_mas, True
+
+        cursor_anterior = cursor_siguiente = None
+        if filas and hay_anterior:
+            cursor_anterior = codificar_cursor('ant', *self._clave(filas[0]))
+        if filas and hay_siguiente:
+            cursor_siguiente = codificar_cursor('sig', *self._clave(filas[-1]))
+        total = contar_aproximado(self.queryset) if self.contar else None
+        return PaginaCursor(filas, cursor_anterior, cursor_siguiente, total)
@@ -0,0 +1,88 @@
+from datetime import timedelta
+
+from django.db.models import Q
+
+from .models import HorarioAula, PermisoAusencia
+
+# HorarioAula.dia -> date.weekday()
+DIA_SEMANA = {'LUN': 0, 'MAR': 1, 'MIE': 2, 'JUE': 3, 'VIE': 4, 'SAB': 5}
+
+# Días de clase cuando la sección del niño no tiene horario cargado (lunes a viernes)
+DIAS_HABILES_POR_DEFECTO = frozenset(range(5))
+
+
+def motivo_desde_permiso(permiso):
+    """Texto que queda como motivo de inasistencia cuando la justifica un permiso"""
+    return f"Permiso {permiso.get_tipo_display().lower()} aprobado: {permiso.motivo}"
+
+
+def dias_de_clase(nino_id):
+    """
+    Días de la semana (0 = lunes) en que la sección del niño tiene clase, según
+    sus HorarioAula; lunes a viernes si no tiene sección u horario.
+    """
+    dias = {
+        DIA_SEMANA[dia]
+        for dia in HorarioAula.objects.filter(seccion__asignacionaula__nino_id=nino_id).values_list('dia', flat=True)
+    }
+    return frozenset(dias) or DIAS_HABILES_POR_DEFECTO
+
+
+def dias_permiso(permiso):
+    """Días de clase de la sección del niño cubiertos por el permiso"""
+    dias_semana = dias_de_clase(permiso.nino_id)
+    dia = permiso.fecha_inicio
+    fin = permiso.fecha_fin or permiso.fecha_inicio
+    while dia <= fin:
+        if dia.weekday() in dias_semana:
+            yield dia
+        dia += timedelta(days=1)
+
+
+def permisos_aprobados(pares):
+    """
+    Busca los permisos aprobados de día completo que cubren cada (nino_id, fecha)
+    de ``pares`` y retorna {(nino_id, fecha): PermisoAusencia}. Los permisos
+    parciales (con horario) no cuentan: el niño asiste parte del día.
+
+    Una sola consulta por lote, resuelta con el índice parcial
+    (nino, fecha_inicio, fecha_fin) de los permisos aprobados: se busca por
+    niño y rango de fechas en lugar de recorrer todos los permisos.
+    """
+    if not pares:
+        return {}
+
+    fechas = {fecha for _, fecha in pares}
+    desde, hasta = min(fechas), max(fechas)
+    permisos = PermisoAusencia.objects.filter(
+        Q(fecha_fin__gte=desde) | Q(fecha_fin__isnull=True, fecha_inicio__gte=desde),
+        estado='aprobado',
+        hora_inicio__isnull=True,
+        nino_id__in={nino_id for nino_id, _ in pares},
+        fecha_inicio__lte=hasta,
+    ).order_by('fecha_inicio')
+
+    fechas_por_nino = {}
+    for nino_id, fecha in pares:
+        fechas_por_nino.setdefault(nino_id, []).append(fecha)
+
+    cubiertos = {}
+    for permiso in permisos:
+        fin = permiso.fecha_fin or permiso.fecha_inicio
+        for fecha in fechas_por_nino[permiso.nino_id]:
+            if permiso.fecha_inicio <= fecha <= fin:
+                cubiertos.setdefault((permiso.nino_id, fecha), permiso)
+    return cubiertos
+
+
+def justificar_con_permisos(asistencias):
+    """Completa el motivo de las inasistencias sin justificar que cubre un permiso aprobado"""
+    sin_motivo = [a for a in asistencias if not a.presente and not a.motivo_inasistencia]
+    if not sin_motivo:
+        return
+
+    cubiertos = permisos_aprobados({(a.nino_id, a.fecha) for a in sin_motivo})
+    for asistencia in sin_motivo:
+        permiso = cubiertos.get((asistencia.nino_id, asistencia.fecha))
+        if permiso is not None:
+            asistencia.motivo_inasistencia = motivo_desde_permiso(permiso)
@@ -0,0 +1,52 @@
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Asistencia, Nino, PadreNino
+from .utils import invalidar_acceso, olvidar_roles
+
+
+@receiver(post_save, sender=Asistencia)
+@receiver(post_delete, sender=Asistencia)
+def refrescar_resumen_asistencia(sender, instance, **kwargs):
+    """Mantiene resumen por sección e historial mensual cuando una asistencia se guarda o borra fuera de core.asistencia"""
+    from .asistencia import actualizar_resumen_secciones
+    from .historial import actualizar_historial_mensual
+    actualizar_resumen_secciones({instance.nino_id}, {instance.fecha})
+    actualizar_historial_mensual({instance.nino_id}, {instance.fecha})
+
+
+def _invalidar_al_confirmar(user_ids):
+    """La caché se invalida al confirmar la transacción, para no recachear datos aún sin confirmar"""
+    user_ids = set(user_ids)
+    if user_ids:
+        transaction.on_commit(lambda: [invalidar_acceso(user_id) for user_id in user_ids])
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+def invalidar_roles_por_grupos(sender, instance, action, reverse, pk_set, **kwargs):
+    """Cambio de grupos de un usuario (user.groups.add) o de los usuarios de un grupo (group.user_set.add)"""
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if not reverse:
+        olvidar_roles(instance)
+        _invalidar_al_confirmar([instance.pk])
+    elif action == 'pre_clear':
+        _invalidar_al_confirmar(instance.user_set.values_list('pk', flat=True))
+    else:
+        _invalidar_al_confirmar(pk_set)
+
+
+@receiver(post_save, sender=PadreNino)
+@receiver(post_delete, sender=PadreNino)
+def invalidar_ninos_de_padre(sender, instance, **kwargs):
+    _invalidar_al_confirmar([instance.padre_id])
+
+
+@receiver(post_save, sender=Nino)
+def invalidar_padres_de_nino(sender, instance, created, update_fields=None, **kwargs):
+    """Activar o desactivar un niño cambia los niños permitidos de sus padres"""
+    if created or (update_fields is not None and 'activo' not in update_fields):
+        return
+    _invalidar_al_confirmar(PadreNino.objects.filter(nino=instance).values_list('padre_id', flat=True))
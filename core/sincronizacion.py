@@ -0,0 +1,237 @@
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .asistencia import guardar_asistencias, leer_presente
+from .models import Asistencia, OperacionSincronizada
+
+
+# Máximo de registros devueltos en un delta; el cliente pide el resto con el nuevo cursor
+MAX_CAMBIOS_DELTA = 1000
+
+
+class CursorInvalido(ValueError):
+    pass
+
+
+def codificar_cursor(actualizado_en, pk):
+    return f"{actualizado_en.isoformat()}|{pk}"
+
+
+def decodificar_cursor(cursor):
+    """Convierte 'fecha_iso|id' en (datetime, id)"""
+    try:
+        marca, pk = cursor.rsplit('|', 1)
+        actualizado_en = datetime.fromisoformat(marca)
+        return actualizado_en, int(pk)
+    except (AttributeError, ValueError):
+        raise CursorInvalido('Cursor inválido')
+
+
+def _leer_operacion(operacion):
+    """Valida una operación del cliente; retorna un diccionario normalizado o lanza ValueError"""
+    if not isinstance(operacion, dict):
+        raise ValueError('Operación inválida')
+
+    clave = operacion.get('clave')
+    if not isinstance(clave, str) or not 0 < len(clave) <= 64:
+        raise ValueError('Clave de idempotencia inválida')
+
+    try:
+        nino_id = int(operacion.get('nino_id'))
+    except (TypeError, ValueError):
+        raise ValueError('ID de niño requerido')
+
+    try:
+        fecha = date.fromisoformat(operacion.get('fecha'))
+    except (TypeError, ValueError):
+        raise ValueError('Fecha inválida')
+    hoy = timezone.now().date()
+    if fecha > hoy + timedelta(days=1):
+        raise ValueError('No se puede registrar asistencia futura')
+    # Pasado el TTL la clave de idempotencia ya se borró: un reintento se aplicaría de nuevo
+    if fecha < hoy - timedelta(days=settings.SINCRONIZACION_TTL_DIAS):
+        raise ValueError(f'Solo se sincronizan los últimos {settings.SINCRONIZACION_TTL_DIAS} días')
+
+    marcado_en = parse_datetime(operacion.get('marcado_en') or '')
+    if marcado_en is None:
+        raise ValueError('Marca de tiempo del cliente inválida')
+    if timezone.is_naive(marcado_en):
+        marcado_en = timezone.make_aware(marcado_en, dt_timezone.utc)
+
+    presente = leer_presente(operacion.get('presente'))
+    motivo = (operacion.get('motivo') or '').strip() if not presente else ''
+    return {
+        'clave': clave,
+        'nino_id': nino_id,
+        'fecha': fecha,
+        'marcado_en': marcado_en,
+        'presente': presente,
+        'motivo': motivo,
+    }
+
+
+def procesar_operaciones(operaciones, usuario, ninos):
+    """
+    Aplica una cola de operaciones de asistencia enviada por un cliente que
+    estuvo sin conexión. ``ninos`` es el queryset de niños que el usuario puede marcar.
+
+    - Cada operación trae una clave de idempotencia: si ya fue procesada se
+      responde 'duplicada' sin volver a escribir (reintentos seguros).
+    - Los conflictos se resuelven por la marca de tiempo del cliente: gana la
+      más reciente, ya sea de la cola o la que está guardada ('descartada' si pierde).
+
+    Retorna (resultados, aplicadas) donde ``aplicadas`` son las operaciones
+    escritas, cada una con su niño en la clave 'nino'.
+    Puede lanzar IntegrityError si otra petición procesa las mismas claves a la vez.
+    """
+    resultados = []
+    validas = []
+    claves_vistas = set()
+    for operacion in operaciones:
+        try:
+            datos = _leer_operacion(operacion)
+        except ValueError as e:
+            clave = operacion.get('clave') if isinstance(operacion, dict) else None
+            resultados.append({'clave': clave, 'estado': 'error', 'error': str(e)})
+            continue
+        resultado = {'clave': datos['clave'], 'nino_id': datos['nino_id']}
+        resultados.append(resultado)
+        if datos['clave'] in claves_vistas:
+            resultado['estado'] = 'duplicada'
+            continue
+        claves_vistas.add(datos['clave'])
+        validas.append((datos, resultado))
+
+    procesadas = set(
+        OperacionSincronizada.objects.filter(clave__in=claves_vistas).values_list('clave', flat=True)
+    )
+    permitidos = ninos.in_bulk({datos['nino_id'] for datos, _ in validas})
+
+    pendientes = []
+    for datos, resultado in validas:
+        if datos['clave'] in procesadas:
+            resultado['estado'] = 'duplicada'
+        elif datos['nino_id'] not in permitidos:
+            resultado.update(estado='error', error='Niño no encontrado o sin permiso')
+        else:
+            datos['nino'] = permitidos[datos['nino_id']]
+            pendientes.append((datos, resultado))
+
+    if not pendientes:
+        return resultados, []
+
+    with transaction.atomic():
+        OperacionSincronizada.objects.bulk_create([
+            OperacionSincronizada(clave=datos['clave'], usuario=usuario)
+            for datos, _ in pendientes
+        ])
+
+        guardadas = {
+            (nino_id, fecha): marcado_en
+            for nino_id, fecha, marcado_en in Asistencia.objects.select_for_update().filter(
+                nino_id__in={datos['nino_id'] for datos, _ in pendientes},
+                fecha__in={datos['fecha'] for datos, _ in pendientes}
+            ).values_list('nino_id', 'fecha', 'marcado_en')
+        }
+
+        # Última escritura gana, comparando con la cola y con lo ya guardado
+        ganadoras = {}
+        for datos, resultado in pendientes:
+            clave = (datos['nino_id'], datos['fecha'])
+            actual = ganadoras.get(clave)
+            if actual is None or datos['marcado_en'] >= actual[0]['marcado_en']:
+                if actual is not None:
+                    actual[1]['estado'] = 'descartada'
+                ganadoras[clave] = (datos, resultado)
+            else:
+                resultado['estado'] = 'descartada'
+
+        aplicadas = []
+        for clave, (datos, resultado) in ganadoras.items():
+            marcado_guardado = guardadas.get(clave)
+            if marcado_guardado is not None and datos['marcado_en'] < marcado_guardado:
+                resultado['estado'] = 'descartada'
+            else:
+                resultado['estado'] = 'aplicada'
+                aplicadas.append(datos)
+
+        asistencias = guardar_asistencias([
+            Asistencia(
+                nino=datos['nino'],
+                fecha=datos['fecha'],
+                presente=datos['presente'],
+                motivo_inasistencia=None if datos['presente'] else datos['motivo'],
+                registrado_por=usuario,
+                marcado_en=datos['marcado_en']
+            )
+            for datos in aplicadas
+        ])
+        # El motivo puede venir de un permiso aprobado
+        for datos, asistencia in zip(aplicadas, asistencias):
+            datos['motivo'] = asistencia.motivo_inasistencia or ''
+
+    return resultados, aplicadas
+
+
+def cambios_desde(cursor, ninos, limite=MAX_CAMBIOS_DELTA, ventana=None):
+    """
+    Estado del servidor que cambió después de ``cursor`` para los niños dados.
+    Sin cursor devuelve la asistencia de hoy completa.
+
+    Retorna (cambios, cursor_nuevo, hay_mas) con cada cambio en formato compacto
+    [nino_id, fecha, presente, motivo].
+
+    ``actualizado_en`` se asigna antes del COMMIT, así que una transacción puede
+    confirmar después de otra con marca posterior y quedar detrás de un cursor
+    ya entregado. Por eso, en la última página el cursor no pasa de
+    ahora - ``ventana`` segundos (SINCRONIZACION_VENTANA_SEGUNDOS): la siguiente
+    sincronización vuelve a leer esa ventana. El cliente aplica cada cambio
+    como estado final del niño, así que recibirlo dos veces no tiene efecto.
+    """
+    ventana = settings.SINCRONIZACION_VENTANA_SEGUNDOS if ventana is None else ventana
+    ahora = timezone.now()
+    asistencias = Asistencia.objects.filter(nino__in=ninos.order_by().values('id'))
+    if cursor:
+        actualizado_en, pk = decodificar_cursor(cursor)
+        asistencias = asistencias.filter(
+            Q(actualizado_en__gt=actualizado_en) | Q(actualizado_en=actualizado_en, pk__gt=pk)
+        )
+    else:
+        asistencias = asistencias.filter(fecha=timezone.now().date())
+
+    filas = list(
+        asistencias.order_by('actualizado_en', 'pk').values_list(
+            'pk', 'actualizado_en', 'nino_id', 'fecha', 'presente', 'motivo_inasistencia'
+        )[:limite + 1]
+    )
+    hay_mas = len(filas) > limite
+    filas = filas[:limite]
+
+    if filas:
+        clave = (filas[-1][1], filas[-1][0])
+    elif cursor:
+        clave = (actualizado_en, pk)
+    else:
+        clave = (ahora, 0)
+    if not hay_mas:
+        clave = min(clave, (ahora - timedelta(seconds=ventana), 0))
+    cursor = codificar_cursor(*clave)
+
+    cambios = [
+        [nino_id, fecha.isoformat(), presente, motivo or '']
+        for _, _, nino_id, fecha, presente, motivo in filas
+    ]
+    return cambios, cursor, hay_mas
+
+
+def limpiar_operaciones(dias=None):
+    """Borra las claves de idempotencia más antiguas que el TTL; retorna cuántas se borraron"""
+    dias = settings.SINCRONIZACION_TTL_DIAS if dias is None else dias
+    limite = timezone.now() - timedelta(days=dias)
+    borradas, _ = OperacionSincronizada.objects.filter(procesada_en__lt=limite).delete()
+    return borradas
@@ -1,3 +1,426 @@
-from django.test import TestCase
+import threading
+from datetime import date, timedelta
 
-# Create your tests here.
+from django.contrib.auth.models import Group, User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .asistencia import guardar_asistencias
+from .busqueda import buscar_ninos
+from .historial import bit_dia
+from .permisos import dias_permiso
+from .sincronizacion import cambios_desde, procesar_operaciones
+from .models import (
+    Asistencia, AsignacionAula, Aula, HistorialAsistenciaMensual, HorarioAula, Maestro, Nino, PadreNino,
+    NotificacionCorreo, PermisoAusencia, ResponsableAutorizado, ResumenAsistenciaSeccion, Seccion,
+)
+
+
+def crear_nino(nombre='Niño de Prueba', seccion=None, **campos):
+    nino = Nino.objects.create(
+        nombre_completo=nombre,
+        edad=4,
+        nombre_responsable='Responsable',
+        telefono_responsable='70000000',
+        parentesco='Madre',
+        **campos
+    )
+    if seccion is not None:
+        AsignacionAula.objects.create(nino=nino, seccion=seccion)
+    return nino
+
+
+def crear_seccion(nombre='A', maestro=None):
+    aula = Aula.objects.create(nombre=f'Aula {nombre}', capacidad=20)
+    maestro = maestro or Maestro.objects.create(
+        nombre_completo=f'Maestro {nombre}', telefono='70000001', email=f'maestro{nombre.lower()}@example.com'
+    )
+    return Seccion.objects.create(nombre=f'Sección {nombre}', aula=aula, maestro=maestro)
+
+
+class GuardarAsistenciasConcurrenteTests(TransactionTestCase):
+    """Varios hilos escribiendo el mismo (niño, fecha) a la vez con la primitiva de upsert"""
+
+    HILOS = 8
+    ESCRITURAS_POR_HILO = 5
+
+    def setUp(self):
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            self.skipTest('SQLite en memoria bloquea tablas entre hilos; usar PostgreSQL o SQLite en archivo (TEST NAME)')
+
+    def test_upsert_concurrente_mismo_nino_y_fecha(self):
+        seccion = crear_seccion()
+        nino = crear_nino(seccion=seccion)
+        fecha = timezone.now().date()
+        barrera = threading.Barrier(self.HILOS)
+        errores = []
+
+        def marcar(indice):
+            try:
+                barrera.wait()
+                for vuelta in range(self.ESCRITURAS_POR_HILO):
+                    presente = (indice + vuelta) % 2 == 0
+                    guardar_asistencias([Asistencia(
+                        nino_id=nino.pk,
+                        fecha=fecha,
+                        presente=presente,
+                        motivo_inasistencia=None if presente else '',
+                        marcado_en=timezone.now()
+                    )])
+            except Exception as e:  # noqa: BLE001 - se reporta en el hilo principal
+                errores.append(e)
+            finally:
+                connection.close()
+
+        hilos = [threading.Thread(target=marcar, args=(i,)) for i in range(self.HILOS)]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+
+        self.assertEqual(errores, [])
+        asistencia = Asistencia.objects.get(nino=nino, fecha=fecha)
+        self.assertEqual(Asistencia.objects.filter(nino=nino, fecha=fecha).count(), 1)
+
+        # El resumen y el historial reflejan el estado final, no el de una escritura intermedia
+        resumen = ResumenAsistenciaSeccion.objects.get(seccion=seccion, fecha=fecha)
+        self.assertEqual(
+            (resumen.presentes, resumen.ausentes),
+            (1, 0) if asistencia.presente else (0, 1)
+        )
+        historial = HistorialAsistenciaMensual.objects.get(nino=nino, anio=fecha.year, mes=fecha.month)
+        bit = bit_dia(fecha)
+        self.assertTrue(historial.registrados & bit)
+        self.assertEqual(bool(historial.presentes & bit), asistencia.presente)
+
+
+# Caché compartida en memoria (como Redis): las lecturas de la caché no son consultas
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class AccesoNinoConsultasTests(TestCase):
+    """
+    Consultas de cada vista decorada con ``con_acceso_a_nino``, por rol, con la
+    caché de roles ya caliente (segundo request de la sesión). Fijan que el
+    acceso se resuelve sin consultas extra y que el rechazo redirige (no 403).
+    """
+
+    # Sesión + usuario + objeto (con su niño) = 3; el resto es de la vista y su plantilla
+    CONSULTAS = {
+        'detalle_nino': 3,
+        'lista_responsables': 4,
+        'registrar_responsable': 3,
+        'solicitar_permiso_ausencia': 6,
+        'detalle_responsable': 3,
+        'editar_responsable': 3,
+        'eliminar_responsable': 3,
+    }
+    # Rechazo: sesión + usuario + objeto, sin consultas para verificar el acceso
+    CONSULTAS_RECHAZO = 3
+    # El maestro ve al niño pero no gestiona sus responsables (lo rechaza la vista)
+    RECHAZADAS_POR_LA_VISTA = {
+        ('registrar_responsable', 'maestro'),
+        ('editar_responsable', 'maestro'),
+        ('eliminar_responsable', 'maestro'),
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        seccion = crear_seccion()
+        cls.nino = crear_nino('Hijo', seccion=seccion)
+        cls.otro_nino = crear_nino('Ajeno', seccion=seccion)
+        cls.responsable = ResponsableAutorizado.objects.create(
+            nino=cls.nino, nombre_completo='Abuela', identificacion='01234567-8', telefono='70000002',
+            relacion='Abuela', fecha_inicio_autorizacion=date(2026, 1, 1)
+        )
+        cls.responsable_ajeno = ResponsableAutorizado.objects.create(
+            nino=cls.otro_nino, nombre_completo='Tío', identificacion='01234567-9', telefono='70000003',
+            relacion='Tío', fecha_inicio_autorizacion=date(2026, 1, 1)
+        )
+        cls.usuarios = {
+            'admin': User.objects.create_user('admin', password='x', is_staff=True),
+            'maestro': User.objects.create_user('maestro', password='x'),
+            'padre': User.objects.create_user('padre', password='x'),
+        }
+        cls.usuarios['maestro'].groups.add(Group.objects.create(name='Maestro'))
+        cls.usuarios['padre'].groups.add(Group.objects.create(name='Padre/Tutor'))
+        PadreNino.objects.create(padre=cls.usuarios['padre'], nino=cls.nino)
+
+    def setUp(self):
+        cache.clear()
+
+    def _url(self, vista, propio=True):
+        if vista in ('detalle_responsable', 'editar_responsable', 'eliminar_responsable'):
+            responsable = self.responsable if propio else self.responsable_ajeno
+            return reverse(vista, kwargs={'pk': responsable.pk})
+        nino = self.nino if propio else self.otro_nino
+        parametro = 'pk' if vista == 'detalle_nino' else 'nino_pk'
+        return reverse(vista, kwargs={parametro: nino.pk})
+
+    def _get_con_consultas(self, rol, url, consultas):
+        self.client.force_login(self.usuarios[rol])
+        self.client.get(url)  # calienta la caché de roles y niños permitidos
+        with self.assertNumQueries(consultas):
+            return self.client.get(url)
+
+    def test_consultas_por_vista_y_rol(self):
+        for vista, esperadas in self.CONSULTAS.items():
+            for rol in ('padre', 'maestro', 'admin'):
+                with self.subTest(vista=vista, rol=rol):
+                    respuesta = self._get_con_consultas(rol, self._url(vista), esperadas)
+                    esperado = 302 if (vista, rol) in self.RECHAZADAS_POR_LA_VISTA else 200
+                    self.assertEqual(respuesta.status_code, esperado)
+
+    def test_padre_sin_acceso_redirige_a_lista(self):
+        for vista in self.CONSULTAS:
+            with self.subTest(vista=vista):
+                respuesta = self._get_con_consultas('padre', self._url(vista, propio=False), self.CONSULTAS_RECHAZO)
+                self.assertRedirects(respuesta, reverse('lista_ninos'), fetch_redirect_response=False)
+
+    def test_nino_inexistente_responde_404(self):
+        self.client.force_login(self.usuarios['padre'])
+        for vista, parametro in (('detalle_nino', 'pk'), ('lista_responsables', 'nino_pk'), ('detalle_responsable', 'pk')):
+            with self.subTest(vista=vista):
+                self.assertEqual(self.client.get(reverse(vista, kwargs={parametro: 999999})).status_code, 404)
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.db.DatabaseCache', 'LOCATION': 'core_cache'}})
+class AccesoNinoConsultasCacheBaseDeDatosTests(AccesoNinoConsultasTests):
+    """
+    Producción sin Redis: con DatabaseCache el acceso no se cachea entre requests.
+    Cada request consulta los grupos y, el padre, sus niños (como sin caché);
+    ninguna consulta a core_cache.
+    """
+
+    CONSULTAS_SIN_CACHE = {'admin': 1, 'maestro': 1, 'padre': 2}
+
+    def setUp(self):
+        pass
+
+    def _get_con_consultas(self, rol, url, consultas):
+        with CaptureQueriesContext(connection) as capturadas:
+            respuesta = super()._get_con_consultas(rol, url, consultas + self.CONSULTAS_SIN_CACHE[rol])
+        self.assertEqual([q['sql'] for q in capturadas if 'core_cache' in q['sql']], [])
+        return respuesta
+
+
+class BuscarNinosTests(TestCase):
+    """Búsqueda sin acentos ni mayúsculas, por subcadena (FTS5 trigram en SQLite)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.jose = crear_nino('José Pérez Muñoz')
+        cls.pena = crear_nino('Ángela Peña Ortúzar')
+        crear_nino('María González')
+
+    def _nombres(self, termino):
+        return [n.nombre_completo for n in buscar_ninos(Nino.objects.all(), termino)]
+
+    def test_ignora_acentos_y_mayusculas(self):
+        self.assertEqual(self._nombres('Jose'), ['José Pérez Muñoz'])
+        self.assertEqual(self._nombres('PENA'), ['Ángela Peña Ortúzar'])
+        self.assertEqual(self._nombres('Peña'), ['Ángela Peña Ortúzar'])
+
+    def test_subcadena_y_palabras_en_cualquier_orden(self):
+        self.assertEqual(self._nombres('munoz'), ['José Pérez Muñoz'])
+        self.assertEqual(self._nombres('tuza'), ['Ángela Peña Ortúzar'])
+        self.assertEqual(self._nombres('munoz jose'), ['José Pérez Muñoz'])
+        self.assertEqual(self._nombres('jose gonzalez'), [])
+
+    def test_palabras_cortas_usan_like(self):
+        self.assertEqual(self._nombres('jo'), ['José Pérez Muñoz'])
+        self.assertEqual(self._nombres('jo mu'), ['José Pérez Muñoz'])
+        self.assertEqual(self._nombres('   '), [])
+
+    def test_renombrar_y_borrar_actualizan_el_indice(self):
+        self.jose.nombre_completo = 'Joaquín Núñez'
+        self.jose.save(update_fields=['nombre_completo'])
+        self.assertEqual(self._nombres('jose'), [])
+        self.assertEqual(self._nombres('nunez'), ['Joaquín Núñez'])
+
+        self.pena.delete()
+        self.assertEqual(self._nombres('ortuzar'), [])
+
+
+class PresenteEstrictoTests(TestCase):
+    """'presente' solo acepta booleanos JSON: "false" o 0 no deben marcar presente"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.nino = crear_nino(seccion=crear_seccion())
+        cls.admin = User.objects.create_user('admin', password='x', is_staff=True)
+
+    def test_sincronizacion_rechaza_valores_no_booleanos_por_operacion(self):
+        operaciones = [
+            {
+                'clave': f'op-{indice}',
+                'nino_id': self.nino.pk,
+                'fecha': timezone.now().date().isoformat(),
+                'marcado_en': timezone.now().isoformat(),
+                'presente': valor,
+            }
+            for indice, valor in enumerate(('false', '0', 0, 1, 'true'))
+        ]
+        resultados, aplicadas = procesar_operaciones(operaciones, self.admin, Nino.objects.all())
+        self.assertEqual([r['estado'] for r in resultados], ['error'] * 5)
+        self.assertEqual(aplicadas, [])
+        self.assertFalse(Asistencia.objects.filter(nino=self.nino).exists())
+
+    def test_ajax_responde_400_con_texto(self):
+        self.client.force_login(self.admin)
+        respuesta = self.client.post(
+            reverse('actualizar_asistencia_ajax'),
+            {'nino_id': self.nino.pk, 'presente': 'false'},
+            content_type='application/json'
+        )
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertFalse(Asistencia.objects.filter(nino=self.nino).exists())
+
+
+class DiasPermisoTests(TestCase):
+    """Los días de un permiso siguen el horario de la sección del niño"""
+
+    # Viernes 16 a lunes 19 de octubre de 2026
+    INICIO, FIN = date(2026, 10, 16), date(2026, 10, 19)
+
+    def _dias(self, nino):
+        return list(dias_permiso(PermisoAusencia(nino=nino, fecha_inicio=self.INICIO, fecha_fin=self.FIN)))
+
+    def test_seccion_con_clases_el_sabado(self):
+        seccion = crear_seccion()
+        for dia in ('LUN', 'VIE', 'SAB'):
+            HorarioAula.objects.create(seccion=seccion, dia=dia, hora_inicio='08:00', hora_fin='12:00')
+        nino = crear_nino(seccion=seccion)
+        self.assertEqual(self._dias(nino), [date(2026, 10, 16), date(2026, 10, 17), date(2026, 10, 19)])
+
+    def test_sin_horario_lunes_a_viernes(self):
+        self.assertEqual(self._dias(crear_nino(seccion=crear_seccion())), [date(2026, 10, 16), date(2026, 10, 19)])
+        self.assertEqual(self._dias(crear_nino('Sin sección')), [date(2026, 10, 16), date(2026, 10, 19)])
+
+
+class JustificarConPermisosTests(TestCase):
+    """Solo un permiso aprobado de día completo justifica una inasistencia del día"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.nino = crear_nino(seccion=crear_seccion())
+        cls.fecha = date(2026, 10, 16)
+
+    def _permiso(self, **campos):
+        return PermisoAusencia.objects.create(
+            nino=self.nino, tipo='medico', fecha_inicio=self.fecha, motivo='Control', estado='aprobado', **campos
+        )
+
+    def _ausencia(self):
+        guardar_asistencias([Asistencia(nino_id=self.nino.pk, fecha=self.fecha, presente=False, motivo_inasistencia='')])
+        return Asistencia.objects.get(nino=self.nino, fecha=self.fecha).motivo_inasistencia
+
+    def test_permiso_parcial_no_justifica_el_dia(self):
+        self._permiso(hora_inicio='13:00', hora_fin='15:00')
+        self.assertEqual(self._ausencia(), '')
+
+    def test_permiso_de_dia_completo_justifica(self):
+        self._permiso()
+        self.assertEqual(self._ausencia(), 'Permiso médico aprobado: Control')
+
+
+class AsistenciaSeccionAjenaTests(TestCase):
+    """El maestro solo registra y notifica a los niños de sus secciones"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = User.objects.create_user('maestro', password='x')
+        cls.usuario.groups.add(Group.objects.create(name='Maestro'))
+        maestro = Maestro.objects.create(
+            nombre_completo='Maestro A', telefono='70000001', email='maestroa@example.com', usuario=cls.usuario
+        )
+        cls.propio = crear_nino('Propio', seccion=crear_seccion('A', maestro=maestro))
+        cls.ajeno = crear_nino('Ajeno', seccion=crear_seccion('B'), email_responsable='padre@example.com')
+
+    def setUp(self):
+        self.client.force_login(self.usuario)
+
+    def test_registrar_asistencia_de_otra_seccion_responde_404(self):
+        datos = {'presente': '', 'motivo_inasistencia': ''}
+        respuesta = self.client.post(reverse('registrar_asistencia', args=[self.ajeno.pk]), datos)
+        self.assertEqual(respuesta.status_code, 404)
+        self.assertFalse(Asistencia.objects.filter(nino=self.ajeno).exists())
+
+        respuesta = self.client.post(reverse('registrar_asistencia', args=[self.propio.pk]), datos)
+        self.assertRedirects(respuesta, reverse('detalle_nino', args=[self.propio.pk]), fetch_redirect_response=False)
+        self.assertTrue(Asistencia.objects.filter(nino=self.propio, presente=False).exists())
+
+    def test_notificacion_manual_de_otra_seccion_responde_404(self):
+        Asistencia.objects.create(nino=self.ajeno, fecha=timezone.now().date(), presente=False, motivo_inasistencia='')
+        respuesta = self.client.post(reverse('enviar_notificacion_manual', args=[self.ajeno.pk]))
+        self.assertEqual(respuesta.status_code, 404)
+        self.assertFalse(NotificacionCorreo.objects.exists())
+
+
+class SincronizacionTests(TestCase):
+    """Cola sin conexión: claves de idempotencia, última escritura gana y ventana del cursor"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.nino = crear_nino(seccion=crear_seccion())
+        cls.admin = User.objects.create_user('admin', password='x', is_staff=True)
+
+    def setUp(self):
+        self.hoy = timezone.now().date()
+        self.ahora = timezone.now()
+
+    def _operacion(self, clave, presente, hace_segundos=0, fecha=None):
+        return {
+            'clave': clave,
+            'nino_id': self.nino.pk,
+            'fecha': (fecha or self.hoy).isoformat(),
+            'marcado_en': (self.ahora - timedelta(seconds=hace_segundos)).isoformat(),
+            'presente': presente,
+        }
+
+    def _procesar(self, *operaciones):
+        resultados, _ = procesar_operaciones(list(operaciones), self.admin, Nino.objects.all())
+        return [r['estado'] for r in resultados]
+
+    def _presente(self, fecha=None):
+        return Asistencia.objects.get(nino=self.nino, fecha=fecha or self.hoy).presente
+
+    def test_clave_repetida_no_vuelve_a_escribir(self):
+        self.assertEqual(self._procesar(self._operacion('a', False), self._operacion('a', True)), ['aplicada', 'duplicada'])
+        self.assertFalse(self._presente())
+        # Reintento de la misma clave en otra sincronización
+        self.assertEqual(self._procesar(self._operacion('a', True, hace_segundos=-10)), ['duplicada'])
+        self.assertFalse(self._presente())
+
+    def test_gana_la_marca_mas_reciente(self):
+        # En la misma cola, sin importar el orden
+        self.assertEqual(
+            self._procesar(self._operacion('a', False, hace_segundos=5), self._operacion('b', True, hace_segundos=10)),
+            ['aplicada', 'descartada']
+        )
+        self.assertFalse(self._presente())
+        # Contra lo ya guardado
+        self.assertEqual(self._procesar(self._operacion('c', True, hace_segundos=20)), ['descartada'])
+        self.assertFalse(self._presente())
+        self.assertEqual(self._procesar(self._operacion('d', True)), ['aplicada'])
+        self.assertTrue(self._presente())
+
+    def test_rechaza_fechas_fuera_de_la_ventana(self):
+        antigua = self.hoy - timedelta(days=400)
+        Asistencia.objects.create(nino=self.nino, fecha=antigua, presente=True)
+        self.assertEqual(self._procesar(self._operacion('a', False, fecha=antigua)), ['error'])
+        self.assertTrue(self._presente(antigua))
+        self.assertEqual(self._procesar(self._operacion('b', False, fecha=self.hoy - timedelta(days=7))), ['aplicada'])
+
+    def test_cursor_vuelve_a_leer_la_ventana(self):
+        self._procesar(self._operacion('a', False))
+        cambios, cursor, hay_mas = cambios_desde(None, Nino.objects.all(), ventana=60)
+        self.assertEqual((len(cambios), hay_mas), (1, False))
+        # Un cambio de los últimos 60 s se entrega otra vez (por si otro confirmó detrás de él)
+        cambios, cursor, _ = cambios_desde(cursor, Nino.objects.all(), ventana=60)
+        self.assertEqual([c[0] for c in cambios], [self.nino.pk])
+        # Sin ventana el cursor avanza hasta la última fila
+        _, cursor, _ = cambios_desde(None, Nino.objects.all(), ventana=0)
+        self.assertEqual(cambios_desde(cursor, Nino.objects.all(), ventana=0)[0], [])
@@ -51,6 +51,10 @@ path('asistencia/reporte/', views.reporte_asistencia_diario, name='reporte_asist
 
 path('ninos/<int:nino_pk>/enviar-notificacion/', views.enviar_notificacion_manual, name='enviar_notificacion_manual'),
 path('asistencia/actualizar-ajax/', views.actualizar_asistencia_ajax, name='actualizar_asistencia_ajax'),
+path('asistencia/sincronizar/', views.sincronizar_asistencia, name='sincronizar_asistencia'),
+path('asistencia/en-vivo/', views.asistencia_en_vivo, name='asistencia_en_vivo'),
+path('notificaciones/<int:pk>/estado/', views.estado_notificacion_correo, name='estado_notificacion_correo'),
+path('metricas/', views.metricas, name='metricas'),
 
 # PBI 05: Permisos de Ausencia
 path('ninos/<int:nino_pk>/solicitar-permiso/', views.solicitar_permiso_ausencia, name='solicitar_permiso_ausencia'),
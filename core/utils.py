@@ -1,6 +1,94 @@
+from functools import wraps
 
-
+from django.conf import settings
+from django.contrib import messages
 from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.shortcuts import get_object_or_404, redirect
+
+# Grupo de Django -> rol
+GRUPOS_ROL = {'Maestro': 'maestro', 'Padre/Tutor': 'padre'}
+
+# Caché entre requests (framework de caché de Django) de los roles por grupo y
+# de los niños permitidos de cada usuario. Las claves llevan la versión del
+# usuario: invalidar_acceso() la incrementa (señales en core.signals) y las
+# entradas viejas dejan de leerse y expiran solas. La versión y ambos datos se
+# leen una sola vez por request (get_many) y quedan guardados en el objeto ``user``.
+
+# Con estos backends la caché vive en la base de datos (o no existe): leerla
+# cuesta tantas consultas como las que ahorra, así que no se cachea entre requests
+BACKENDS_SIN_CACHE_ACCESO = {
+    'django.core.cache.backends.db.DatabaseCache',
+    'django.core.cache.backends.dummy.DummyCache',
+}
+
+def _cache_entre_requests():
+    return settings.CACHES['default']['BACKEND'] not in BACKENDS_SIN_CACHE_ACCESO
+
+def _clave_acceso(user, dato):
+    version = getattr(user, '_acceso_version', None)
+    if version is None:
+        version = cache.get_or_set(f'acceso:version:{user.pk}', 1, None)
+        user._acceso_version = version
+    return f'acceso:{user.pk}:{version}:{dato}'
+
+def _dato_acceso(user, dato, calcular):
+    """
+    Dato de acceso ('roles' o 'ninos') del usuario: de la caché compartida si
+    está, si no ``calcular()`` (y se guarda). La primera lectura del request
+    trae los dos datos juntos.
+    """
+    if not _cache_entre_requests():
+        return calcular()
+    leidos = getattr(user, '_acceso_cacheado', None)
+    if leidos is None:
+        claves = {nombre: _clave_acceso(user, nombre) for nombre in ('roles', 'ninos')}
+        encontrados = cache.get_many(claves.values())
+        leidos = {nombre: encontrados[clave] for nombre, clave in claves.items() if clave in encontrados}
+        user._acceso_cacheado = leidos
+    if dato not in leidos:
+        leidos[dato] = calcular()
+        cache.set(_clave_acceso(user, dato), leidos[dato], settings.ACCESO_CACHE_SEGUNDOS)
+    return leidos[dato]
+
+def invalidar_acceso(user_id):
+    """Descarta los roles y niños permitidos cacheados del usuario (en todos los procesos)"""
+    if not _cache_entre_requests():
+        return
+    try:
+        cache.incr(f'acceso:version:{user_id}')
+    except ValueError:
+        cache.set(f'acceso:version:{user_id}', 2, None)
+
+def roles_de(user):
+    """
+    Conjunto de roles del usuario ('admin', 'maestro', 'padre'). Los roles por
+    grupo salen de la caché (una consulta solo la primera vez o tras
+    invalidar_acceso) y el resultado queda guardado en el objeto ``user``, así
+    que las demás verificaciones del mismo request no vuelven a buscarlo
+    (RolesMiddleware lo resuelve al inicio de cada request).
+    """
+    roles = getattr(user, '_roles', None)
+    if roles is None:
+        roles = set()
+        if user.is_authenticated:
+            if user.is_superuser or user.is_staff:
+                roles.add('admin')
+            roles.update(_dato_acceso(user, 'roles', lambda: [
+                GRUPOS_ROL[nombre]
+                for nombre in user.groups.filter(name__in=GRUPOS_ROL).values_list('name', flat=True)
+            ]))
+        roles = frozenset(roles)
+        user._roles = roles
+    return roles
+
+def olvidar_roles(user):
+    """Descarta los roles y niños guardados en el objeto ``user`` (tras cambiar sus grupos)"""
+    for atributo in ('_roles', '_ninos_permitidos', '_acceso_version', '_acceso_cacheado'):
+        try:
+            delattr(user, atributo)
+        except AttributeError:
+            pass
 
 def es_admin(user):
     """Verifica si el usuario es admin/staff"""
@@ -8,11 +96,11 @@ def es_admin(user):
 
 def es_maestro(user):
     """Verifica si el usuario pertenece al grupo Maestro"""
-    return user.groups.filter(name='Maestro').exists()
+    return 'maestro' in roles_de(user)
 
 def es_padre(user):
     """Verifica si el usuario pertenece al grupo Padre/Tutor"""
-    return user.groups.filter(name='Padre/Tutor').exists()
+    return 'padre' in roles_de(user)
 
 def obtener_rol(user):
     """Retorna el rol del usuario como string"""
@@ -32,6 +120,33 @@ def puede_ver_todos_los_ninos(user):
     """Verifica si el usuario puede ver todos los niños"""
     return es_admin(user) or es_maestro(user)
 
+def ids_ninos_permitidos(user):
+    """
+    IDs de los niños activos que el usuario puede ver, o None si puede ver
+    todos los activos (admin y maestro). El conjunto de un padre se cachea
+    entre requests y se invalida al cambiar sus PadreNino o el estado de sus niños.
+    """
+    from core.models import PadreNino
+
+    if es_admin(user) or es_maestro(user):
+        return None
+    if not es_padre(user):
+        return frozenset()
+    ids = getattr(user, '_ninos_permitidos', None)
+    if ids is None:
+        ids = frozenset(_dato_acceso(user, 'ninos', lambda: list(
+            PadreNino.objects.filter(padre=user, nino__activo=True).values_list('nino_id', flat=True)
+        )))
+        user._ninos_permitidos = ids
+    return ids
+
+def puede_ver_nino(user, nino):
+    """Verifica si el usuario puede ver al niño (sin consultas cuando la caché está caliente)"""
+    ids = ids_ninos_permitidos(user)
+    if ids is None:
+        return nino.activo
+    return nino.pk in ids
+
 def obtener_ninos_permitidos(user):
     """
     Retorna los niños que el usuario puede ver según su rol:
@@ -39,15 +154,37 @@ def obtener_ninos_permitidos(user):
     - Maestro: todos
     - Padre: solo sus hijos
     """
-    from core.models import Nino, PadreNino
+    from core.models import Nino
     
-    if es_admin(user) or es_maestro(user):
+    ids = ids_ninos_permitidos(user)
+    if ids is None:
         return Nino.objects.filter(activo=True)
-    elif es_padre(user):
-        # Solo los niños asociados a este padre
-        return Nino.objects.filter(
-            padres__padre=user,
-            activo=True
-        ).distinct()
-    
-    return Nino.objects.none()
\ No newline at end of file
+    # Padre: solo los niños asociados (conjunto cacheado, sin el JOIN con PadreNino)
+    return Nino.objects.filter(pk__in=ids, activo=True)
+
+def con_acceso_a_nino(modelo, parametro='pk', relacion_nino=None,
+                      mensaje='No tienes permiso para ver esta información.', select_related=(), **filtros):
+    """
+    Decorador para vistas de un niño o de algo que pertenece a un niño.
+    Obtiene el objeto de la URL (``parametro``) en una sola consulta, junto con
+    su niño (``relacion_nino``) y las relaciones que use la vista
+    (``select_related``), responde 404 si no existe y redirige con ``mensaje``
+    si el usuario no puede ver a ese niño (se verifica en memoria con
+    puede_ver_nino). La vista recibe el objeto en lugar del pk.
+    """
+    relacionadas = [relacion_nino, *select_related] if relacion_nino else list(select_related)
+
+    def decorador(vista):
+        @wraps(vista)
+        def envoltura(request, *args, **kwargs):
+            objetos = modelo.objects.filter(**filtros)
+            if relacionadas:
+                objetos = objetos.select_related(*relacionadas)
+            objeto = get_object_or_404(objetos, pk=kwargs.pop(parametro))
+            nino = getattr(objeto, relacion_nino) if relacion_nino else objeto
+            if not puede_ver_nino(request.user, nino):
+                messages.error(request, mensaje)
+                return redirect('lista_ninos')
+            return vista(request, objeto, *args, **kwargs)
+        return envoltura
+    return decorador
@@ -2,29 +2,46 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth import logout
 from django.contrib import messages
-from django.core.paginator import Paginator
 from .models import Nino, ResponsableAutorizado, Maestro, Aula, Seccion, HorarioAula, AsignacionAula, Asistencia, PermisoAusencia
 from .forms import NinoForm, ResponsableAutorizadoForm, AsignarAulaForm, AsistenciaForm, PermisoAusenciaForm
 from django.contrib.auth.models import User
 from django.contrib.admin.views.decorators import staff_member_required
 from django.utils import timezone
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Q
 import os
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
 import json
-from django.http import HttpResponseForbidden
+import asyncio
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse, HttpResponseForbidden, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect
 from django.contrib import messages
 from django.utils import timezone
-from .models import Nino, Asistencia
-from .email import enviar_notificacion_inasistencia, enviar_confirmacion_solicitud_permiso, enviar_notificacion_permiso_aprobado
+from .models import Nino, Asistencia, NotificacionCorreo
+from .notificaciones import encolar_notificacion, estado_notificacion, notificar_inasistencias
+from .asistencia import guardar_asistencia, leer_presente, materializar_asistencias, reconciliar_permiso, MAX_CAMBIOS_POR_LOTE
+from .sincronizacion import procesar_operaciones, cambios_desde, CursorInvalido
+from .eventos import obtener_backend, CANAL_ASISTENCIA
+from .paginacion import PaginadorCursor, PaginaCursor
+from .busqueda import buscar_ninos
+from .metricas import exponer, TIPO_CONTENIDO
+from django.conf import settings
+from django.utils.crypto import constant_time_compare
+
+# Segundos entre latidos del tablero en vivo
+LATIDO_EN_VIVO_SEGUNDOS = 15
+
+# Resultados de búsqueda de niños a mostrar (los más parecidos primero)
+MAX_RESULTADOS_BUSQUEDA = 50
 
 # ========== IMPORTAR UTILIDADES DE ROLES ==========
 from core.utils import (
     es_admin, es_maestro, es_padre, 
     obtener_rol, puede_editar_nino, 
-    obtener_ninos_permitidos
+    obtener_ninos_permitidos, con_acceso_a_nino
 )
 
 
@@ -34,52 +51,40 @@ def actualizar_asistencia_ajax(request):
         return JsonResponse({'success': False, 'error': 'Método no permitido'}, status=405)
     if not request.content_type == 'application/json':
         return JsonResponse({'success': False, 'error': 'Tipo de contenido debe ser JSON'}, status=400)
+    if not (es_admin(request.user) or es_maestro(request.user)):
+        return JsonResponse({'success': False, 'error': 'No tienes permiso para registrar asistencia'}, status=403)
 
     try:
         data = json.loads(request.body)
         nino_id = data.get('nino_id')
-        presente = data.get('presente', True)
+        try:
+            presente = leer_presente(data.get('presente'))
+        except ValueError as e:
+            return JsonResponse({'success': False, 'error': str(e)}, status=400)
         motivo = data.get('motivo', '').strip() if not presente else ''
 
         if not nino_id:
             return JsonResponse({'success': False, 'error': 'ID de niño requerido'}, status=400)
 
-        nino = get_object_or_404(Nino, pk=nino_id)
-        print(f"DEBUG: Procesando asistencia para {nino.nombre_completo}")
-        print(f"DEBUG: presente={presente}, motivo='{motivo}'")
-        print(f"DEBUG: email_responsable={nino.email_responsable}")
+        # El maestro solo puede marcar a los niños de sus secciones
+        nino = ninos_asignados_para(request.user).filter(pk=nino_id).first()
+        if nino is None:
+            return JsonResponse({'success': False, 'error': 'Niño no encontrado o sin permiso'}, status=404)
 
         hoy = timezone.now().date()
-        asistencia, created = Asistencia.objects.get_or_create(
-            nino=nino,
-            fecha=hoy,
-            defaults={'registrado_por': request.user}
-        )
+        notificacion = None
+        with transaction.atomic():
+            asistencia = guardar_asistencia(nino, hoy, presente, motivo, request.user)
+            motivo = asistencia.motivo_inasistencia or ''
 
-        asistencia.presente = presente
-        if not presente:
-            asistencia.motivo_inasistencia = motivo
-        asistencia.registrado_por = request.user
-        asistencia.save()
-
-        notificacion_enviada = False
-        if not presente and not motivo:
-            if nino.email_responsable:
-                print("DEBUG: Intentando enviar notificación...")
-                from .email import enviar_notificacion_inasistencia
-                exito = enviar_notificacion_inasistencia(nino.email_responsable, nino.nombre_completo)
-                print(f"DEBUG: Resultado de envío = {exito}")
-                if exito:
-                    notificacion_enviada = True
-            else:
-                print("DEBUG: No hay email, omitiendo notificación.")
-        else:
-            print("DEBUG: Asistencia justificada o presente, no se envía notificación.")
+            # El correo se envía en segundo plano (procesar_notificaciones), una vez por día
+            if not presente and not motivo:
+                notificacion = notificar_inasistencias(hoy, [nino.pk], request.user).get(nino.pk)
 
         return JsonResponse({
             'success': True,
             'motivo': motivo,
-            'notificacion_enviada': notificacion_enviada,
+            **estado_notificacion(notificacion),
             'nombre_nino': nino.nombre_completo
         })
 
@@ -90,6 +95,70 @@ def actualizar_asistencia_ajax(request):
         return JsonResponse({'success': False, 'error': str(e)}, status=400)
 
 
+@login_required
+def sincronizar_asistencia(request):
+    """
+    Sincronización sin conexión: recibe la cola de operaciones del cliente
+    (cada una con clave de idempotencia y marca de tiempo) y devuelve los
+    cambios del servidor desde el cursor indicado.
+    """
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'error': 'Método no permitido'}, status=405)
+    if not request.content_type == 'application/json':
+        return JsonResponse({'success': False, 'error': 'Tipo de contenido debe ser JSON'}, status=400)
+    if not (es_admin(request.user) or es_maestro(request.user)):
+        return JsonResponse({'success': False, 'error': 'No tienes permiso para registrar asistencia'}, status=403)
+
+    try:
+        data = json.loads(request.body)
+    except json.JSONDecodeError:
+        return JsonResponse({'success': False, 'error': 'JSON inválido'}, status=400)
+    if not isinstance(data, dict):
+        return JsonResponse({'success': False, 'error': 'JSON inválido'}, status=400)
+
+    operaciones = data.get('operaciones') or []
+    if not isinstance(operaciones, list):
+        return JsonResponse({'success': False, 'error': 'Lista de operaciones inválida'}, status=400)
+    if len(operaciones) > MAX_CAMBIOS_POR_LOTE:
+        return JsonResponse(
+            {'success': False, 'error': f'Máximo {MAX_CAMBIOS_POR_LOTE} operaciones por sincronización'},
+            status=400
+        )
+
+    ninos = ninos_asignados_para(request.user)
+    hoy = timezone.now().date()
+    try:
+        with transaction.atomic():
+            resultados, aplicadas = procesar_operaciones(operaciones, request.user, ninos)
+
+            # Notificar solo inasistencias injustificadas de hoy que realmente se aplicaron
+            por_clave = {r['clave']: r for r in resultados}
+            notificaciones = notificar_inasistencias(
+                hoy,
+                [d['nino_id'] for d in aplicadas if d['fecha'] == hoy and not d['presente'] and not d['motivo']],
+                request.user
+            )
+            for datos in aplicadas:
+                notificacion = notificaciones.get(datos['nino_id']) if datos['fecha'] == hoy else None
+                por_clave[datos['clave']].update(estado_notificacion(notificacion))
+    except IntegrityError:
+        # Otra petición está aplicando las mismas claves; el cliente reintenta
+        return JsonResponse({'success': False, 'error': 'Sincronización en curso, reintente'}, status=409)
+
+    try:
+        cambios, cursor, hay_mas = cambios_desde(data.get('cursor'), ninos)
+    except CursorInvalido as e:
+        return JsonResponse({'success': False, 'error': str(e), 'resultados': resultados}, status=400)
+
+    return JsonResponse({
+        'success': True,
+        'resultados': resultados,
+        'cambios': cambios,
+        'cursor': cursor,
+        'hay_mas': hay_mas
+    })
+
+
 def cerrar_sesion(request):
     """Vista personalizada para cerrar sesión"""
     logout(request)
@@ -125,21 +194,25 @@ def contacto(request):
 def lista_ninos(request):
     """Vista para listar niños según el rol del usuario"""
     # Obtener niños permitidos según rol
-    ninos_list = obtener_ninos_permitidos(request.user).order_by('-fecha_registro')
+    ninos_list = obtener_ninos_permitidos(request.user)
     
-    # Búsqueda
+    # Búsqueda sin acentos por índice de trigramas, ordenada por parecido
     query = request.GET.get('q')
+    resultados_truncados = False
     if query:
-        ninos_list = ninos_list.filter(nombre_completo__icontains=query)
-    
-    # Paginación
-    paginator = Paginator(ninos_list, 10)
-    page_number = request.GET.get('page')
-    ninos = paginator.get_page(page_number)
+        resultados = list(buscar_ninos(ninos_list, query)[:MAX_RESULTADOS_BUSQUEDA + 1])
+        resultados_truncados = len(resultados) > MAX_RESULTADOS_BUSQUEDA
+        ninos = PaginaCursor(resultados[:MAX_RESULTADOS_BUSQUEDA])
+    else:
+        # Paginación por cursor (más recientes primero, índice nino_activo_registro_idx)
+        paginator = PaginadorCursor(ninos_list, 'fecha_registro', 10, contar=True)
+        ninos = paginator.get_page(request.GET.get('cursor'))
     
     context = {
         'ninos': ninos,
         'query': query,
+        'resultados_truncados': resultados_truncados,
+        'max_resultados_busqueda': MAX_RESULTADOS_BUSQUEDA,
         'puede_registrar': puede_editar_nino(request.user),
         'rol': obtener_rol(request.user)
     }
@@ -147,16 +220,13 @@ def lista_ninos(request):
 
 
 @login_required
-def detalle_nino(request, pk):
+@con_acceso_a_nino(
+    Nino,
+    mensaje='No tienes permiso para ver este niño.',
+    select_related=['asignacion_aula__seccion__aula', 'asignacion_aula__seccion__maestro']
+)
+def detalle_nino(request, nino):
     """Vista para ver el detalle de un niño (con control de acceso)"""
-    nino = get_object_or_404(Nino, pk=pk)
-    
-    # Verificar que el usuario tenga permiso para ver este niño
-    ninos_permitidos = obtener_ninos_permitidos(request.user)
-    if not ninos_permitidos.filter(pk=pk).exists():
-        messages.error(request, 'No tienes permiso para ver este niño.')
-        return redirect('lista_ninos')
-    
     context = {
         'nino': nino,
         'puede_editar': puede_editar_nino(request.user),
@@ -355,6 +425,14 @@ def lista_maestros(request):
     return render(request, 'lista_maestros.html', context)
 
 
+def usuarios_maestro_disponibles(maestro=None):
+    """Usuarios del grupo Maestro que aún no están vinculados a otro maestro"""
+    libres = Q(perfil_maestro__isnull=True)
+    if maestro and maestro.pk:
+        libres |= Q(perfil_maestro=maestro)
+    return User.objects.filter(libres, groups__name='Maestro').order_by('username')
+
+
 @login_required
 def crear_maestro(request):
     """Solo admin puede crear maestros"""
@@ -362,21 +440,27 @@ def crear_maestro(request):
         messages.error(request, 'No tienes permiso para crear maestros.')
         return redirect('lista_maestros')
     
+    usuarios = usuarios_maestro_disponibles()
     if request.method == 'POST':
         nombre = request.POST.get('nombre_completo')
         telefono = request.POST.get('telefono')
         email = request.POST.get('email')
         activo = request.POST.get('activo') == 'on'
-        if nombre:
+        usuario_id = request.POST.get('usuario') or None
+        if usuario_id and not usuarios.filter(pk=usuario_id).exists():
+            messages.error(request, 'El usuario seleccionado no está disponible.')
+        elif nombre:
             Maestro.objects.create(
                 nombre_completo=nombre,
                 telefono=telefono,
                 email=email,
-                activo=activo
+                activo=activo,
+                usuario_id=usuario_id
             )
             messages.success(request, 'Maestro creado exitosamente.')
             return redirect('lista_maestros')
     return render(request, 'form_maestro.html', {
+        'usuarios': usuarios,
         'titulo': 'Crear Maestro'
     })
 
@@ -389,16 +473,23 @@ def editar_maestro(request, pk):
         return redirect('lista_maestros')
     
     maestro = get_object_or_404(Maestro, pk=pk)
+    usuarios = usuarios_maestro_disponibles(maestro)
     if request.method == 'POST':
-        maestro.nombre_completo = request.POST.get('nombre_completo')
-        maestro.telefono = request.POST.get('telefono')
-        maestro.email = request.POST.get('email')
-        maestro.activo = request.POST.get('activo') == 'on'
-        maestro.save()
-        messages.success(request, 'Maestro actualizado.')
-        return redirect('lista_maestros')
+        usuario_id = request.POST.get('usuario') or None
+        if usuario_id and not usuarios.filter(pk=usuario_id).exists():
+            messages.error(request, 'El usuario seleccionado no está disponible.')
+        else:
+            maestro.nombre_completo = request.POST.get('nombre_completo')
+            maestro.telefono = request.POST.get('telefono')
+            maestro.email = request.POST.get('email')
+            maestro.activo = request.POST.get('activo') == 'on'
+            maestro.usuario_id = usuario_id
+            maestro.save()
+            messages.success(request, 'Maestro actualizado.')
+            return redirect('lista_maestros')
     return render(request, 'form_maestro.html', {
         'maestro': maestro,
+        'usuarios': usuarios,
         'titulo': 'Editar Maestro'
     })
 
@@ -545,16 +636,9 @@ def eliminar_seccion(request, pk):
 # ==========================================
 
 @login_required
-def lista_responsables(request, nino_pk):
+@con_acceso_a_nino(Nino, 'nino_pk')
+def lista_responsables(request, nino):
     """Vista para listar responsables (con control de acceso)"""
-    nino = get_object_or_404(Nino, pk=nino_pk)
-    
-    # Verificar acceso
-    ninos_permitidos = obtener_ninos_permitidos(request.user)
-    if not ninos_permitidos.filter(pk=nino_pk).exists():
-        messages.error(request, 'No tienes permiso para ver esta información.')
-        return redirect('lista_ninos')
-    
     responsables = ResponsableAutorizado.objects.filter(nino=nino).order_by('-activo', 'nombre_completo')
     
     context = {
@@ -566,22 +650,14 @@ def lista_responsables(request, nino_pk):
 
 
 @login_required
-def registrar_responsable(request, nino_pk):
+@con_acceso_a_nino(Nino, 'nino_pk', mensaje='No tienes permiso para agregar responsables a este niño.')
+def registrar_responsable(request, nino):
     """Vista para registrar responsable (admin o padre)"""
-    nino = get_object_or_404(Nino, pk=nino_pk)
-    
-    # Verificar permisos
+    # Verificar permisos (el padre solo llega hasta aquí con sus hijos)
     if not (es_admin(request.user) or es_padre(request.user)):
         messages.error(request, 'No tienes permiso para agregar responsables.')
         return redirect('lista_ninos')
     
-    # Verificar que el padre solo pueda agregar a sus hijos
-    if es_padre(request.user):
-        ninos_permitidos = obtener_ninos_permitidos(request.user)
-        if not ninos_permitidos.filter(pk=nino_pk).exists():
-            messages.error(request, 'No tienes permiso para agregar responsables a este niño.')
-            return redirect('lista_ninos')
-    
     if request.method == 'POST':
         form = ResponsableAutorizadoForm(request.POST, request.FILES)
         if form.is_valid():
@@ -608,16 +684,9 @@ def registrar_responsable(request, nino_pk):
 
 
 @login_required
-def detalle_responsable(request, pk):
+@con_acceso_a_nino(ResponsableAutorizado, relacion_nino='nino')
+def detalle_responsable(request, responsable):
     """Vista para ver el detalle de un responsable"""
-    responsable = get_object_or_404(ResponsableAutorizado, pk=pk)
-    
-    # Verificar acceso
-    ninos_permitidos = obtener_ninos_permitidos(request.user)
-    if not ninos_permitidos.filter(pk=responsable.nino.pk).exists():
-        messages.error(request, 'No tienes permiso para ver esta información.')
-        return redirect('lista_ninos')
-    
     context = {
         'responsable': responsable,
         'nino': responsable.nino
@@ -626,20 +695,13 @@ def detalle_responsable(request, pk):
 
 
 @login_required
-def editar_responsable(request, pk):
+@con_acceso_a_nino(ResponsableAutorizado, relacion_nino='nino', mensaje='No tienes permiso para editar este responsable.')
+def editar_responsable(request, responsable):
     """Vista para editar un responsable autorizado"""
-    responsable = get_object_or_404(ResponsableAutorizado, pk=pk)
-    
     # Verificar permisos
     if not (es_admin(request.user) or es_padre(request.user)):
         messages.error(request, 'No tienes permiso para editar responsables.')
-        return redirect('detalle_responsable', pk=pk)
-    
-    # Verificar acceso al niño
-    ninos_permitidos = obtener_ninos_permitidos(request.user)
-    if not ninos_permitidos.filter(pk=responsable.nino.pk).exists():
-        messages.error(request, 'No tienes permiso para editar este responsable.')
-        return redirect('lista_ninos')
+        return redirect('detalle_responsable', pk=responsable.pk)
     
     if request.method == 'POST':
         form = ResponsableAutorizadoForm(request.POST, request.FILES, instance=responsable)
@@ -665,9 +727,9 @@ def editar_responsable(request, pk):
 
 
 @login_required
-def eliminar_responsable(request, pk):
+@con_acceso_a_nino(ResponsableAutorizado, relacion_nino='nino', mensaje='No tienes permiso para eliminar este responsable.')
+def eliminar_responsable(request, responsable):
     """Vista para eliminar un responsable autorizado"""
-    responsable = get_object_or_404(ResponsableAutorizado, pk=pk)
     nino = responsable.nino
     
     # Verificar permisos
@@ -675,12 +737,6 @@ def eliminar_responsable(request, pk):
         messages.error(request, 'No tienes permiso para eliminar responsables.')
         return redirect('lista_responsables', nino_pk=nino.pk)
     
-    # Verificar acceso
-    ninos_permitidos = obtener_ninos_permitidos(request.user)
-    if not ninos_permitidos.filter(pk=nino.pk).exists():
-        messages.error(request, 'No tienes permiso para eliminar este responsable.')
-        return redirect('lista_ninos')
-    
     if request.method == 'POST':
         nombre = responsable.nombre_completo
         responsable.delete()
@@ -705,38 +761,31 @@ def registrar_asistencia(request, nino_pk):
         messages.error(request, 'No tienes permiso para registrar asistencia.')
         return redirect('lista_ninos')
     
-    nino = get_object_or_404(Nino, pk=nino_pk)
+    # El maestro solo registra a los niños de sus secciones
+    nino = get_object_or_404(ninos_asignados_para(request.user), pk=nino_pk)
     hoy = timezone.now().date()
 
-    # Obtener o crear registro de hoy
-    asistencia, created = Asistencia.objects.get_or_create(
-        nino=nino,
-        fecha=hoy,
-        defaults={'registrado_por': request.user}
-    )
+    # Registro de hoy (si aún no existe se crea al guardar)
+    asistencia = Asistencia.objects.filter(nino=nino, fecha=hoy).first() or Asistencia(nino=nino, fecha=hoy)
 
     if request.method == 'POST':
         form = AsistenciaForm(request.POST, instance=asistencia)
         if form.is_valid():
-            asistencia = form.save(commit=False)
-            asistencia.nino = nino
-            asistencia.fecha = hoy
-            asistencia.registrado_por = request.user
-            asistencia.save()
-
-            # Enviar notificación si es inasistencia no justificada
-            if not asistencia.presente and not asistencia.justificado():
-                if nino.email_responsable:
-                    print(">>> Enviando notificación a:", nino.email_responsable)
-                    print(">>> BREVO_API_KEY disponible:", bool(os.getenv("BREVO_API_KEY")))
-                    from .email import enviar_notificacion_inasistencia
-                    exito = enviar_notificacion_inasistencia(nino.email_responsable, nino.nombre_completo)
-                    if exito:
-                        messages.warning(request, f"Notificación enviada al responsable de {nino.nombre_completo}.")
-                    else:
-                        messages.error(request, "No se pudo enviar la notificación. Verifique la configuración.")
-                else:
-                    messages.warning(request, f"{nino.nombre_completo} no tiene email registrado.")
+            with transaction.atomic():
+                asistencia = guardar_asistencia(
+                    nino,
+                    hoy,
+                    form.cleaned_data['presente'],
+                    form.cleaned_data['motivo_inasistencia'],
+                    request.user
+                )
+
+                # Encolar notificación si es inasistencia no justificada (una vez por día)
+                if not asistencia.presente and not asistencia.justificado():
+                    if not nino.email_responsable:
+                        messages.warning(request, f"{nino.nombre_completo} no tiene email registrado.")
+                    elif notificar_inasistencias(hoy, [nino.pk], request.user):
+                        messages.warning(request, f"Se enviará una notificación al responsable de {nino.nombre_completo}.")
 
             return redirect('detalle_nino', pk=nino.pk)
     else:
@@ -755,7 +804,7 @@ def enviar_notificacion_manual(request, nino_pk):
     if request.method != 'POST':
         return HttpResponseForbidden()
     
-    nino = get_object_or_404(Nino, pk=nino_pk)
+    nino = get_object_or_404(ninos_asignados_para(request.user), pk=nino_pk)
     
     # Verificar que hoy el niño esté ausente y sin justificar
     hoy = timezone.now().date()
@@ -769,16 +818,98 @@ def enviar_notificacion_manual(request, nino_pk):
         messages.warning(request, f"{nino.nombre_completo} no tiene email registrado.")
         return redirect('detalle_nino', pk=nino.pk)
     
-    # Enviar notificación
-    exito = enviar_notificacion_inasistencia(nino.email_responsable, nino.nombre_completo)
-    if exito:
-        messages.success(request, f"✅ Notificación enviada al responsable de {nino.nombre_completo}.")
+    # Encolar notificación (la envía el worker procesar_notificaciones); una por día
+    with transaction.atomic():
+        Asistencia.objects.select_for_update().filter(pk=asistencia.pk).update(notificado_en=timezone.now())
+        notificacion = encolar_notificacion(
+            'inasistencia', nino.email_responsable, request.user,
+            nino=nino, fecha=hoy,
+            nombre_nino=nino.nombre_completo
+        )
+    if notificacion is None:
+        messages.info(request, f"El responsable de {nino.nombre_completo} ya fue notificado hoy.")
     else:
-        messages.error(request, "❌ No se pudo enviar la notificación. Verifique la configuración de Brevo.")
+        messages.success(request, f"✅ Notificación en cola para el responsable de {nino.nombre_completo}.")
     
     return redirect('detalle_nino', pk=nino.pk)
 
 
+@login_required
+def estado_notificacion_correo(request, pk):
+    """Estado de envío de una notificación encolada (consultado por el cliente)"""
+    notificaciones = NotificacionCorreo.objects.all()
+    if not es_admin(request.user):
+        notificaciones = notificaciones.filter(creada_por=request.user)
+    notificacion = get_object_or_404(notificaciones, pk=pk)
+    return JsonResponse({
+        'success': True,
+        'estado': notificacion.estado,
+        'intentos': notificacion.intentos,
+        'error': notificacion.error,
+    })
+
+
+def metricas(request):
+    """
+    Métricas del proceso en formato de texto de Prometheus. Acceso con
+    ``Authorization: Bearer <METRICAS_TOKEN>`` (para el scraper) o como admin.
+    """
+    token = settings.METRICAS_TOKEN
+    autorizacion = request.headers.get('Authorization', '')
+    if not (token and constant_time_compare(autorizacion, f'Bearer {token}')):
+        if not (request.user.is_authenticated and es_admin(request.user)):
+            return HttpResponseForbidden()
+    return HttpResponse(exponer(), content_type=TIPO_CONTENIDO)
+
+
+def ninos_asignados_para(user):
+    """Niños activos con aula: admin ve todos, el maestro solo los de sus secciones"""
+    ninos = Nino.objects.filter(activo=True, asignacion_aula__isnull=False)
+    if not es_admin(user):
+        ninos = ninos.filter(asignacion_aula__seccion__maestro__usuario=user)
+    return ninos
+
+
+@login_required
+async def asistencia_en_vivo(request):
+    """
+    Tablero en vivo (Server-Sent Events): envía cada cambio de asistencia como
+    [nino_id, fecha, presente, motivo]. Solo funciona sobre ASGI (sigs.asgi con
+    uvicorn), donde cada conexión inactiva no ocupa un hilo.
+    """
+    if not hasattr(request, 'scope'):
+        # Bajo WSGI la conexión bloquearía un worker completo; 204 detiene al EventSource
+        return HttpResponse(status=204)
+
+    user = await request.auser()
+    if not (es_admin(user) or await sync_to_async(es_maestro)(user)):
+        return HttpResponseForbidden()
+
+    permitidos = None
+    if not es_admin(user):
+        permitidos = await sync_to_async(
+            lambda: set(ninos_asignados_para(user).values_list('id', flat=True))
+        )()
+
+    async def eventos():
+        yield 'retry: 5000\n\n'
+        async with obtener_backend().suscribir(CANAL_ASISTENCIA) as cola:
+            while True:
+                try:
+                    mensaje = await asyncio.wait_for(cola.get(), timeout=LATIDO_EN_VIVO_SEGUNDOS)
+                except asyncio.TimeoutError:
+                    # Comentario SSE para mantener viva la conexión a través de proxies
+                    yield ': latido\n\n'
+                    continue
+                if permitidos is None or mensaje[0] in permitidos:
+                    yield f'data: {json.dumps(mensaje)}\n\n'
+
+    response = StreamingHttpResponse(eventos(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
 @login_required
 def reporte_asistencia_diario(request):
     """Reporte de asistencia diario - Admin y Maestros"""
@@ -788,18 +919,9 @@ def reporte_asistencia_diario(request):
     
     hoy = timezone.now().date()
     
-    # Admin ve todos los niños asignados
-    if es_admin(request.user):
-        ninos_asignados = Nino.objects.filter(
-            activo=True,
-            asignacion_aula__isnull=False
-        ).select_related('asignacion_aula__seccion__aula', 'asignacion_aula__seccion__maestro')
-    else:
-        # Maestros ven todos los niños (ya que pueden dar clases a múltiples secciones)
-        ninos_asignados = Nino.objects.filter(
-            activo=True,
-            asignacion_aula__isnull=False
-        ).select_related('asignacion_aula__seccion__aula', 'asignacion_aula__seccion__maestro')
+    ninos_asignados = ninos_asignados_para(request.user).select_related(
+        'asignacion_aula__seccion__aula', 'asignacion_aula__seccion__maestro'
+    )
 
     # Asegurar orden para regroup
     ninos_asignados = ninos_asignados.order_by(
@@ -807,23 +929,16 @@ def reporte_asistencia_diario(request):
         'asignacion_aula__seccion__nombre'
     )
 
-    asistencias_hoy = {}
-    for nino in ninos_asignados:
-        asistencia, created = Asistencia.objects.get_or_create(
-            nino=nino,
-            fecha=hoy,
-            defaults={'registrado_por': request.user}
-        )
-        asistencias_hoy[nino.id] = asistencia
+    # Crear en bloque los registros faltantes y cargar los del día (consultas fijas)
+    asistencias_hoy = materializar_asistencias(ninos_asignados, hoy, request.user)
 
     # Agregar asistencias_json al contexto
     asistencias_dict = {
-        nino.id: {
+        nino_id: {
             'presente': asistencia.presente,
             'motivo_inasistencia': asistencia.motivo_inasistencia or ''
         }
-        for nino in ninos_asignados
-        for asistencia in [asistencias_hoy[nino.id]]
+        for nino_id, asistencia in asistencias_hoy.items()
     }
 
     context = {
@@ -831,6 +946,7 @@ def reporte_asistencia_diario(request):
         'asistencias_hoy': asistencias_hoy,
         'asistencias_json': json.dumps(asistencias_dict),
         'hoy': hoy,
+        'max_cambios_por_lote': MAX_CAMBIOS_POR_LOTE,
     }
     return render(request, 'reporte_diario.html', context)
 
@@ -838,33 +954,27 @@ def reporte_asistencia_diario(request):
 # ========== PBI 05: PERMISOS DE AUSENCIA ==========
 
 @login_required
-def solicitar_permiso_ausencia(request, nino_pk):
+@con_acceso_a_nino(Nino, 'nino_pk', mensaje='No tienes permiso para solicitar permisos para este niño.', activo=True)
+def solicitar_permiso_ausencia(request, nino):
     """Vista para que padres/tutores soliciten permisos de ausencia"""
-    nino = get_object_or_404(Nino, pk=nino_pk, activo=True)
-    
-    # Verificar que el padre tenga permiso para este niño
-    if es_padre(request.user):
-        ninos_permitidos = obtener_ninos_permitidos(request.user)
-        if not ninos_permitidos.filter(pk=nino_pk).exists():
-            messages.error(request, 'No tienes permiso para solicitar permisos para este niño.')
-            return redirect('lista_ninos')
-    
     if request.method == 'POST':
         form = PermisoAusenciaForm(request.POST, request.FILES)
         if form.is_valid():
             permiso = form.save(commit=False)
             permiso.nino = nino
             permiso.solicitante = request.user
-            permiso.save()
-            
-            # Enviar confirmación al responsable
-            if nino.email_responsable:
-                enviar_confirmacion_solicitud_permiso(
-                    nino.email_responsable,
-                    nino.nombre_completo,
-                    permiso.fecha_inicio.strftime('%d/%m/%Y'),
-                    permiso.get_tipo_display()
-                )
+            with transaction.atomic():
+                permiso.save()
+                
+                # Confirmación al responsable (se envía en segundo plano)
+                if nino.email_responsable:
+                    encolar_notificacion(
+                        'solicitud_permiso', nino.email_responsable, request.user,
+                        nino=nino, fecha=permiso.fecha_inicio, permiso=permiso,
+                        nombre_nino=nino.nombre_completo,
+                        fecha_inicio=permiso.fecha_inicio.strftime('%d/%m/%Y'),
+                        tipo_permiso=permiso.get_tipo_display()
+                    )
             
             messages.success(
                 request,
@@ -890,11 +1000,10 @@ def lista_permisos_ausencia(request):
         # Padres solo ven los permisos de sus hijos
         ninos_ids = obtener_ninos_permitidos(request.user).values_list('id', flat=True)
         permisos = PermisoAusencia.objects.filter(nino_id__in=ninos_ids)
-        permisos = permisos.select_related('nino', 'solicitante', 'aprobado_por').order_by('-fecha_solicitud')
+        permisos = permisos.select_related('nino', 'solicitante', 'aprobado_por')
         
-        paginator = Paginator(permisos, 15)
-        page_number = request.GET.get('page')
-        page_obj = paginator.get_page(page_number)
+        paginator = PaginadorCursor(permisos, 'fecha_solicitud', 15)
+        page_obj = paginator.get_page(request.GET.get('cursor'))
         
         context = {
             'page_obj': page_obj,
@@ -911,18 +1020,22 @@ def lista_permisos_ausencia(request):
         else:
             permisos = PermisoAusencia.objects.filter(estado=estado_filtro)
         
-        permisos = permisos.select_related('nino', 'solicitante', 'aprobado_por').order_by('-fecha_solicitud')
+        permisos = permisos.select_related('nino', 'solicitante', 'aprobado_por')
+        
+        paginator = PaginadorCursor(permisos, 'fecha_solicitud', 15)
+        page_obj = paginator.get_page(request.GET.get('cursor'))
         
-        paginator = Paginator(permisos, 15)
-        page_number = request.GET.get('page')
-        page_obj = paginator.get_page(page_number)
+        # Totales por estado para las pestañas, en una sola consulta
+        totales = dict(
+            PermisoAusencia.objects.values_list('estado').annotate(total=Count('id')).order_by()
+        )
         
         context = {
             'page_obj': page_obj,
             'estado_filtro': estado_filtro,
-            'total_pendientes': PermisoAusencia.objects.filter(estado='pendiente').count(),
-            'total_aprobados': PermisoAusencia.objects.filter(estado='aprobado').count(),
-            'total_rechazados': PermisoAusencia.objects.filter(estado='rechazado').count(),
+            'total_pendientes': totales.get('pendiente', 0),
+            'total_aprobados': totales.get('aprobado', 0),
+            'total_rechazados': totales.get('rechazado', 0),
             'es_admin': True,
             'es_padre': False,
         }
@@ -946,46 +1059,43 @@ def gestionar_permiso_ausencia(request, pk):
             permiso.aprobado_por = request.user
             permiso.fecha_gestion = timezone.now()
             permiso.notas_gestion = notas
-            permiso.save()
             
-            # Si se aprueba, notificar al maestro
-            if accion == 'aprobar':
-                try:
+            with transaction.atomic():
+                permiso.save()
+                
+                # Si se aprueba, justificar la asistencia y notificar al maestro
+                if accion == 'aprobar':
+                    dias = reconciliar_permiso(permiso, request.user)
+                    if dias:
+                        messages.info(request, f'Se justificó la asistencia de {dias} día(s) del permiso.')
+                    
                     # Obtener el maestro del niño
-                    asignacion = permiso.nino.asignacion_aula
-                    maestro = asignacion.seccion.maestro
+                    asignacion = AsignacionAula.objects.filter(nino=permiso.nino).select_related('seccion__maestro').first()
+                    maestro = asignacion.seccion.maestro if asignacion else None
                     
                     if maestro and maestro.email:
-                        # Formatear fechas
-                        fecha_inicio = permiso.fecha_inicio.strftime('%d/%m/%Y')
-                        fecha_fin = permiso.fecha_fin.strftime('%d/%m/%Y') if permiso.fecha_fin else None
-                        
-                        # Enviar notificación al maestro
-                        enviar_notificacion_permiso_aprobado(
-                            maestro.email,
-                            permiso.nino.nombre_completo,
-                            fecha_inicio,
-                            fecha_fin,
-                            permiso.get_tipo_display(),
-                            permiso.motivo,
-                            permiso.horario_ausencia()
+                        # Encolar notificación al maestro (se envía en segundo plano)
+                        encolar_notificacion(
+                            'permiso_aprobado', maestro.email, request.user,
+                            nino=permiso.nino, fecha=permiso.fecha_inicio, permiso=permiso,
+                            nombre_nino=permiso.nino.nombre_completo,
+                            fecha_inicio=permiso.fecha_inicio.strftime('%d/%m/%Y'),
+                            fecha_fin=permiso.fecha_fin.strftime('%d/%m/%Y') if permiso.fecha_fin else None,
+                            tipo_permiso=permiso.get_tipo_display(),
+                            motivo=permiso.motivo,
+                            horario=permiso.horario_ausencia()
                         )
                         messages.success(
                             request,
-                            f'Permiso aprobado exitosamente. Se ha notificado al maestro {maestro.nombre_completo}.'
+                            f'Permiso aprobado exitosamente. Se notificará al maestro {maestro.nombre_completo}.'
                         )
                     else:
                         messages.warning(
                             request,
                             'Permiso aprobado, pero el niño no tiene maestro asignado o el maestro no tiene email.'
                         )
-                except Exception as e:
-                    messages.warning(
-                        request,
-                        f'Permiso aprobado, pero no se pudo enviar la notificación al maestro: {str(e)}'
-                    )
-            else:
-                messages.success(request, 'Permiso rechazado exitosamente.')
+                else:
+                    messages.success(request, 'Permiso rechazado exitosamente.')
             
             return redirect('lista_permisos_ausencia')
     
@@ -59,6 +59,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.middleware.RolesMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -75,6 +76,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'core.context_processors.roles',
             ],
         },
     },
@@ -152,6 +154,82 @@ BREVO_API_KEY = os.environ.get("BREVO_API_KEY")
 DEFAULT_FROM_EMAIL ='ra16004@ues.edu.sv'
 PASSWORD_RESET_TIMEOUT = 3600 * 5
 
+# Días que se guardan las claves de idempotencia de la sincronización sin conexión;
+# también es la antigüedad máxima de una fecha que la sincronización acepta
+SINCRONIZACION_TTL_DIAS = int(os.environ.get('SINCRONIZACION_TTL_DIAS', 7))
+
+# Segundos que la sincronización vuelve a leer detrás del cursor: cubre las
+# transacciones de asistencia que confirman después de otra con marca posterior
+# (debe superar la duración máxima de una escritura de asistencia)
+SINCRONIZACION_VENTANA_SEGUNDOS = int(os.environ.get('SINCRONIZACION_VENTANA_SEGUNDOS', 60))
+
+# Pub/sub del tablero de asistencia en vivo (SSE sobre sigs.asgi).
+# BackendMemoria reparte dentro de un mismo proceso; con varios workers se
+# reemplaza por un backend sobre un broker externo con la misma interfaz.
+EVENTOS_BACKEND = os.environ.get('EVENTOS_BACKEND', 'core.eventos.BackendMemoria')
+
+# Worker de la bandeja de salida de correos (manage.py procesar_notificaciones)
+NOTIFICACIONES_CONCURRENCIA = int(os.environ.get('NOTIFICACIONES_CONCURRENCIA', 4))
+NOTIFICACIONES_TAMANO_LOTE = int(os.environ.get('NOTIFICACIONES_TAMANO_LOTE', 50))
+# Cupo por destinatario (cubeta de tokens): ráfaga máxima y recarga por hora
+NOTIFICACIONES_CUPO_DESTINATARIO = int(os.environ.get('NOTIFICACIONES_CUPO_DESTINATARIO', 5))
+NOTIFICACIONES_RECARGA_POR_HORA = float(os.environ.get('NOTIFICACIONES_RECARGA_POR_HORA', 10))
+
+# Cliente de Brevo compartido por proceso (core.email.obtener_api_brevo).
+# El pool debe cubrir al menos NOTIFICACIONES_CONCURRENCIA envíos simultáneos;
+# BREVO_API_URL vacío usa el host por defecto del SDK.
+BREVO_POOL_MAXSIZE = int(os.environ.get('BREVO_POOL_MAXSIZE', 10))
+BREVO_API_URL = os.environ.get('BREVO_API_URL', '')
+
+# Backend de correo (core.backends_correo):
+# - BackendBrevo: API de Brevo (producción)
+# - BackendMemoria: guarda los correos en memoria, no envía nada
+# - BackendBrevoLocal: servidor falso de Brevo (manage.py servidor_brevo_falso) en BREVO_FALSO_URL
+CORREO_BACKEND = os.environ.get('CORREO_BACKEND', 'core.backends_correo.BackendBrevo')
+BREVO_FALSO_URL = os.environ.get('BREVO_FALSO_URL', 'http://127.0.0.1:8025/v3')
+
+# Entrega resiliente: presupuesto de tiempo por llamada (segundos) y circuito
+# que deja de llamar a Brevo tras N fallas seguidas y prueba de nuevo tras la espera
+BREVO_TIMEOUT_CONEXION = float(os.environ.get('BREVO_TIMEOUT_CONEXION', 3))
+BREVO_TIMEOUT_LECTURA = float(os.environ.get('BREVO_TIMEOUT_LECTURA', 10))
+BREVO_CIRCUITO_FALLOS = int(os.environ.get('BREVO_CIRCUITO_FALLOS', 5))
+BREVO_CIRCUITO_ESPERA = float(os.environ.get('BREVO_CIRCUITO_ESPERA', 30))
+
+# Token para que Prometheus lea /metricas/ (Authorization: Bearer <token>); sin él solo entran los admins
+METRICAS_TOKEN = os.environ.get('METRICAS_TOKEN', '')
+
+# Caché de Django, compartida entre workers: Redis si hay REDIS_URL; si no, en
+# producción la tabla core_cache (manage.py createcachetable, en build.sh) y en
+# DEBUG la memoria local (un proceso). Los roles y niños permitidos solo se
+# cachean entre requests con Redis o memoria local: con core_cache leerlos
+# costaría tantas consultas como calcularlos (ver core.utils).
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+elif DEBUG:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'OPTIONS': {'MAX_ENTRIES': 10000},
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'core_cache',
+            'OPTIONS': {'MAX_ENTRIES': 10000},
+        }
+    }
+ACCESO_CACHE_SEGUNDOS = int(os.environ.get('ACCESO_CACHE_SEGUNDOS', 300))
+
+# Límite del tiempo de importación al arrancar (manage.py medir_arranque, en build.sh)
+ARRANQUE_MAX_IMPORT_MS = float(os.environ.get('ARRANQUE_MAX_IMPORT_MS', 1000))
+
 # This production code might break development mode, so we check whether we're in DEBUG mode
 if not DEBUG:
     # Tell Django to copy static assets into a path called `staticfiles` (this is specific to Render)